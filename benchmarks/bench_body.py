@@ -0,0 +1,49 @@
+"""
+Compares building a private request body the old way, cleaned into a dict that is
+urlencoded once to be signed and again by requests to be sent, against encoding it
+once to bytes that are both signed and sent.
+
+    poetry run python -m benchmarks.bench_body
+"""
+
+import timeit
+import urllib.parse
+
+from requests.models import RequestEncodingMixin
+
+from kraken_spot.auth import Signer
+from kraken_spot.http import clean_params, encode_params
+
+from .bench_signing import DATA, SECRET, URL_PATH
+
+NUMBER = 50_000
+BODY = {**DATA, "price2": None, "oflags": "post", "validate": True, "userref": 0}
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<40} {seconds / NUMBER * 1e6:8.2f} us/call")
+
+
+def main():
+    signer = Signer(SECRET)
+
+    def twice():
+        body = clean_params(BODY)
+        signer.sign(URL_PATH, body["nonce"], urllib.parse.urlencode(body))
+        RequestEncodingMixin._encode_params(body)
+
+    def once():
+        body = encode_params(BODY)
+        signer.sign(URL_PATH, BODY["nonce"], body)
+        RequestEncodingMixin._encode_params(body)
+
+    cases = {
+        "clean, encode to sign, encode to send": twice,
+        "encode once, sign and send the bytes": once,
+    }
+    for name, fn in cases.items():
+        report(name, min(timeit.repeat(fn, number=NUMBER, repeat=5)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Compares decoding large responses with the standard library against the fastest
+installed JSON library, and against decoding via an intermediate str as
+`requests.Response.json` does.
+
+    poetry run python -m benchmarks.bench_json
+"""
+
+import json
+import timeit
+
+from kraken_spot.http import json_loads
+
+from .payloads import PAYLOADS
+
+NUMBER = 200
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<40} {seconds / NUMBER * 1e3:8.3f} ms/call")
+
+
+def main():
+    print(f"fastest decoder: {json_loads.__module__}.{json_loads.__name__}")
+    for endpoint, make_payload in PAYLOADS.items():
+        raw = make_payload()
+        print(f"\n{endpoint} ({len(raw) / 1024:.0f} KiB)")
+        cases = {
+            "json.loads(bytes.decode())": lambda: json.loads(raw.decode()),
+            "json.loads(bytes)": lambda: json.loads(raw),
+            "json_loads(bytes)": lambda: json_loads(raw),
+        }
+        for name, fn in cases.items():
+            report(name, min(timeit.repeat(fn, number=NUMBER, repeat=3)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares decoding large Ledgers and ClosedOrders responses eagerly, as every response
+used to be, against the lazily parsed KrakenResponse, for callers that only check
+`ok`, forward `raw`, or read the whole result.
+
+    poetry run python -m benchmarks.bench_response
+"""
+
+import timeit
+import tracemalloc
+
+from kraken_spot.http import (
+    HTTPResponse,
+    KrakenResponse,
+    json_loads,
+    to_kraken_response,
+)
+
+from .payloads import closed_orders, ledgers
+
+NUMBER = 50
+PAYLOADS = {
+    "Ledgers (2000 entries)": lambda: ledgers(2000),
+    "ClosedOrders (500 orders)": lambda: closed_orders(500),
+}
+
+
+def eager(raw: bytes) -> KrakenResponse:
+    body = json_loads(raw)
+    return KrakenResponse(body.get("result", {}), body.get("error", []))
+
+
+def lazy(raw: bytes) -> KrakenResponse:
+    return to_kraken_response(HTTPResponse(200, content=raw))
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    kept = fn()  # noqa: F841 held until the peak is read
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    for name, make_payload in PAYLOADS.items():
+        raw = make_payload()
+        print(f"\n{name}, {len(raw) / 1024:.0f} KiB")
+        print(f"{'':<34} {'ms/call':>9} {'peak KiB':>9}")
+        cases = {
+            "eager, check ok": lambda: eager(raw).ok,
+            "lazy, check ok": lambda: lazy(raw).ok,
+            "lazy, forward raw": lambda: lazy(raw).raw,
+            "eager, read result": lambda: eager(raw).result,
+            "lazy, read result": lambda: lazy(raw).result,
+        }
+        for case, fn in cases.items():
+            seconds = min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER
+            print(f"{case:<34} {seconds * 1e3:9.3f} {peak_kib(fn):9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares the cost of signing a private request with `get_kraken_signature` against a
+reused `Signer`.
+
+    poetry run python -m benchmarks.bench_signing
+"""
+
+import timeit
+import urllib.parse
+
+from kraken_spot.auth import Signer, get_kraken_signature
+
+SECRET = "kQH5HW/8p1uGOVjbgWA7FunAmGO8lsSUXNsu3eow76sz84Q18fWxnyRzBHCd3pd5nE9qa99HAZtuZuj6F1huXg=="
+URL_PATH = "/0/private/AddOrder"
+DATA = {
+    "nonce": "1616492376594",
+    "ordertype": "limit",
+    "pair": "XBTUSD",
+    "price": "37500",
+    "type": "buy",
+    "volume": "1.25",
+}
+NUMBER = 100_000
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<40} {seconds / NUMBER * 1e6:8.2f} us/call")
+
+
+def main():
+    signer = Signer(SECRET)
+    encoded = urllib.parse.urlencode(DATA).encode()
+
+    cases = {
+        "get_kraken_signature": lambda: get_kraken_signature(URL_PATH, DATA, SECRET),
+        "Signer.sign (dict)": lambda: signer.sign(URL_PATH, DATA["nonce"], DATA),
+        "Signer.sign (encoded body)": lambda: signer.sign(
+            URL_PATH, DATA["nonce"], encoded
+        ),
+    }
+    for name, fn in cases.items():
+        report(name, min(timeit.repeat(fn, number=NUMBER, repeat=3)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Large responses shaped like the ones Kraken returns for Trades, OHLC and ClosedOrders.
+They are generated deterministically, so benchmarks don't need network access.
+"""
+
+import json
+import random
+
+PAIR = "XXBTZUSD"
+LAST = "1688671969993150842"
+
+
+def trades(rows: int = 1000) -> bytes:
+    rng = random.Random(1)
+    data = [
+        [
+            f"{30000 + rng.random() * 100:.1f}",
+            f"{rng.random():.8f}",
+            1688671000 + i * 0.1234,
+            rng.choice("bs"),
+            rng.choice("ml"),
+            "",
+            60000000 + i,
+        ]
+        for i in range(rows)
+    ]
+    return json.dumps({"error": [], "result": {PAIR: data, "last": LAST}}).encode()
+
+
+def ohlc(rows: int = 720) -> bytes:
+    rng = random.Random(2)
+    data = []
+    for i in range(rows):
+        o = 30000 + rng.random() * 100
+        data.append(
+            [
+                1688600000 + i * 60,
+                f"{o:.1f}",
+                f"{o + 10:.1f}",
+                f"{o - 10:.1f}",
+                f"{o + 1:.1f}",
+                f"{o + 0.5:.1f}",
+                f"{rng.random() * 10:.8f}",
+                rng.randint(1, 500),
+            ]
+        )
+    result = {PAIR: data, "last": 1688600000 + rows * 60}
+    return json.dumps({"error": [], "result": result}).encode()
+
+
+def closed_orders(rows: int = 50, trades_per_order: int = 20) -> bytes:
+    rng = random.Random(3)
+    closed = {}
+    for i in range(rows):
+        price = f"{30000 + rng.random() * 100:.1f}"
+        closed[f"O{i:05d}-ABCDE-FGHIJK"] = {
+            "refid": None,
+            "userref": 0,
+            "status": "closed",
+            "reason": None,
+            "opentm": 1688600000.1234 + i,
+            "closetm": 1688600010.5678 + i,
+            "starttm": 0,
+            "expiretm": 0,
+            "descr": {
+                "pair": "XBTUSD",
+                "type": rng.choice(["buy", "sell"]),
+                "ordertype": "limit",
+                "price": price,
+                "price2": "0",
+                "leverage": "none",
+                "order": f"buy 0.01000000 XBTUSD @ limit {price}",
+                "close": "",
+            },
+            "vol": "0.01000000",
+            "vol_exec": "0.01000000",
+            "cost": "300.0",
+            "fee": "0.78",
+            "price": price,
+            "stopprice": "0.00000",
+            "limitprice": "0.00000",
+            "misc": "",
+            "oflags": "fciq",
+            "trades": [f"T{i:05d}-{j:05d}-ABCDEF" for j in range(trades_per_order)],
+        }
+    result = {"closed": closed, "count": rows}
+    return json.dumps({"error": [], "result": result}).encode()
+
+
+def ledgers(rows: int = 50) -> bytes:
+    rng = random.Random(4)
+    ledger = {
+        f"L{i:05d}-ABCDE-FGHIJK": {
+            "refid": f"T{i:05d}-ABCDE-FGHIJK",
+            "time": 1688600000.1234 + i,
+            "type": "trade",
+            "subtype": "",
+            "aclass": "currency",
+            "asset": "ZUSD",
+            "amount": f"{rng.random() * -1000:.4f}",
+            "fee": "0.0000",
+            "balance": f"{rng.random() * 10000:.4f}",
+        }
+        for i in range(rows)
+    }
+    result = {"ledger": ledger, "count": rows}
+    return json.dumps({"error": [], "result": result}).encode()
+
+
+PAYLOADS = {
+    "Trades": trades,
+    "OHLC": ohlc,
+    "ClosedOrders": closed_orders,
+    "Ledgers": ledgers,
+}
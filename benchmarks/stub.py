@@ -0,0 +1,52 @@
+"""
+An in-process stand-in for the HTTP transport, so a request can be followed from the
+endpoint method through signing and decoding without touching the network.
+"""
+
+from typing import Any, Dict, Optional
+
+from requests.models import RequestEncodingMixin
+
+from kraken_spot.http import Transport
+
+from .payloads import PAYLOADS
+
+DEFAULT_BODY = b'{"error":[],"result":{}}'
+
+
+class StubResponse:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+
+
+class StubTransport(Transport):
+    """
+    Answers every request with a canned body chosen by the last part of the url path.
+    The request is still built, cleaned and signed exactly as it would be for Kraken.
+    """
+
+    def __init__(self, bodies: Optional[Dict[str, bytes]] = None):
+        super().__init__()
+        self.bodies = bodies if bodies is not None else _payload_bodies()
+
+    def _respond(self, url: str) -> StubResponse:
+        return StubResponse(self.bodies.get(url.rsplit("/", 1)[-1], DEFAULT_BODY))
+
+    def get(self, url: str, params: Optional[Dict[str, str]] = None, stream=False):
+        return self._respond(url)
+
+    def post(
+        self,
+        url: str,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream=False,
+    ):
+        # encode the body as requests would before sending it
+        RequestEncodingMixin._encode_params(body)
+        return self._respond(url)
+
+
+def _payload_bodies() -> Dict[str, bytes]:
+    return {endpoint: make() for endpoint, make in PAYLOADS.items()}
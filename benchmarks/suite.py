@@ -0,0 +1,203 @@
+"""
+Microbenchmarks for the client side of a request, with regression thresholds.
+
+    poetry run python -m benchmarks.suite            # report
+    poetry run python -m benchmarks.suite --check    # fail on a regression
+    poetry run python -m benchmarks.suite --update   # record new thresholds
+
+Timings are compared in units of a fixed pure Python reference workload, timed just
+before each case, rather than in seconds. That keeps thresholds recorded on one machine
+meaningful on another, and cancels out most of the drift of a busy or throttled one. A
+case regresses when it costs more than `tolerance` times its recorded units.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from kraken_spot.auth import (
+    NonceGenerator,
+    Signer,
+    generate_nonce,
+    get_kraken_signature,
+)
+from kraken_spot.client import Client
+from kraken_spot.http import clean_params, json_loads
+
+from .payloads import PAYLOADS
+from .stub import StubTransport
+
+THRESHOLDS = os.path.join(os.path.dirname(__file__), "thresholds.json")
+DEFAULT_TOLERANCE = 2.0
+
+SECRET = "kQH5HW/8p1uGOVjbgWA7FunAmGO8lsSUXNsu3eow76sz84Q18fWxnyRzBHCd3pd5nE9qa99HAZtuZuj6F1huXg=="
+API_KEY = "I1IIIcw+WHHHHaHH2NXnTQaaHIOT1a/Gz+aa8aa4CaaMXUzP43DQHHH8"
+ORDER = {
+    "nonce": 1616492376594,
+    "ordertype": "limit",
+    "type": "buy",
+    "volume": "1.25",
+    "pair": "XBTUSD",
+    "price": "37500",
+    "price2": None,
+    "oflags": "post",
+    "validate": True,
+    "userref": 0,
+}
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], object]
+    number: int
+
+
+def _reference():
+    # plain interpreter work that every timing is expressed as a multiple of
+    d = {}
+    for i in range(200):
+        d[str(i)] = i * 2
+    return sum(d.values())
+
+
+def cases(tmp_dir: str) -> List[Case]:
+    signer = Signer(SECRET)
+    cleaned = clean_params(ORDER)
+    client = Client(api_key=API_KEY, private_key=SECRET, transport=StubTransport())
+    shared_nonce = NonceGenerator(os.path.join(tmp_dir, "nonce"))
+
+    out = [
+        Case("clean_params", lambda: clean_params(ORDER), 100_000),
+        Case(
+            "get_kraken_signature",
+            lambda: get_kraken_signature("/0/private/AddOrder", cleaned, SECRET),
+            20_000,
+        ),
+        Case(
+            "Signer.sign",
+            lambda: signer.sign("/0/private/AddOrder", cleaned["nonce"], cleaned),
+            50_000,
+        ),
+        Case("generate_nonce", generate_nonce, 200_000),
+        Case("NonceGenerator (shared file)", shared_nonce, 20_000),
+        Case("Client._base_url", client._base_url, 500_000),
+    ]
+
+    for endpoint, make_payload in PAYLOADS.items():
+        raw = make_payload()
+        out.append(Case(f"json_loads {endpoint}", lambda raw=raw: json_loads(raw), 200))
+
+    out += [
+        Case(
+            "_authorised_query Balance",
+            lambda: client._authorised_query("Balance"),
+            5_000,
+        ),
+        Case(
+            "_authorised_query AddOrder",
+            lambda: client._authorised_query("AddOrder", dict(ORDER, nonce=None)),
+            5_000,
+        ),
+        Case(
+            "_authorised_query ClosedOrders",
+            # results are decoded on first access, so read it to include the decode
+            lambda: client._authorised_query("ClosedOrders").result,
+            200,
+        ),
+        Case(
+            "_public_query Trades",
+            lambda: client._public_query("Trades").result,
+            200,
+        ),
+    ]
+    return out
+
+
+def measure(fn: Callable[[], object], number: int, repeat: int) -> float:
+    """
+    The fastest of `repeat` runs, in microseconds per call
+    """
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def load_thresholds(path: str = THRESHOLDS) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def run(
+    check: bool = False,
+    update: bool = False,
+    tolerance: Optional[float] = None,
+    only: Optional[str] = None,
+    repeat: int = 5,
+    quick: bool = False,
+) -> int:
+    thresholds = load_thresholds() or {}
+    recorded = thresholds.get("cases", {})
+    tolerance = tolerance or thresholds.get("tolerance", DEFAULT_TOLERANCE)
+
+    print(f"{'case':<36} {'us/call':>11} {'units':>9} {'limit':>9}")
+
+    results: Dict[str, float] = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for case in cases(tmp_dir):
+            if only and only not in case.name:
+                continue
+            reference = measure(_reference, 2_000, 3)
+            number = 1 if quick else case.number
+            us = measure(case.fn, number, 1 if quick else repeat)
+            units = us / reference
+            results[case.name] = units
+
+            # a single call is too noisy to compare against a threshold
+            limit = None
+            if case.name in recorded and not quick:
+                limit = recorded[case.name] * tolerance
+
+            flag = ""
+            if limit is not None and units > limit:
+                regressions.append(case.name)
+                flag = "  REGRESSION"
+            limit_text = f"{limit:9.4f}" if limit is not None else f"{'-':>9}"
+            print(f"{case.name:<36} {us:11.3f} {units:9.4f} {limit_text}{flag}")
+
+    if update:
+        recorded.update({name: round(u, 4) for name, u in results.items()})
+        data = {"tolerance": tolerance, "cases": recorded}
+        with open(THRESHOLDS, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nthresholds written to {THRESHOLDS}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1 if check else 0
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression")
+    parser.add_argument("--update", action="store_true", help="record thresholds")
+    parser.add_argument("--tolerance", type=float, help="allowed slowdown factor")
+    parser.add_argument("--only", help="run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--quick", action="store_true", help="run each case once, as a smoke test"
+    )
+    args = parser.parse_args(argv)
+    return run(
+        args.check, args.update, args.tolerance, args.only, args.repeat, args.quick
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+import asyncio
+import io
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+
+from .bulk import BulkQuery, BulkResponse, split_failed
+from .client import Client
+from .errors import REQUEST_FAILURES, ResponseError
+from .exports import DOWNLOAD_CHUNK_SIZE, acopy_export
+from .http import (
+    USER_AGENT,
+    HTTPResponse,
+    JSONDecoder,
+    KrakenResponse,
+    ResultTransform,
+    encoded_size,
+    json_loads,
+    to_kraken_response,
+)
+from .instrumentation import RequestTiming, ainstrumented
+from .orders import BatchCancelResponse, CancelQuery, split_failed_cancels
+from .pagination import Record, apaginate
+from .pool import AccountCall, ClientPool, PoolResponse, merge_result
+from .ratelimit import RATE_LIMIT_ERROR
+from .registry import AssetPairRegistry
+from .retry import READ_ONLY_ENDPOINTS
+from .storage import atomic_writer
+
+
+async def _on_connect_start(session, context, params):
+    context.connect_start = perf_counter()
+
+
+async def _on_connect_end(session, context, params):
+    timing = context.trace_request_ctx
+    if isinstance(timing, RequestTiming):
+        timing.connect = perf_counter() - context.connect_start
+
+
+class AsyncTransport:
+    """
+    Non-blocking transport backed by a single aiohttp session, so every request made
+    from the event loop shares one keep-alive connection pool.
+
+    aiohttp is an optional dependency: pip install kraken-spot[async]
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 100,
+        pool_maxsize_per_host: int = 0,
+        timeout: Optional[float] = 30.0,
+    ):
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.timeout = timeout
+        self._session: Any = None
+
+    def _get_session(self):
+        # the session must be created from within a running event loop
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError as e:
+                raise ImportError(
+                    "AsyncTransport requires aiohttp: pip install kraken-spot[async]"
+                ) from e
+
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize, limit_per_host=self.pool_maxsize_per_host
+            )
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_start.append(_on_connect_start)
+            trace.on_connection_create_end.append(_on_connect_end)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace],
+            )
+        return self._session
+
+    async def _timed_response(
+        self, request, decoder: Optional[JSONDecoder], timing: RequestTiming
+    ) -> HTTPResponse:
+        timing.connect = 0.0
+        start = perf_counter()
+        async with request as r:
+            headers_at = perf_counter()
+            content = await r.read()
+            read_at = perf_counter()
+        resp = HTTPResponse(r.status, content=content, decoder=decoder)
+        resp.errors
+
+        timing.decode = perf_counter() - read_at
+        timing.read = read_at - headers_at
+        timing.ttfb = headers_at - start - timing.connect
+        timing.status_code = r.status
+        timing.response_bytes = len(content)
+        return resp
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        decoder: Optional[JSONDecoder] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> HTTPResponse:
+        session = self._get_session()
+        if timing is not None:
+            timing.request_bytes = encoded_size(params)
+            request = session.get(url, params=params, trace_request_ctx=timing)
+            return await self._timed_response(request, decoder, timing)
+
+        async with session.get(url, params=params) as r:
+            return HTTPResponse(r.status, content=await r.read(), decoder=decoder)
+
+    async def post(
+        self,
+        url: str,
+        body: Optional[Union[bytes, Dict[str, Any]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        decoder: Optional[JSONDecoder] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> HTTPResponse:
+        session = self._get_session()
+        if timing is not None:
+            timing.request_bytes = encoded_size(body)
+            request = session.post(
+                url, data=body, headers=headers, trace_request_ctx=timing
+            )
+            return await self._timed_response(request, decoder, timing)
+
+        async with session.post(url, data=body, headers=headers) as r:
+            return HTTPResponse(r.status, content=await r.read(), decoder=decoder)
+
+    def stream_post(
+        self,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        """
+        A request whose body is read as it arrives:
+
+            async with transport.stream_post(url, body, headers) as r:
+                async for chunk in r.content.iter_chunked(1 << 20):
+                    ...
+        """
+        return self._get_session().post(url, data=body, headers=headers)
+
+    async def warm_up(self, url: str, connections: int = 1):
+        session = self._get_session()
+        responses = [await session.head(url) for _ in range(connections)]
+        for r in responses:
+            r.release()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+@dataclass
+class AsyncClient(Client):
+    """
+    An asyncio client. It exposes the same endpoint methods as `Client`, but each one
+    returns a coroutine.
+
+        async with AsyncClient() as client:
+            resp = await client.get_ticker_information("XBTUSD")
+
+    Parameter mapping and request signing are shared with the synchronous client. Only
+    the transport differs.
+    """
+
+    transport: AsyncTransport = field(  # type: ignore
+        default_factory=AsyncTransport, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        # pre-connecting needs a running event loop; await warm_up() instead
+        pass
+
+    async def _public_query(  # type: ignore
+        self,
+        url_path: str,
+        params: Optional[Dict[str, Any]] = None,
+        transform: Optional[ResultTransform] = None,
+    ) -> KrakenResponse:
+        instrument = self.instrument
+        template = RequestTiming(url_path) if instrument else None
+        request_url, params = self._prepare_public_query(url_path, params, template)
+        cached = self._cached_response(url_path, params, transform)
+        if cached is not None:
+            return cached
+
+        def fetch(timing: Optional[RequestTiming]) -> Awaitable[HTTPResponse]:
+            if timing is None:
+                return self.transport.get(request_url, params, self.json_decoder)
+            return self.transport.get(request_url, params, self.json_decoder, timing)
+
+        send = ainstrumented(instrument, template, fetch)
+
+        policy = self.retry_policy
+        if policy:
+            resp = await policy.acall(lambda: policy.ahedged(send), idempotent=True)
+        else:
+            resp = await send()
+        return self._cache_response(
+            url_path, params, to_kraken_response(resp, transform), transform
+        )
+
+    async def _authorised_query(  # type: ignore
+        self,
+        url_path: str,
+        body: Optional[Dict] = None,
+        transform: Optional[ResultTransform] = None,
+    ) -> KrakenResponse:
+        limiter = self.rate_limiter
+        instrument = self.instrument
+
+        async def fetch(timing: Optional[RequestTiming]) -> HTTPResponse:
+            if limiter:
+                wait = limiter.reserve(url_path)
+                while wait:
+                    await asyncio.sleep(wait)
+                    wait = limiter.reserve(url_path)
+
+            url, signed, headers = self._prepare_authorised_query(
+                url_path, body, timing
+            )
+            headers["User-Agent"] = USER_AGENT
+            if timing is None:
+                resp = await self.transport.post(
+                    url, signed, headers, self.json_decoder
+                )
+            else:
+                resp = await self.transport.post(
+                    url, signed, headers, self.json_decoder, timing
+                )
+            if limiter and RATE_LIMIT_ERROR in resp.errors:
+                limiter.record_rate_limit_exceeded()
+            return resp
+
+        template = RequestTiming(url_path, private=True) if instrument else None
+        send = ainstrumented(instrument, template, fetch)
+        policy = self.retry_policy
+        if policy and not getattr(self, "_otp", None):
+            resp = await policy.acall(send, url_path in READ_ONLY_ENDPOINTS)
+        else:
+            resp = await send()
+        return to_kraken_response(resp, transform)
+
+    async def _bulk_public_query(  # type: ignore
+        self, queries: List[BulkQuery], max_workers: int
+    ) -> BulkResponse:
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run(query: BulkQuery) -> KrakenResponse:
+            async with semaphore:
+                try:
+                    return await self._public_query(query.url_path, query.params)
+                except REQUEST_FAILURES as e:
+                    return KrakenResponse.failed(e)
+
+        out = BulkResponse()
+        retry = split_failed(queries, await asyncio.gather(*map(run, queries)), out)
+        if retry:
+            split_failed(retry, await asyncio.gather(*map(run, retry)), out)
+        return out
+
+    async def _bulk_cancel(  # type: ignore
+        self, queries: List[CancelQuery], max_workers: int
+    ) -> BatchCancelResponse:
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run(query: CancelQuery) -> KrakenResponse:
+            async with semaphore:
+                try:
+                    return await self._authorised_query(query.url_path, query.body)
+                except REQUEST_FAILURES as e:
+                    return KrakenResponse.failed(e)
+
+        out = BatchCancelResponse()
+        retry = split_failed_cancels(
+            queries, await asyncio.gather(*map(run, queries)), out
+        )
+        if retry:
+            split_failed_cancels(retry, await asyncio.gather(*map(run, retry)), out)
+        return out
+
+    async def _download(  # type: ignore
+        self, url_path: str, body: Dict[str, Any], out: BinaryIO, chunk_size: int
+    ) -> List[str]:
+        limiter = self.rate_limiter
+        if limiter:
+            wait = limiter.reserve(url_path)
+            while wait:
+                await asyncio.sleep(wait)
+                wait = limiter.reserve(url_path)
+
+        url, signed, headers = self._prepare_authorised_query(url_path, body)
+        async with self.transport.stream_post(url, signed, headers) as r:
+            errors = await acopy_export(r.content.iter_chunked(chunk_size), out)
+        if limiter and RATE_LIMIT_ERROR in errors:
+            limiter.record_rate_limit_exceeded()
+        return errors
+
+    async def retrieve_data_export(  # type: ignore
+        self, report_id: str
+    ) -> KrakenResponse:
+        out = io.BytesIO()
+        errors = await self._download(
+            "RetrieveExport", {"id": report_id}, out, DOWNLOAD_CHUNK_SIZE
+        )
+        return KrakenResponse(None if errors else out.getvalue(), errors)
+
+    async def download_data_export(  # type: ignore
+        self, report_id: str, path: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ) -> str:
+        with atomic_writer(path, "wb") as f:
+            errors = await self._download(
+                "RetrieveExport", {"id": report_id}, f, chunk_size
+            )
+            if errors:
+                raise ResponseError(errors)
+        return path
+
+    def _paginate(  # type: ignore
+        self,
+        fetch: Callable[[int], Awaitable[KrakenResponse]],
+        result_key: str,
+        prefetch: bool,
+    ) -> AsyncIterator[Record]:
+        return apaginate(fetch, result_key, prefetch)
+
+    async def load_pair_registry(self) -> AssetPairRegistry:  # type: ignore
+        pairs, assets = await asyncio.gather(
+            self.get_tradable_asset_pairs(), self.get_asset_info()
+        )
+        self.pair_registry = AssetPairRegistry.from_responses(pairs, assets)
+        return self.pair_registry
+
+    async def warm_up(self, connections: int = 1):  # type: ignore
+        await self.transport.warm_up(f"{self.endpoint}/", connections)
+
+    async def close(self):  # type: ignore
+        await self.transport.close()
+        if self.retry_policy:
+            self.retry_policy.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+class AsyncClientPool(ClientPool):
+    """
+    `ClientPool` for asyncio. Every account's `AsyncClient` shares one aiohttp
+    session, and fan-out calls are coroutines.
+
+        async with AsyncClientPool(credentials) as pool:
+            balances = await pool.get_account_balance()
+    """
+
+    client_class = AsyncClient
+    # shared by every fan-out, created on the event loop by the first
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    def _default_transport(self):
+        return AsyncTransport()
+
+    async def _fan_out(  # type: ignore
+        self, fn: AccountCall, clients: Dict[str, Client]
+    ) -> PoolResponse:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        semaphore = self._semaphore
+
+        async def run(client: Client) -> KrakenResponse:
+            async with semaphore:
+                try:
+                    return await fn(client)
+                except REQUEST_FAILURES as e:
+                    return KrakenResponse.failed(e)
+
+        out = PoolResponse()
+        responses = await asyncio.gather(*map(run, clients.values()))
+        for name, resp in zip(clients, responses):
+            merge_result(out, name, resp)
+        return out
+
+    async def close(self):  # type: ignore
+        await self.transport.close()
+        policy = self.options.get("retry_policy")
+        if policy:
+            policy.close()
+
+    async def __aenter__(self) -> "AsyncClientPool":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -1,19 +1,76 @@
 import base64
 import hashlib
 import hmac
+import os
+import threading
 import time
 import urllib.parse
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 
 from .errors import AuthError
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None  # type: ignore
+
+
+class NonceGenerator:
+    """
+    Hands out strictly increasing nonces. Values follow the current unix timestamp in
+    nanoseconds, but never repeat or go backwards when called from several threads at
+    once or when the clock is adjusted.
+
+    Give a `path` to share the sequence with other processes using the same API key.
+    The last nonce issued is kept in that file under an exclusive lock, so it also
+    acts as a high-water mark that survives restarts.
+
+    Kraken may still see nonces out of order when concurrent requests overtake each
+    other on the network. Set a nonce window on the API key to allow for that.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path and fcntl is None:
+            raise AuthError("sharing nonces between processes is not supported here")
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def __call__(self) -> int:
+        with self._lock:
+            if self.path:
+                nonce = self._next_shared(self.path)
+            else:
+                nonce = max(time.time_ns(), self._last + 1)
+            self._last = nonce
+            return nonce
+
+    def _next_shared(self, path: str) -> int:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            data = os.pread(fd, 32, 0)
+            last = int(data) if data.strip() else 0
+            nonce = max(time.time_ns(), last + 1, self._last + 1)
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, str(nonce).encode(), 0)
+            return nonce
+        finally:
+            # closing the descriptor also releases the lock
+            os.close(fd)
+
+
+_default_nonce_generator = NonceGenerator()
+
 
 def generate_nonce() -> int:
     """
-    Each API request needs a nonce value that increases on each request. For simplicity
-    this will return the current unix timestamp in nanoseconds
+    Each API request needs a nonce value that increases on each request. This returns
+    the current unix timestamp in nanoseconds, bumped if needed so that it is always
+    greater than the last nonce issued by this process.
     """
-    return time.time_ns()
+    return _default_nonce_generator()
 
 
 def get_kraken_signature(url_path: str, data: Dict[str, Any], secret: str) -> str:
@@ -30,3 +87,37 @@ def get_kraken_signature(url_path: str, data: Dict[str, Any], secret: str) -> st
     mac = hmac.new(base64.b64decode(secret), message, hashlib.sha512)
     sig_digest = base64.b64encode(mac.digest())
     return sig_digest.decode()
+
+
+class Signer:
+    """
+    Signs private requests for a single secret. The secret is decoded and the HMAC key
+    schedule built once, then copied for each request rather than rebuilt from
+    scratch as `get_kraken_signature` does.
+    """
+
+    def __init__(self, secret: str):
+        self.secret = secret
+        self._mac = hmac.new(base64.b64decode(secret), digestmod=hashlib.sha512)
+        self._url_paths: Dict[str, bytes] = {}
+
+    def sign(
+        self, url_path: str, nonce: Any, post_data: Union[bytes, str, Dict[str, Any]]
+    ) -> str:
+        """
+        Returns the API-Sign value. `post_data` can be the already urlencoded body, so
+        it isn't encoded a second time just to be signed.
+        """
+        if isinstance(post_data, dict):
+            post_data = urllib.parse.urlencode(post_data)
+        if isinstance(post_data, str):
+            post_data = post_data.encode()
+
+        encoded_path = self._url_paths.get(url_path)
+        if encoded_path is None:
+            encoded_path = self._url_paths[url_path] = url_path.encode()
+
+        digest = hashlib.sha256(str(nonce).encode() + post_data).digest()
+        mac = self._mac.copy()
+        mac.update(encoded_path + digest)
+        return base64.b64encode(mac.digest()).decode()
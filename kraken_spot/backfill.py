@@ -0,0 +1,152 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .columnar import BUY, LIMIT, MARKET, SELL, TradeColumns
+from .errors import REQUEST_FAILURES, ResponseError, describe_exception
+from .ratelimit import Pacer
+from .storage import RecordFile, read_json, write_json
+
+TRADE_FIELDS = [
+    ("price", "d"),
+    ("volume", "d"),
+    ("time", "d"),
+    ("trade_id", "q"),
+    ("side", "b"),
+    ("order_type", "b"),
+]
+
+
+class TradeStore:
+    """
+    Trades kept on disk per pair, as fixed width records in `<pair>.trades` with the
+    cursor to resume from in `<pair>.json`.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _file(self, pair: str) -> RecordFile:
+        return RecordFile(os.path.join(self.directory, f"{pair}.trades"), TRADE_FIELDS)
+
+    def _checkpoint_path(self, pair: str) -> str:
+        return os.path.join(self.directory, f"{pair}.json")
+
+    def checkpoint(self, pair: str) -> Dict[str, Any]:
+        """
+        The `last` cursor and the number of records written when it was saved
+        """
+        return read_json(self._checkpoint_path(pair))
+
+    def recover(self, pair: str):
+        """
+        Drops any records appended after the last checkpoint, which a crash can leave
+        behind. They are fetched again when the backfill resumes.
+        """
+        self._file(pair).truncate(self.checkpoint(pair).get("records", 0))
+
+    def append(self, pair: str, rows: List[List[Any]], last: int):
+        """
+        Appends trades as returned by the Trades endpoint, then moves the checkpoint
+        """
+        file = self._file(pair)
+        file.append(
+            (
+                float(row[0]),
+                float(row[1]),
+                float(row[2]),
+                int(row[6]) if len(row) > 6 else 0,
+                BUY if row[3] == "b" else SELL,
+                MARKET if row[4] == "m" else LIMIT,
+            )
+            for row in rows
+        )
+        write_json(self._checkpoint_path(pair), {"last": last, "records": len(file)})
+
+    def count(self, pair: str) -> int:
+        return len(self._file(pair))
+
+    def columns(
+        self, pair: str, start: int = 0, stop: Optional[int] = None
+    ) -> TradeColumns:
+        """
+        Reads stored trades through a memory map
+        """
+        cols = self._file(pair).columns(start, stop)
+        return TradeColumns(last=self.checkpoint(pair).get("last"), **cols)
+
+
+@dataclass
+class BackfillStatus:
+    pair: str
+    records: int = 0
+    last: Optional[int] = None
+    error: Optional[str] = None
+
+
+class Backfill:
+    """
+    Walks the Trades endpoint forward from `since` for each pair, appending every
+    trade to a TradeStore. Progress is checkpointed after each page, so a backfill
+    that is interrupted resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        client,
+        store: TradeStore,
+        max_workers: int = 4,
+        min_interval: float = 1.0,
+    ):
+        self.client = client
+        self.store = store
+        self.max_workers = max_workers
+        # Kraken allows roughly one public request per second, shared by every worker
+        self.pacer = Pacer(min_interval)
+
+    def run(
+        self, pairs: List[str], since: int = 0, until: Optional[int] = None
+    ) -> Dict[str, BackfillStatus]:
+        """
+        Backfills pairs concurrently until each reaches `until` (a nanosecond
+        timestamp) or catches up with the present.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            statuses = pool.map(lambda p: self.backfill_pair(p, since, until), pairs)
+            return {status.pair: status for status in statuses}
+
+    def backfill_pair(
+        self, pair: str, since: int = 0, until: Optional[int] = None
+    ) -> BackfillStatus:
+        self.store.recover(pair)
+        cursor = self.store.checkpoint(pair).get("last", since)
+        status = BackfillStatus(pair, last=cursor)
+
+        try:
+            while until is None or cursor < until:
+                self.pacer.wait()
+                resp = self.client.get_recent_trades(pair, cursor)
+                if not resp.ok:
+                    raise ResponseError(resp.errors)
+
+                last = int(resp.result["last"])
+                page = next(v for k, v in resp.result.items() if k != "last")
+                rows = page
+                if until is not None:
+                    rows = [r for r in page if float(r[2]) * 1e9 < until]
+                    if len(rows) < len(page):
+                        # everything before `until` is stored, resume from there
+                        last = until - 1
+                if rows:
+                    self.store.append(pair, rows, last)
+                    status.records += len(rows)
+
+                if not rows or last == cursor:
+                    break
+                cursor = status.last = last
+        except REQUEST_FAILURES as e:
+            status.error = describe_exception(e)
+
+        return status
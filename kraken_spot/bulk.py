@@ -0,0 +1,207 @@
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .errors import REQUEST_FAILURES, ErrorCategory
+from .http import KrakenResponse, encode_params
+
+# conservative limit that is safe for every proxy and load balancer in the path
+MAX_URL_LENGTH = 2048
+
+DEFAULT_MAX_WORKERS = 8
+
+
+@dataclass
+class BulkResponse:
+    """
+    The merged result of a request fanned out over many pairs. Errors are reported
+    per pair, so one bad pair does not hide the results for the others.
+    """
+
+    result: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return len(self.errors) == 0
+
+
+class BulkQuery(NamedTuple):
+    pairs: List[str]
+    url_path: str
+    params: Dict[str, Any]
+    # single pair endpoints are keyed by the requested pair, comma joined endpoints by
+    # the pair names Kraken returns
+    keyed_by_pair: bool
+
+
+def chunk_pairs(
+    pairs: List[str],
+    base_url: str,
+    max_url_length: int = MAX_URL_LENGTH,
+    params: Optional[Dict[str, Any]] = None,
+) -> List[List[str]]:
+    """
+    Packs pairs into as few comma joined groups as fit in a `pair=` query string
+    without the url exceeding `max_url_length`. `params` are the query's other params,
+    sent alongside the pairs.
+    """
+    others = len(encode_params(params or {}))
+    budget = max_url_length - len(base_url) - len("?pair=") - (others and others + 1)
+    sep = len(urllib.parse.quote(","))
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for pair in pairs:
+        cost = len(urllib.parse.quote(pair))
+        if current and size + sep + cost > budget:
+            chunks.append(current)
+            current, size = [], 0
+        size += cost + (sep if current else 0)
+        current.append(pair)
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_failed(queries: List[BulkQuery], responses: List[KrakenResponse], out):
+    """
+    Merges successful responses into `out` and returns single pair queries to retry for
+    any comma joined query Kraken rejected as invalid, since it rejects the whole group
+    when one of its pairs is unknown. Any other failure is reported for every pair in
+    the query.
+    """
+    retry = []
+    for query, resp in zip(queries, responses):
+        if resp.ok:
+            if query.keyed_by_pair:
+                out.result[query.pairs[0]] = resp.result
+            else:
+                out.result.update(resp.result)
+        elif (
+            len(query.pairs) > 1
+            and resp.error_category is ErrorCategory.INVALID_ARGUMENTS
+        ):
+            for pair in query.pairs:
+                params = {**query.params, "pair": pair}
+                retry.append(BulkQuery([pair], query.url_path, params, False))
+        else:
+            for pair in query.pairs:
+                out.errors[pair] = list(resp.errors)
+    return retry
+
+
+class BulkMarketData:
+    """
+    Market data helpers that fetch many pairs at once. This is a mixin to be used on
+    the Client class alongside PublicEndpoints.
+    """
+
+    def _run_bulk_query(self, query: BulkQuery) -> KrakenResponse:
+        try:
+            return self._public_query(query.url_path, query.params)  # type: ignore
+        except REQUEST_FAILURES as e:
+            return KrakenResponse.failed(e)
+
+    def _bulk_public_query(
+        self, queries: List[BulkQuery], max_workers: int
+    ) -> BulkResponse:
+        out = BulkResponse()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            retry = split_failed(
+                queries, list(pool.map(self._run_bulk_query, queries)), out
+            )
+            if retry:
+                split_failed(retry, list(pool.map(self._run_bulk_query, retry)), out)
+        return out
+
+    def _joined_queries(
+        self,
+        url_path: str,
+        pairs: List[str],
+        params: Dict[str, Any],
+        max_url_length: int,
+    ) -> List[BulkQuery]:
+        base_url = f"{self._base_url()}/public/{url_path}"  # type: ignore
+        return [
+            BulkQuery(chunk, url_path, {**params, "pair": ",".join(chunk)}, False)
+            for chunk in chunk_pairs(pairs, base_url, max_url_length, params)
+        ]
+
+    def _per_pair_queries(
+        self, url_path: str, pairs: List[str], params: Dict[str, Any]
+    ) -> List[BulkQuery]:
+        return [BulkQuery([p], url_path, {**params, "pair": p}, True) for p in pairs]
+
+    def get_ticker_information_bulk(
+        self,
+        pairs: List[str],
+        max_url_length: int = MAX_URL_LENGTH,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> BulkResponse:
+        """
+        Ticker information for many pairs, packed into as few requests as possible.
+        Results are keyed by the pair names Kraken returns.
+        """
+        queries = self._joined_queries("Ticker", pairs, {}, max_url_length)
+        return self._bulk_public_query(queries, max_workers)
+
+    def get_tradable_asset_pairs_bulk(
+        self,
+        pairs: List[str],
+        info: Optional[str] = None,
+        max_url_length: int = MAX_URL_LENGTH,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> BulkResponse:
+        """
+        Asset pair details for many pairs, packed into as few requests as possible.
+        Results are keyed by the pair names Kraken returns.
+        """
+        queries = self._joined_queries(
+            "AssetPairs", pairs, {"info": info}, max_url_length
+        )
+        return self._bulk_public_query(queries, max_workers)
+
+    def get_order_book_bulk(
+        self,
+        pairs: List[str],
+        count: Optional[int] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> BulkResponse:
+        """
+        Order books for many pairs, one request per pair with at most `max_workers` in
+        flight. Results are keyed by the requested pair.
+        """
+        queries = self._per_pair_queries("Depth", pairs, {"count": count})
+        return self._bulk_public_query(queries, max_workers)
+
+    def get_ohlc_data_bulk(
+        self,
+        pairs: List[str],
+        interval: Optional[int] = None,
+        since: Optional[int] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> BulkResponse:
+        """
+        OHLC data for many pairs, one request per pair with at most `max_workers` in
+        flight. Results are keyed by the requested pair.
+        """
+        params = {"interval": interval, "since": since}
+        queries = self._per_pair_queries("OHLC", pairs, params)
+        return self._bulk_public_query(queries, max_workers)
+
+    def get_recent_trades_bulk(
+        self,
+        pairs: List[str],
+        since: Optional[int] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> BulkResponse:
+        """
+        Recent trades for many pairs, one request per pair with at most `max_workers`
+        in flight. Results are keyed by the requested pair.
+        """
+        queries = self._per_pair_queries("Trades", pairs, {"since": since})
+        return self._bulk_public_query(queries, max_workers)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .http import KrakenResponse
+from .storage import write_json
+
+# seconds each endpoint's responses stay fresh, endpoints not listed are never cached
+DEFAULT_TTLS: Dict[str, float] = {
+    "Assets": 3600,
+    "AssetPairs": 3600,
+    "SystemStatus": 30,
+}
+
+
+class ResponseCache:
+    """
+    Caches successful responses from slow changing public endpoints, with a time to
+    live per endpoint and least recently used eviction once `max_entries` is reached.
+
+    With a `path`, the cache is loaded from that file when created and written back
+    whenever an entry is added, so a freshly started process can reuse the asset and
+    pair tables without going to the network.
+
+    Cached results are shared between callers and should not be modified.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 256,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires at, url path, result)
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(url_path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        return json.dumps([url_path, params or {}], sort_keys=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, url_path: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[KrakenResponse]:
+        if url_path not in self.ttls:
+            return None
+
+        key = self.key(url_path, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return KrakenResponse(entry[2], [])
+
+    def put(
+        self,
+        url_path: str,
+        params: Optional[Dict[str, Any]],
+        response: KrakenResponse,
+    ):
+        ttl = self.ttls.get(url_path)
+        if ttl is None or not response.ok:
+            return
+
+        with self._lock:
+            key = self.key(url_path, params)
+            self._entries[key] = (self._clock() + ttl, url_path, response.result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if self.path:
+            self.save(self.path)
+
+    def invalidate(self, url_path: Optional[str] = None):
+        """
+        Drops every entry for `url_path`, or everything if no path is given
+        """
+        with self._lock:
+            if url_path is None:
+                self._entries.clear()
+            else:
+                for key in [k for k, v in self._entries.items() if v[1] == url_path]:
+                    del self._entries[key]
+
+    def save(self, path: str):
+        with self._lock:
+            entries = [[k, *v] for k, v in self._entries.items()]
+        write_json(path, {"entries": entries})
+
+    def load(self, path: str):
+        with open(path) as f:
+            entries = json.load(f).get("entries", [])
+
+        now = self._clock()
+        with self._lock:
+            for key, expires, url_path, result in entries[-self.max_entries :]:
+                if expires > now:
+                    self._entries[key] = (expires, url_path, result)
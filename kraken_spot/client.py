@@ -1,21 +1,61 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
+from .auth import NonceGenerator
+from .bulk import BulkMarketData
+from .cache import ResponseCache
+from .http import JSONDecoder, Transport
+from .instrumentation import Instrument
 from .private import PrivateEndpoints
 from .public import PublicEndpoints
+from .ratelimit import RateLimiter
+from .registry import AssetPairRegistry
+from .retry import RetryPolicy
 
 
 @dataclass
-class Client(PublicEndpoints, PrivateEndpoints):
+class Client(PublicEndpoints, PrivateEndpoints, BulkMarketData):
     api_key: Optional[str] = None
     private_key: Optional[str] = None
     endpoint: Optional[str] = "https://api.kraken.com"
     api_version: Optional[int] = 0
+    transport: Transport = field(default_factory=Transport, repr=False, compare=False)
+    pre_connect: bool = False
+    rate_limiter: Optional[RateLimiter] = field(default=None, compare=False)
+    nonce_generator: Optional[NonceGenerator] = field(default=None, compare=False)
+    json_decoder: Optional[JSONDecoder] = field(default=None, compare=False)
+    response_cache: Optional[ResponseCache] = field(default=None, compare=False)
+    pair_registry: Optional[AssetPairRegistry] = field(default=None, compare=False)
+    retry_policy: Optional[RetryPolicy] = field(default=None, compare=False)
+    instrument: Optional[Instrument] = field(default=None, compare=False)
+
+    def __post_init__(self):
+        if self.pre_connect:
+            self.warm_up()
 
     def _base_url(self) -> str:
         return f"{self.endpoint}/{self.api_version}"
 
+    def load_pair_registry(self) -> AssetPairRegistry:
+        """
+        Builds the pair registry from the asset and asset pair endpoints. Orders placed
+        afterwards are validated against it.
+        """
+        self.pair_registry = AssetPairRegistry.from_client(self)
+        return self.pair_registry
+
+    def warm_up(self, connections: int = 1):
+        """
+        Opens connections to the API endpoint ahead of the first request
+        """
+        self.transport.warm_up(f"{self.endpoint}/", connections)
+
+    def close(self):
+        self.transport.close()
+        if self.retry_policy:
+            self.retry_policy.close()
+
 
 class DefaultClient(Client):
     """
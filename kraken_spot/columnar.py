@@ -0,0 +1,124 @@
+"""
+Column oriented views of OHLC and trade results. Each field is a contiguous array of
+float64 or int64 values, as NumPy arrays when NumPy is installed and `array.array`
+otherwise, parsed in bulk rather than row by row.
+"""
+
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+BUY = 1
+SELL = -1
+MARKET = 1
+LIMIT = 2
+
+
+def float_column(values: Sequence[Any]) -> Sequence[float]:
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.float64)
+    return array("d", map(float, values))
+
+
+def int_column(values: Sequence[Any]) -> Sequence[int]:
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.int64)
+    return array("q", map(int, values))
+
+
+def flag_column(values: Sequence[str], on: str, if_on: int, if_off: int):
+    if numpy is not None:
+        return numpy.where(numpy.array(values) == on, if_on, if_off).astype(numpy.int8)
+    return array("b", [if_on if v == on else if_off for v in values])
+
+
+@dataclass
+class OHLCColumns:
+    time: Sequence[int]
+    open: Sequence[float]
+    high: Sequence[float]
+    low: Sequence[float]
+    close: Sequence[float]
+    vwap: Sequence[float]
+    volume: Sequence[float]
+    count: Sequence[int]
+    # the `since` value to pass to fetch the next set of candles
+    last: Optional[int] = None
+
+    @classmethod
+    def from_rows(cls, rows: List[List[Any]], last: Optional[int] = None):
+        cols = list(zip(*rows)) if rows else [()] * 8
+        return cls(
+            time=int_column(cols[0]),
+            open=float_column(cols[1]),
+            high=float_column(cols[2]),
+            low=float_column(cols[3]),
+            close=float_column(cols[4]),
+            vwap=float_column(cols[5]),
+            volume=float_column(cols[6]),
+            count=int_column(cols[7]),
+            last=last,
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+@dataclass
+class TradeColumns:
+    price: Sequence[float]
+    volume: Sequence[float]
+    time: Sequence[float]
+    # BUY or SELL
+    side: Sequence[int]
+    # MARKET or LIMIT
+    order_type: Sequence[int]
+    trade_id: Sequence[int]
+    # the `since` value to pass to fetch the next set of trades
+    last: Optional[int] = None
+
+    @classmethod
+    def from_rows(cls, rows: List[List[Any]], last: Optional[int] = None):
+        cols = list(zip(*rows)) if rows else [()] * 7
+        # trade ids were added to the response later, older data has 6 columns
+        trade_ids = cols[6] if len(cols) > 6 else [0] * len(rows)
+        return cls(
+            price=float_column(cols[0]),
+            volume=float_column(cols[1]),
+            time=float_column(cols[2]),
+            side=flag_column(cols[3], "b", BUY, SELL),
+            order_type=flag_column(cols[4], "m", MARKET, LIMIT),
+            trade_id=int_column(trade_ids),
+            last=last,
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+
+def _to_columns(result: Dict[str, Any], columns_cls) -> Dict[str, Any]:
+    last = int(result["last"]) if result.get("last") is not None else None
+    out: Dict[str, Any] = {"last": last}
+    for key, rows in result.items():
+        if key != "last":
+            out[key] = columns_cls.from_rows(rows, last)
+    return out
+
+
+def ohlc_columns(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts an OHLC result to {pair: OHLCColumns, "last": int}
+    """
+    return _to_columns(result, OHLCColumns)
+
+
+def trade_columns(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a Trades result to {pair: TradeColumns, "last": int}
+    """
+    return _to_columns(result, TradeColumns)
@@ -1,6 +1,155 @@
+import asyncio
+import json
+from enum import Enum
+from typing import List, Optional, Tuple, Type
+
+
 class AuthError(Exception):
     pass
 
 
 class ParameterError(Exception):
     pass
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class ExportError(Exception):
+    pass
+
+
+class ResponseError(Exception):
+    """
+    Raised where a Kraken error can't be returned as part of a KrakenResponse
+    """
+
+    def __init__(self, errors: List[str]):
+        super().__init__(", ".join(errors))
+        self.errors = errors
+
+    @property
+    def category(self) -> "ErrorCategory":
+        return classify_errors(self.errors) or ErrorCategory.UNKNOWN
+
+
+class ErrorCategory(Enum):
+    """
+    What kind of failure a Kraken error string describes.
+
+    `retryable` categories are transient, so an idempotent request may be sent again.
+    `rejected` categories mean Kraken refused the request before acting on it, so even
+    a request that places or cancels orders can be resent safely.
+    """
+
+    RATE_LIMIT = "rate_limit"
+    INVALID_NONCE = "invalid_nonce"
+    UNAVAILABLE = "unavailable"
+    INTERNAL = "internal"
+    NETWORK = "network"
+    MARKET_RESTRICTED = "market_restricted"
+    DEADLINE_ELAPSED = "deadline_elapsed"
+    AUTH = "auth"
+    INVALID_ARGUMENTS = "invalid_arguments"
+    ORDER_REJECTED = "order_rejected"
+    UNKNOWN = "unknown"
+
+    @property
+    def retryable(self) -> bool:
+        return self in _RETRYABLE
+
+    @property
+    def rejected(self) -> bool:
+        return self in _REJECTED
+
+
+_REJECTED = {
+    ErrorCategory.RATE_LIMIT,
+    ErrorCategory.INVALID_NONCE,
+    ErrorCategory.UNAVAILABLE,
+}
+_RETRYABLE = _REJECTED | {ErrorCategory.INTERNAL, ErrorCategory.NETWORK}
+
+# matched against the start of the error, most specific first
+_PREFIXES = [
+    ("EAPI:Rate limit exceeded", ErrorCategory.RATE_LIMIT),
+    ("EOrder:Rate limit exceeded", ErrorCategory.RATE_LIMIT),
+    ("EOrder:Domain rate limit exceeded", ErrorCategory.RATE_LIMIT),
+    ("EGeneral:Too many requests", ErrorCategory.RATE_LIMIT),
+    ("EAPI:Invalid nonce", ErrorCategory.INVALID_NONCE),
+    ("EService:Unavailable", ErrorCategory.UNAVAILABLE),
+    ("EService:Busy", ErrorCategory.UNAVAILABLE),
+    ("EGeneral:Internal error", ErrorCategory.INTERNAL),
+    # not from Kraken: a gateway error or a body that isn't its envelope
+    ("EGeneral:Invalid response", ErrorCategory.NETWORK),
+    ("EService:Market in", ErrorCategory.MARKET_RESTRICTED),
+    ("EService:Deadline elapsed", ErrorCategory.DEADLINE_ELAPSED),
+    ("EAPI:", ErrorCategory.AUTH),
+    ("EGeneral:Permission denied", ErrorCategory.AUTH),
+    ("EGeneral:Invalid arguments", ErrorCategory.INVALID_ARGUMENTS),
+    ("EQuery:", ErrorCategory.INVALID_ARGUMENTS),
+    ("EOrder:", ErrorCategory.ORDER_REJECTED),
+    ("EFunding:", ErrorCategory.ORDER_REJECTED),
+    ("EBM:", ErrorCategory.ORDER_REJECTED),
+]
+
+
+def classify_error(error: str) -> ErrorCategory:
+    """
+    The category of one Kraken error string such as "EAPI:Invalid nonce"
+    """
+    for prefix, category in _PREFIXES:
+        if error.startswith(prefix):
+            return category
+    return ErrorCategory.UNKNOWN
+
+
+def classify_errors(errors: List[str]) -> Optional[ErrorCategory]:
+    """
+    The category of a response's errors, or None when there are none. When errors
+    disagree the least retryable category wins, so a request is only retried when
+    every error it got is transient.
+    """
+    categories = [classify_error(e) for e in errors]
+    for category in categories:
+        if not category.retryable:
+            return category
+    for category in categories:
+        if not category.rejected:
+            return category
+    return categories[0] if categories else None
+
+
+def classify_exception(error: BaseException) -> ErrorCategory:
+    """
+    The category of an exception raised while sending a request
+    """
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return ErrorCategory.NETWORK
+    return ErrorCategory.UNKNOWN
+
+
+def _request_failures() -> Tuple[Type[BaseException], ...]:
+    # requests' exceptions are OSErrors, aiohttp's are not all
+    failures: Tuple[Type[BaseException], ...] = (
+        OSError,
+        asyncio.TimeoutError,
+        json.JSONDecodeError,
+        RateLimitError,
+        ResponseError,
+    )
+    try:
+        import aiohttp
+    except ImportError:
+        return failures
+    return failures + (aiohttp.ClientError,)
+
+
+# why a single request failed, which helpers sending many requests report in that
+# request's place while the others carry on. Any other exception is a bug and raised.
+REQUEST_FAILURES = _request_failures()
+
+
+def describe_exception(error: BaseException) -> str:
+    return f"{type(error).__name__}: {error}"
@@ -0,0 +1,215 @@
+import csv
+import io
+import mmap
+import time
+import zipfile
+from typing import (
+    Any,
+    AsyncIterable,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+from .errors import ExportError, ResponseError
+from .http import json_loads
+
+# every zip archive, including an empty one, starts with this
+ZIP_MAGIC = b"PK"
+
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# ExportStatus moves a report from Queued to Processing to Processed
+DONE = "Processed"
+
+
+def _envelope_errors(body: bytes) -> List[str]:
+    try:
+        errors = json_loads(body).get("error")
+    except ValueError:
+        errors = None
+    return list(errors or ["EGeneral:Export download was not a zip archive"])
+
+
+def copy_export(chunks: Iterable[bytes], out: BinaryIO) -> List[str]:
+    """
+    Writes a RetrieveExport response to `out` a chunk at a time. Kraken answers with
+    a JSON error envelope instead of an archive when it can't send the report, in
+    which case nothing is written and its errors are returned.
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(ZIP_MAGIC):
+            break
+    if not head.startswith(ZIP_MAGIC):
+        return _envelope_errors(head + b"".join(chunks))
+
+    out.write(head)
+    for chunk in chunks:
+        out.write(chunk)
+    return []
+
+
+async def acopy_export(chunks: AsyncIterable[bytes], out: BinaryIO) -> List[str]:
+    head: Optional[bytes] = b""
+    async for chunk in chunks:
+        if head is None:
+            out.write(chunk)
+            continue
+        head += chunk
+        if len(head) >= len(ZIP_MAGIC) and head.startswith(ZIP_MAGIC):
+            out.write(head)
+            head = None
+    return [] if head is None else _envelope_errors(head)
+
+
+def export_status(result: List[Dict[str, Any]], report_id: str) -> Dict[str, Any]:
+    """
+    Finds a report in an ExportStatus result. Raises ExportError if it is missing,
+    cancelled or deleted.
+    """
+    for report in result:
+        if report.get("id") != report_id:
+            continue
+        flags = str(report.get("flags") or "")
+        if "cancel" in flags or "delete" in flags:
+            raise ExportError(f"export {report_id} is flagged {flags}")
+        return report
+    raise ExportError(f"export {report_id} was not found")
+
+
+class _MappedReader(io.RawIOBase):
+    """
+    A seekable, read-only file over a memory map, which zipfile can read from
+    """
+
+    def __init__(self, mm: mmap.mmap):
+        self._mm = mm
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def tell(self) -> int:
+        return self._mm.tell()
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self._mm.read(None if size is None or size < 0 else size)
+
+    def readinto(self, buffer) -> int:
+        data = self._mm.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _csv_dialect(name: str) -> Dict[str, str]:
+    return {"delimiter": "\t"} if name.lower().endswith(".tsv") else {}
+
+
+def iter_export_rows(
+    path: str, member: Optional[str] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Reads the rows of a downloaded report one at a time, straight out of the zip
+    archive through a memory map, so an export of any size is read in constant
+    memory. `member` picks a file in the archive, by default the first one.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with zipfile.ZipFile(_MappedReader(mm)) as archive:
+            names = archive.namelist()
+            if not names:
+                return
+            name = member or names[0]
+            with archive.open(name) as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                yield from csv.DictReader(text, **_csv_dialect(name))
+
+
+class ReportExport:
+    """
+    Runs a report export from start to finish: requests it, polls its status until
+    Kraken has built it and streams the archive to disk.
+
+        export = ReportExport(client)
+        path = export.run("ledgers", "ledgers 2023", "ledgers.zip", start_tm=start)
+        for row in iter_export_rows(path):
+            ...
+
+    Polls start `poll_interval` seconds apart and back off to at most `max_interval`.
+    An export that is not ready after `timeout` seconds raises ExportError.
+    """
+
+    def __init__(
+        self,
+        client,
+        poll_interval: float = 5.0,
+        max_interval: float = 60.0,
+        timeout: Optional[float] = 3600.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._sleep = sleep
+        self._clock = clock
+
+    def request(self, report: str, description: str, **options) -> str:
+        """
+        Requests an export and returns its id
+        """
+        resp = self.client.request_export_report(report, description, **options)
+        if not resp.ok:
+            raise ResponseError(resp.errors)
+        return resp.result["id"]
+
+    def wait(self, report: str, report_id: str) -> Dict[str, Any]:
+        """
+        Polls ExportStatus until the export is processed and returns its status
+        """
+        deadline = None if self.timeout is None else self._clock() + self.timeout
+        delay = self.poll_interval
+        while True:
+            resp = self.client.get_export_status(report)
+            if not resp.ok:
+                raise ResponseError(resp.errors)
+            status = export_status(resp.result, report_id)
+            if status.get("status") == DONE:
+                return status
+
+            if deadline is not None and self._clock() + delay > deadline:
+                raise ExportError(
+                    f"export {report_id} was still {status.get('status')} after "
+                    f"{self.timeout} seconds"
+                )
+            self._sleep(delay)
+            delay = min(delay * 2, self.max_interval)
+
+    def run(
+        self,
+        report: str,
+        description: str,
+        path: str,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        **options,
+    ) -> str:
+        """
+        Requests, waits for and downloads an export to `path`. Options are passed to
+        `request_export_report`.
+        """
+        report_id = self.request(report, description, **options)
+        self.wait(report, report_id)
+        return self.client.download_data_export(report_id, path, chunk_size)
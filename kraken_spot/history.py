@@ -0,0 +1,218 @@
+import json
+import math
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .errors import REQUEST_FAILURES, ParameterError, describe_exception
+from .pagination import Record
+
+# September 2013, before any account could have history
+KRAKEN_LAUNCH = 1377993600
+
+DEFAULT_WINDOW = 90 * 86400
+
+Window = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Stream:
+    """
+    A history endpoint mirrored into the table of the same name. `key` is the asset
+    or pair column stored alongside each record's id and time.
+    """
+
+    name: str
+    key: str
+    key_of: Callable[[Dict[str, Any]], Optional[str]]
+    time_of: Callable[[Dict[str, Any]], float]
+    # (client, start, end) -> (id, record) for every record in (start, end]
+    fetch: Callable[[Any, int, int], Iterable[Record]]
+
+
+STREAMS: Dict[str, Stream] = {
+    "ledgers": Stream(
+        "ledgers",
+        "asset",
+        lambda r: r.get("asset"),
+        lambda r: float(r["time"]),
+        lambda c, start, end: c.iter_ledgers(start=start, end=end, prefetch=False),
+    ),
+    "trades": Stream(
+        "trades",
+        "pair",
+        lambda r: r.get("pair"),
+        lambda r: float(r["time"]),
+        lambda c, start, end: c.iter_trades_history(
+            start=start, end=end, prefetch=False
+        ),
+    ),
+    "closed_orders": Stream(
+        "closed_orders",
+        "pair",
+        lambda r: (r.get("descr") or {}).get("pair"),
+        lambda r: float(r["closetm"]),
+        lambda c, start, end: c.iter_closed_orders(
+            start=start, end=end, close_time="close", prefetch=False
+        ),
+    ),
+}
+
+
+def time_windows(start: int, end: int, size: int) -> List[Window]:
+    """
+    Splits (start, end] into consecutive windows of at most `size` seconds. Kraken
+    takes whole second timestamps, so the bounds are integers.
+    """
+    windows = []
+    while start < end:
+        windows.append((start, min(start + size, end)))
+        start += size
+    return windows
+
+
+@dataclass
+class SyncStatus:
+    stream: str
+    # records added, not counting any that were already stored
+    records: int = 0
+    windows: int = 0
+    watermark: Optional[int] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return len(self.errors) == 0
+
+
+class HistorySync:
+    """
+    Mirrors ledgers, trades and closed orders into a SQLite database, one table per
+    stream with the record's id, time, asset or pair and the record itself as JSON.
+
+        sync = HistorySync(client, "history.db")
+        sync.run()
+        sync.db.execute("SELECT data FROM ledgers WHERE asset = 'XXBT'")
+
+    Each stream has a watermark, the time it has been synced up to. A run fetches
+    from there, less `overlap` seconds to pick up records Kraken publishes late, up to
+    the present. The first run starts from `since`. The span is split into windows
+    of `window` seconds, fetched `max_workers` at a time, and records fetched twice
+    are stored once.
+
+    The history endpoints have the highest rate limit cost, so give the client a
+    RateLimiter to keep parallel windows within the key's budget, and a nonce window
+    on the key since concurrent requests can reach Kraken out of nonce order.
+    """
+
+    def __init__(
+        self,
+        client,
+        path: str,
+        streams: Iterable[str] = tuple(STREAMS),
+        window: int = DEFAULT_WINDOW,
+        max_workers: int = 2,
+        overlap: int = 300,
+        clock: Callable[[], float] = time.time,
+    ):
+        unknown = set(streams) - set(STREAMS)
+        if unknown:
+            raise ParameterError(f"unknown streams {sorted(unknown)}")
+
+        self.client = client
+        self.streams = [STREAMS[name] for name in streams]
+        self.window = window
+        self.max_workers = max_workers
+        self.overlap = overlap
+        self._clock = clock
+        self.db = sqlite3.connect(path)
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks "
+                "(stream TEXT PRIMARY KEY, time INTEGER NOT NULL)"
+            )
+            for stream in STREAMS.values():
+                self.db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {stream.name} (id TEXT PRIMARY KEY, "
+                    f"time REAL NOT NULL, {stream.key} TEXT, data TEXT NOT NULL)"
+                )
+                for column in ("time", stream.key):
+                    self.db.execute(
+                        f"CREATE INDEX IF NOT EXISTS {stream.name}_{column} "
+                        f"ON {stream.name} ({column})"
+                    )
+
+    def watermark(self, stream: str) -> Optional[int]:
+        row = self.db.execute(
+            "SELECT time FROM watermarks WHERE stream = ?", (stream,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, stream: str, value: int):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO watermarks (stream, time) VALUES (?, ?)",
+                (stream, value),
+            )
+
+    def _store(self, stream: Stream, records: List[Record]) -> int:
+        before = self.db.total_changes
+        with self.db:
+            self.db.executemany(
+                f"INSERT OR IGNORE INTO {stream.name} "
+                f"(id, time, {stream.key}, data) VALUES (?, ?, ?, ?)",
+                (
+                    (id, stream.time_of(r), stream.key_of(r), json.dumps(r))
+                    for id, r in records
+                ),
+            )
+        return self.db.total_changes - before
+
+    def run(self, since: int = KRAKEN_LAUNCH) -> Dict[str, SyncStatus]:
+        """
+        Syncs every stream, one after another
+        """
+        return {s.name: self.sync_stream(s.name, since) for s in self.streams}
+
+    def sync_stream(self, name: str, since: int = KRAKEN_LAUNCH) -> SyncStatus:
+        stream = STREAMS[name]
+        watermark = self.watermark(name)
+        start = since if watermark is None else watermark - self.overlap
+        # widened to whole seconds so no record at either end is missed
+        windows = time_windows(
+            math.floor(start), math.ceil(self._clock()), math.ceil(self.window)
+        )
+        status = SyncStatus(name, windows=len(windows), watermark=watermark)
+
+        done: Dict[Window, bool] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(lambda w: list(stream.fetch(self.client, *w)), w): w
+                for w in windows
+            }
+            # records are written from this thread, which owns the connection
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    status.records += self._store(stream, future.result())
+                    done[window] = True
+                except REQUEST_FAILURES as e:
+                    status.errors.append(describe_exception(e))
+                    done[window] = False
+
+        # the watermark only moves past windows with nothing missing before them
+        for window in windows:
+            if not done[window]:
+                break
+            status.watermark = window[1]
+        if status.watermark is not None and status.watermark != watermark:
+            self._set_watermark(name, status.watermark)
+        return status
+
+    def close(self):
+        self.db.close()
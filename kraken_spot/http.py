@@ -1,57 +1,455 @@
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+import json
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .errors import ErrorCategory, classify_errors, describe_exception
+from .instrumentation import RequestTiming
 
 USER_AGENT = "KrakenSpot/Py"
 
+JSONDecoder = Callable[[bytes], Any]
+ResultTransform = Callable[[Dict[str, Any]], Any]
+
+
+def _fastest_json_decoder() -> JSONDecoder:
+    """
+    Picks the fastest installed JSON library, falling back to the standard library.
+    Each of them decodes straight from the response bytes.
+    """
+    try:
+        import orjson
+
+        return orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import simdjson
+
+        return simdjson.loads
+    except ImportError:
+        pass
+
+    return json.loads
+
+
+json_loads = _fastest_json_decoder()
+
+
+# a body whose error list is empty, which Kraken always sends first
+_NO_ERRORS = re.compile(rb'\s*\{\s*"error"\s*:\s*\[\s*\]\s*[,}]')
+
+
+def _no_errors(content: bytes) -> bool:
+    """
+    Whether a body starts with an empty error list, checked without decoding it. A
+    body cut short ends early or leaves a brace open, so it is decoded instead.
+    """
+    return (
+        _NO_ERRORS.match(content) is not None
+        and content.rstrip().endswith(b"}")
+        and content.count(b"{") == content.count(b"}")
+    )
+
+
+_UNSET: Any = object()
+
+# reported in place of Kraken's errors when a body isn't its result/error envelope
+INVALID_RESPONSE = "EGeneral:Invalid response"
+
+
+class HTTPResponse:
+    """
+    A response's status code and body. A response read from the network keeps the raw
+    `content` and decodes it on first use of `body`.
+    """
+
+    __slots__ = ("status_code", "content", "_body", "_decoder")
+
+    def __init__(
+        self,
+        status_code: int,
+        body: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        decoder: Optional[JSONDecoder] = None,
+    ):
+        self.status_code = status_code
+        self.content = content
+        self._body = body if body is not None or content is not None else {}
+        self._decoder = decoder
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        if self._body is None:
+            self._body = (self._decoder or json_loads)(self.content)
+        return self._body
+
+    @property
+    def errors(self) -> List[str]:
+        """
+        The error list, read without decoding the body when it is empty. A body that
+        doesn't decode to an object, such as a proxy's error page, or an error status
+        without Kraken errors reports INVALID_RESPONSE.
+        """
+        success = 200 <= self.status_code < 300
+        if self._body is None and _no_errors(self.content):  # type: ignore
+            return [] if success else [INVALID_RESPONSE]
+        try:
+            body = self.body
+        except ValueError:
+            return [INVALID_RESPONSE]
+        if not isinstance(body, dict):
+            return [INVALID_RESPONSE]
+        return body.get("error") or ([] if success else [INVALID_RESPONSE])
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, HTTPResponse):
+            return NotImplemented
+        return (self.status_code, self.body) == (other.status_code, other.body)
+
+    def __repr__(self) -> str:
+        return f"HTTPResponse(status_code={self.status_code!r}, body={self.body!r})"
+
 
-@dataclass
 class KrakenResponse:
-    result: Dict = field(default_factory=dict)
-    errors: List[str] = field(default_factory=list)
+    """
+    Kraken's result and errors.
+
+    A response read from the network holds the raw bytes and only checks the error
+    envelope up front. `result` is decoded, and any transform applied, the first time
+    it is read, so code that only looks at `ok` or forwards `raw` never pays for the
+    decode. `ok` does not validate the rest of the body: a malformed result only
+    raises once `result` is read.
+    """
+
+    __slots__ = ("_result", "errors", "raw", "_decoder", "_transform")
+
+    def __init__(
+        self, result: Optional[Any] = None, errors: Optional[List[str]] = None
+    ):
+        self._result = {} if result is None else result
+        self.errors: List[str] = [] if errors is None else errors
+        # the response body exactly as received, when read from the network
+        self.raw: Optional[bytes] = None
+        self._decoder: Optional[JSONDecoder] = None
+        self._transform: Optional[ResultTransform] = None
+
+    @classmethod
+    def lazy(
+        cls,
+        raw: bytes,
+        decoder: Optional[JSONDecoder] = None,
+        transform: Optional[ResultTransform] = None,
+    ) -> "KrakenResponse":
+        """
+        A successful response whose result is decoded from `raw` when first read
+        """
+        resp = cls()
+        resp._result = _UNSET
+        resp.raw = raw
+        resp._decoder = decoder
+        resp._transform = transform
+        return resp
+
+    @classmethod
+    def failed(cls, error: BaseException) -> "KrakenResponse":
+        """
+        A response with a request's failure as its error
+        """
+        return cls(errors=[describe_exception(error)])
+
+    @property
+    def result(self) -> Any:
+        if self._result is _UNSET:
+            result = (self._decoder or json_loads)(self.raw).get("result", {})
+            if self._transform:
+                result = self._transform(result)
+            self._result = result
+            self._transform = None
+        return self._result
+
+    @result.setter
+    def result(self, value: Any):
+        self._result = value
 
     @property
     def ok(self) -> bool:
         return len(self.errors) == 0
 
+    @property
+    def error_category(self) -> Optional[ErrorCategory]:
+        return classify_errors(self.errors)
 
-@dataclass
-class HTTPResponse:
-    status_code: int
-    body: Dict[str, Any]
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, KrakenResponse):
+            return NotImplemented
+        return (self.result, self.errors) == (other.result, other.errors)
 
+    def __repr__(self) -> str:
+        return f"KrakenResponse(result={self.result!r}, errors={self.errors!r})"
+
+
+# time spent opening connections on this thread, read back by instrumented requests
+_connect_time = threading.local()
+
+
+class _TimedConnectionMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()  # type: ignore
+        finally:
+            elapsed = time.perf_counter() - start
+            _connect_time.value = getattr(_connect_time, "value", 0.0) + elapsed
 
-def http_get(url: str, params: Optional[Dict[str, str]] = None) -> HTTPResponse:
-    r = requests.get(url, headers={"User-Agent": USER_AGENT}, params=params)
-    return HTTPResponse(
-        status_code=r.status_code,
-        body=r.json(),
-    )
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """
+    An adapter whose connections record how long the TCP and TLS handshake took
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class Transport:
+    """
+    Sends requests over a pooled, keep-alive session so consecutive calls to the same
+    host reuse an open TCP/TLS connection instead of paying a new handshake each time.
+
+    A client owns one transport. Tests can swap it for one pointed at a local server,
+    or subclass it and override `get` / `post`.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        timeout: Optional[float] = 30.0,
+        keep_alive: bool = True,
+        session: Optional[requests.Session] = None,
+    ):
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+        adapter = _TimedAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        return self.session.get(url, params=params, timeout=self.timeout, stream=stream)
+
+    def post(
+        self,
+        url: str,
+        body: Optional[Union[bytes, Dict[str, Any]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        return self.session.post(
+            url, data=body, headers=headers, timeout=self.timeout, stream=stream
+        )
+
+    def warm_up(self, url: str, connections: int = 1):
+        """
+        Opens `connections` connections to the host of `url` ahead of time, so the
+        first real request does not pay for the TCP and TLS handshake.
+        """
+        responses = [self.session.head(url, timeout=self.timeout, stream=True)]
+        for _ in range(connections - 1):
+            responses.append(self.session.head(url, timeout=self.timeout, stream=True))
+
+        # holding every response open until now forces a distinct connection for each.
+        # Reading the (empty) body hands the connection back to the pool.
+        for r in responses:
+            r.content
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport: Optional[Transport] = None
+
+
+def default_transport() -> Transport:
+    """
+    The transport used when a caller does not provide one. It is created on first use
+    and shared for the lifetime of the process.
+    """
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = Transport()
+    return _default_transport
+
+
+def encoded_size(data: Any) -> int:
+    """
+    The size of params or a body once form encoded
+    """
+    if not data:
+        return 0
+    if isinstance(data, (bytes, str)):
+        return len(data)
+    return len(urllib.parse.urlencode(data))
+
+
+def _timed_response(
+    send: Callable[[], requests.Response],
+    decoder: Optional[JSONDecoder],
+    timing: RequestTiming,
+) -> HTTPResponse:
+    """
+    Sends a streamed request, so the wait for the headers and the time to read the
+    body can be measured separately
+    """
+    _connect_time.value = 0.0
+    start = time.perf_counter()
+    r = send()
+    headers_at = time.perf_counter()
+    content = r.content
+    read_at = time.perf_counter()
+    resp = HTTPResponse(r.status_code, content=content, decoder=decoder)
+    resp.errors
+
+    timing.decode = time.perf_counter() - read_at
+    timing.read = read_at - headers_at
+    timing.connect = _connect_time.value
+    timing.ttfb = headers_at - start - timing.connect
+    timing.status_code = r.status_code
+    timing.response_bytes = len(content)
+    return resp
+
+
+def http_get(
+    url: str,
+    params: Optional[Dict[str, str]] = None,
+    transport: Optional[Transport] = None,
+    decoder: Optional[JSONDecoder] = None,
+    timing: Optional[RequestTiming] = None,
+) -> HTTPResponse:
+    transport = transport or default_transport()
+    if timing is not None:
+        timing.request_bytes = encoded_size(params)
+        return _timed_response(
+            lambda: transport.get(url, params, stream=True),  # type: ignore
+            decoder,
+            timing,
+        )
+
+    r = transport.get(url, params)
+    return HTTPResponse(r.status_code, content=r.content, decoder=decoder)
 
 
 def http_post(
     url: str,
-    body: Optional[Dict[str, Any]] = None,
+    body: Optional[Union[bytes, Dict[str, Any]]] = None,
     headers: Optional[Dict[str, str]] = None,
+    transport: Optional[Transport] = None,
+    decoder: Optional[JSONDecoder] = None,
+    timing: Optional[RequestTiming] = None,
 ) -> HTTPResponse:
     if not headers:
         headers = {}
     headers["User-Agent"] = USER_AGENT
-    r = requests.post(url, headers=headers, data=body)
-    return HTTPResponse(
-        status_code=r.status_code,
-        body=r.json(),
-    )
+    transport = transport or default_transport()
+    if timing is not None:
+        timing.request_bytes = encoded_size(body)
+        return _timed_response(
+            lambda: transport.post(url, body, headers, stream=True),  # type: ignore
+            decoder,
+            timing,
+        )
+
+    r = transport.post(url, body, headers)
+    return HTTPResponse(r.status_code, content=r.content, decoder=decoder)
+
+
+def to_kraken_response(
+    resp: HTTPResponse, transform: Optional[ResultTransform] = None
+) -> KrakenResponse:
+    """
+    Unpacks Kraken's result/error envelope. `transform` is applied to the result of a
+    successful response. A successful response still in its raw form is left that
+    way until its result is read.
+    """
+    errors = resp.errors
+    if not errors and resp.content is not None and resp._body is None:
+        return KrakenResponse.lazy(resp.content, resp._decoder, transform)
+
+    result = None
+    if INVALID_RESPONSE not in errors:
+        result = resp.body.get("result", {})
+        if transform and not errors:
+            result = transform(result)
+    response = KrakenResponse(result, list(errors))
+    response.raw = resp.content
+    return response
+
+
+def encode_params(params: Dict[str, Any]) -> bytes:
+    """
+    Cleans and form encodes params in one pass, giving the same bytes as `clean_params`
+    followed by `urlencode`. Private requests sign and send these exact bytes.
+    """
+    quote = urllib.parse.quote_plus
+    parts = []
+    for key, value in params.items():
+        if value is None:
+            continue
+        if value is True:
+            value = "true"
+        elif value is False:
+            value = "false"
+        parts.append(f"{quote(str(key))}={quote(str(value))}")
+    return "&".join(parts).encode()
 
 
 def clean_params(params: Dict[str, Any]) -> Dict[str, Any]:
     out = {}
     for key, value in params.items():
-        if value == True:
+        if value is True:
             out[key] = "true"
-        elif value == False:
+        elif value is False:
             out[key] = "false"
-        elif value != None:
+        elif value is not None:
             out[key] = str(value)
     return out
@@ -0,0 +1,289 @@
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, replace
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .errors import ErrorCategory, classify_errors, classify_exception
+
+STAGES = ("clean", "sign", "connect", "ttfb", "read", "decode", "total")
+
+
+@dataclass
+class RequestTiming:
+    """
+    Where the time went in one request, in seconds.
+
+    `connect` is the TCP and TLS handshake and is 0 when a pooled connection was
+    reused. `ttfb` is the wait for the response headers once connected, `read` the
+    time to receive the body and `decode` the check of its error envelope. A successful
+    result is only decoded when it is first read, outside the request. Stages that do
+    not apply, such as signing a public request, are None.
+    """
+
+    endpoint: str
+    private: bool = False
+    clean: Optional[float] = None
+    sign: Optional[float] = None
+    connect: Optional[float] = None
+    ttfb: Optional[float] = None
+    read: Optional[float] = None
+    decode: Optional[float] = None
+    total: Optional[float] = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    status_code: Optional[int] = None
+    error_category: Optional[ErrorCategory] = None
+
+    def stages(self) -> Dict[str, float]:
+        return {s: getattr(self, s) for s in STAGES if getattr(self, s) is not None}
+
+
+class Instrument:
+    """
+    Called before and after every request a client sends, including each retry.
+    Subclass it and override either method. Both run on the thread or event loop
+    making the request, so they should be quick.
+    """
+
+    def before_request(self, endpoint: str):
+        pass
+
+    def after_request(self, timing: RequestTiming):
+        pass
+
+
+Fetch = Callable[[Optional[RequestTiming]], Any]
+
+
+def _finish(
+    instrument: Instrument,
+    timing: RequestTiming,
+    start: float,
+    resp: Any = None,
+    error: Optional[BaseException] = None,
+):
+    timing.total = perf_counter() - start
+    if not timing.private and timing.clean:
+        # a public request's params are cleaned before it is sent
+        timing.total += timing.clean
+    if error is not None:
+        timing.error_category = classify_exception(error)
+    else:
+        timing.error_category = classify_errors(resp.errors)
+    instrument.after_request(timing)
+
+
+def instrumented(
+    instrument: Optional[Instrument],
+    template: Optional[RequestTiming],
+    fetch: Fetch,
+) -> Callable[[], Any]:
+    """
+    Wraps `fetch`, which sends one request and fills in the timing it is given, so
+    that each call reports a fresh copy of `template` to `instrument`
+    """
+    if instrument is None or template is None:
+        return lambda: fetch(None)
+
+    def send():
+        timing = replace(template)
+        instrument.before_request(timing.endpoint)
+        start = perf_counter()
+        try:
+            resp = fetch(timing)
+        except Exception as e:
+            _finish(instrument, timing, start, error=e)
+            raise
+        _finish(instrument, timing, start, resp)
+        return resp
+
+    return send
+
+
+def ainstrumented(
+    instrument: Optional[Instrument],
+    template: Optional[RequestTiming],
+    fetch: Callable[[Optional[RequestTiming]], Awaitable[Any]],
+) -> Callable[[], Awaitable[Any]]:
+    if instrument is None or template is None:
+        return lambda: fetch(None)
+
+    async def send():
+        timing = replace(template)
+        instrument.before_request(timing.endpoint)
+        start = perf_counter()
+        try:
+            resp = await fetch(timing)
+        except Exception as e:
+            _finish(instrument, timing, start, error=e)
+            raise
+        _finish(instrument, timing, start, resp)
+        return resp
+
+    return send
+
+
+def _log_bounds(start: float = 50e-6, factor: float = 1.5, count: int = 36):
+    return [start * factor**i for i in range(count)]
+
+
+# 50 microseconds to a little over a minute, each bucket 1.5 times the last
+DEFAULT_BOUNDS = _log_bounds()
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets, so memory stays constant however many
+    requests are made. Quantiles are interpolated within a bucket.
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{k}="{escape(v)}"' for k, v in labels.items())
+
+
+class LatencyHistogram(Instrument):
+    """
+    Aggregates request timings in memory, per endpoint and stage, along with error
+    counts by category and payload sizes.
+
+        latency = LatencyHistogram()
+        client = Client(instrument=latency)
+        ...
+        latency.p99("Ticker")
+        print(latency.to_prometheus())
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds = list(bounds)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._bytes: Dict[Tuple[str, str], int] = {}
+
+    def after_request(self, timing: RequestTiming):
+        with self._lock:
+            for stage, value in timing.stages().items():
+                key = (timing.endpoint, stage)
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram(self.bounds)
+                self._histograms[key].observe(value)
+
+            if timing.error_category is not None:
+                key = (timing.endpoint, timing.error_category.value)
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+            for direction, size in (
+                ("request", timing.request_bytes),
+                ("response", timing.response_bytes),
+            ):
+                key = (timing.endpoint, direction)
+                self._bytes[key] = self._bytes.get(key, 0) + size
+
+    def endpoints(self) -> List[str]:
+        with self._lock:
+            return sorted({endpoint for endpoint, _ in self._histograms})
+
+    def count(self, endpoint: str) -> int:
+        with self._lock:
+            histogram = self._histograms.get((endpoint, "total"))
+            return histogram.count if histogram else 0
+
+    def errors(self, endpoint: str) -> Dict[str, int]:
+        with self._lock:
+            return {c: n for (e, c), n in self._errors.items() if e == endpoint}
+
+    def quantile(
+        self, endpoint: str, q: float, stage: str = "total"
+    ) -> Optional[float]:
+        with self._lock:
+            histogram = self._histograms.get((endpoint, stage))
+            return histogram.quantile(q) if histogram else None
+
+    def p50(self, endpoint: str, stage: str = "total") -> Optional[float]:
+        return self.quantile(endpoint, 0.5, stage)
+
+    def p99(self, endpoint: str, stage: str = "total") -> Optional[float]:
+        return self.quantile(endpoint, 0.99, stage)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        {endpoint: {stage: {"count", "p50", "p99"}}}
+        """
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            for (endpoint, stage), histogram in sorted(self._histograms.items()):
+                out.setdefault(endpoint, {})[stage] = {
+                    "count": histogram.count,
+                    "p50": histogram.quantile(0.5),
+                    "p99": histogram.quantile(0.99),
+                }
+        return out
+
+    def to_prometheus(self, prefix: str = "kraken") -> str:
+        """
+        The aggregated metrics in the Prometheus text exposition format
+        """
+        name = f"{prefix}_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each stage of a request.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for (endpoint, stage), histogram in sorted(self._histograms.items()):
+                labels = _labels(endpoint=endpoint, stage=stage)
+                cumulative = 0
+                for bound, n in zip(histogram.bounds, histogram.counts):
+                    cumulative += n
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.9g}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+            name = f"{prefix}_request_errors_total"
+            lines.append(f"# HELP {name} Requests that failed, by error category.")
+            lines.append(f"# TYPE {name} counter")
+            for (endpoint, category), n in sorted(self._errors.items()):
+                labels = _labels(endpoint=endpoint, category=category)
+                lines.append(f"{name}{{{labels}}} {n}")
+
+            name = f"{prefix}_payload_bytes_total"
+            lines.append(f"# HELP {name} Bytes sent and received.")
+            lines.append(f"# TYPE {name} counter")
+            for (endpoint, direction), n in sorted(self._bytes.items()):
+                labels = _labels(endpoint=endpoint, direction=direction)
+                lines.append(f"{name}{{{labels}}} {n}")
+
+        return "\n".join(lines) + "\n"
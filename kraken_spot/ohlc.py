@@ -0,0 +1,179 @@
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .columnar import OHLCColumns
+from .errors import REQUEST_FAILURES, ResponseError, describe_exception
+from .ratelimit import Pacer
+from .storage import RecordFile, read_json, write_json
+
+# 64 bytes per candle
+OHLC_FIELDS = [
+    ("time", "q"),
+    ("open", "d"),
+    ("high", "d"),
+    ("low", "d"),
+    ("close", "d"),
+    ("vwap", "d"),
+    ("volume", "d"),
+    ("count", "q"),
+]
+
+
+class OHLCStore:
+    """
+    Candles kept on disk per pair and interval, as fixed width records in
+    `<pair>-<interval>.ohlc` with the `last` value to refresh from in
+    `<pair>-<interval>.json`. Any number of processes can read the candles through a
+    read-only memory map while one process refreshes them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _name(self, pair: str, interval: int) -> str:
+        return os.path.join(self.directory, f"{pair}-{interval}")
+
+    def _file(self, pair: str, interval: int) -> RecordFile:
+        return RecordFile(self._name(pair, interval) + ".ohlc", OHLC_FIELDS)
+
+    def checkpoint(self, pair: str, interval: int) -> Dict[str, Any]:
+        """
+        The `last` value and the number of candles written when it was saved
+        """
+        return read_json(self._name(pair, interval) + ".json")
+
+    def count(self, pair: str, interval: int) -> int:
+        return self.checkpoint(pair, interval).get("records", 0)
+
+    def _index(self, file: RecordFile, mm: Optional[mmap.mmap], time: int, n: int):
+        """
+        The position of the first of the first `n` candles at or after `time`
+        """
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if file.record(mid, mm)[0] < time:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def merge(self, pair: str, interval: int, rows: List[List[Any]], last: int):
+        """
+        Stores candles as returned by the OHLC endpoint, then moves the checkpoint.
+        Stored candles from the first new one onwards, which includes the candle that
+        was still open at the last refresh, are overwritten in place.
+        """
+        file = self._file(pair, interval)
+        stored = self.count(pair, interval)
+        if rows:
+            mm = file.open_map()
+            try:
+                start = self._index(file, mm, int(rows[0][0]), stored)
+            finally:
+                if mm is not None:
+                    mm.close()
+            file.write_at(
+                start,
+                ((int(r[0]), *(float(v) for v in r[1:7]), int(r[7])) for r in rows),
+            )
+            stored = start + len(rows)
+        write_json(
+            self._name(pair, interval) + ".json", {"last": last, "records": stored}
+        )
+
+    def columns(
+        self,
+        pair: str,
+        interval: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> OHLCColumns:
+        """
+        Reads the candles from `start` up to but not including `end`, both unix
+        timestamps, through a memory map. With NumPy installed the columns are views
+        onto the map, so nothing is copied.
+        """
+        checkpoint = self.checkpoint(pair, interval)
+        file = self._file(pair, interval)
+        stored = checkpoint.get("records", 0)
+
+        mm = file.open_map() if start is not None or end is not None else None
+        try:
+            first = 0 if start is None else self._index(file, mm, start, stored)
+            stop = stored if end is None else self._index(file, mm, end, stored)
+        finally:
+            if mm is not None:
+                mm.close()
+        cols = file.columns(first, max(first, stop))
+        return OHLCColumns(last=checkpoint.get("last"), **cols)
+
+
+@dataclass
+class RefreshStatus:
+    pair: str
+    # candles written, including the open candle rewritten
+    records: int = 0
+    last: Optional[int] = None
+    error: Optional[str] = None
+
+
+class OHLCCache:
+    """
+    Keeps an OHLCStore up to date. Each refresh asks the OHLC endpoint only for
+    candles after the stored `last`, appends them and rewrites the candle that was
+    still open.
+
+        cache = OHLCCache(client, OHLCStore("candles"))
+        cache.refresh(["XBTUSD", "ETHUSD"], interval=1)
+        cache.store.columns("XBTUSD", 1).close
+
+    Requests are spaced `min_interval` seconds apart across all workers, so
+    refreshing 100 pairs takes about 100 seconds. Kraken only serves the most recent
+    720 candles of an interval, so refresh more often than that span to keep the
+    history unbroken.
+    """
+
+    def __init__(
+        self,
+        client,
+        store: OHLCStore,
+        max_workers: int = 4,
+        min_interval: float = 1.0,
+    ):
+        self.client = client
+        self.store = store
+        self.max_workers = max_workers
+        # Kraken allows roughly one public request per second, shared by every worker
+        self.pacer = Pacer(min_interval)
+
+    def refresh(self, pairs: List[str], interval: int = 1) -> Dict[str, RefreshStatus]:
+        """
+        Refreshes pairs concurrently
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            statuses = pool.map(lambda p: self.refresh_pair(p, interval), pairs)
+            return {status.pair: status for status in statuses}
+
+    def refresh_pair(self, pair: str, interval: int = 1) -> RefreshStatus:
+        since = self.store.checkpoint(pair, interval).get("last")
+        status = RefreshStatus(pair, last=since)
+
+        try:
+            self.pacer.wait()
+            resp = self.client.get_ohlc_data(pair, interval, since)
+            if not resp.ok:
+                raise ResponseError(resp.errors)
+
+            last = int(resp.result["last"])
+            rows = next(v for k, v in resp.result.items() if k != "last")
+            self.store.merge(pair, interval, rows, last)
+            status.records, status.last = len(rows), last
+        except REQUEST_FAILURES as e:
+            status.error = describe_exception(e)
+
+        return status
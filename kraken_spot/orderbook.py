@@ -0,0 +1,181 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .errors import ParameterError
+
+BUY = "buy"
+SELL = "sell"
+
+
+@dataclass
+class BookSide:
+    """
+    One side of the book, best level first, with running totals so depth queries are a
+    binary search rather than a walk over the levels.
+    """
+
+    prices: Sequence[float]
+    volumes: Sequence[float]
+    # prices arranged to increase away from the touch, so both sides bisect the same way
+    keys: Sequence[float] = field(repr=False)
+    cum_volume: Sequence[float] = field(repr=False)
+    cum_notional: Sequence[float] = field(repr=False)
+
+    @classmethod
+    def from_levels(cls, levels: List[List[Any]], descending: bool) -> "BookSide":
+        prices = array("d", (float(level[0]) for level in levels))
+        volumes = array("d", (float(level[1]) for level in levels))
+        cum_volume = array("d", bytes(8 * len(levels)))
+        cum_notional = array("d", bytes(8 * len(levels)))
+
+        total_volume = total_notional = 0.0
+        for i, (price, volume) in enumerate(zip(prices, volumes)):
+            total_volume += volume
+            total_notional += price * volume
+            cum_volume[i] = total_volume
+            cum_notional[i] = total_notional
+
+        keys = array("d", (-p for p in prices)) if descending else prices
+        return cls(prices, volumes, keys, cum_volume, cum_notional)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def total_volume(self) -> float:
+        return self.cum_volume[-1] if len(self) else 0.0
+
+    def notional(self, volume: float) -> float:
+        """
+        The cost of taking `volume` from this side, best levels first
+        """
+        if volume <= 0:
+            raise ParameterError(f"volume must be positive, {volume} was requested")
+        if volume > self.total_volume:
+            raise ParameterError(
+                f"only {self.total_volume} is available, {volume} was requested"
+            )
+
+        i = bisect_left(self.cum_volume, volume)
+        filled = self.cum_volume[i - 1] if i else 0.0
+        spent = self.cum_notional[i - 1] if i else 0.0
+        return spent + (volume - filled) * self.prices[i]
+
+    def best(self, name: str) -> float:
+        if not len(self):
+            raise ParameterError(f"there are no {name}")
+        return self.prices[0]
+
+    def volume_to(self, key: float) -> float:
+        """
+        The volume of every level up to and including `key`
+        """
+        i = bisect_right(self.keys, key)
+        return self.cum_volume[i - 1] if i else 0.0
+
+
+@dataclass
+class BookDiff:
+    """
+    Levels that changed between two snapshots as (price, volume) pairs. A volume of 0
+    means the level was removed.
+    """
+
+    bids: List[Tuple[float, float]]
+    asks: List[Tuple[float, float]]
+
+    def __bool__(self) -> bool:
+        return bool(self.bids or self.asks)
+
+
+def _diff_side(old: BookSide, new: BookSide) -> List[Tuple[float, float]]:
+    before = dict(zip(old.prices, old.volumes))
+    after = dict(zip(new.prices, new.volumes))
+    changed = [(p, v) for p, v in after.items() if before.get(p) != v]
+    changed.extend((p, 0.0) for p in before if p not in after)
+    return changed
+
+
+@dataclass
+class OrderBook:
+    """
+    A snapshot of the Depth endpoint for one pair. Prices and volumes are stored in
+    contiguous arrays with cumulative depth precomputed, so execution price, slippage
+    and depth queries take O(log n).
+    """
+
+    pair: str
+    bids: BookSide
+    asks: BookSide
+
+    @classmethod
+    def from_result(cls, pair: str, book: Dict[str, List[List[Any]]]) -> "OrderBook":
+        return cls(
+            pair,
+            bids=BookSide.from_levels(book.get("bids", []), descending=True),
+            asks=BookSide.from_levels(book.get("asks", []), descending=False),
+        )
+
+    @property
+    def best_bid(self) -> float:
+        return self.bids.best("bids")
+
+    @property
+    def best_ask(self) -> float:
+        return self.asks.best("asks")
+
+    @property
+    def mid(self) -> float:
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    def _side(self, direction: str) -> BookSide:
+        if direction == BUY:
+            return self.asks
+        if direction == SELL:
+            return self.bids
+        raise ParameterError(f"direction must be '{BUY}' or '{SELL}'")
+
+    def vwap(self, volume: float, direction: str = BUY) -> float:
+        """
+        The average price a market order for `volume` would fill at
+        """
+        return self._side(direction).notional(volume) / volume
+
+    def slippage(self, volume: float, direction: str = BUY) -> float:
+        """
+        How much worse than the mid price a market order for `volume` would fill, in
+        basis points
+        """
+        price = self.vwap(volume, direction)
+        sign = 1 if direction == BUY else -1
+        return sign * (price - self.mid) / self.mid * 10_000
+
+    def depth_within(self, bps: float, direction: str = BUY) -> float:
+        """
+        The volume available within `bps` basis points of the mid price
+        """
+        if direction == BUY:
+            return self.asks.volume_to(self.mid * (1 + bps / 10_000))
+        return self._side(direction).volume_to(-self.mid * (1 - bps / 10_000))
+
+    def diff(self, previous: "OrderBook") -> BookDiff:
+        """
+        The levels that changed since `previous`
+        """
+        return BookDiff(
+            bids=_diff_side(previous.bids, self.bids),
+            asks=_diff_side(previous.asks, self.asks),
+        )
+
+
+def order_books(result: Dict[str, Any]) -> Dict[str, OrderBook]:
+    """
+    Converts a Depth result to {pair: OrderBook}
+    """
+    return {pair: OrderBook.from_result(pair, book) for pair, book in result.items()}
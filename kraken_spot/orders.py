@@ -0,0 +1,207 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from .errors import ErrorCategory, ParameterError
+from .http import KrakenResponse
+
+# Kraken accepts between 2 and 15 orders in one AddOrderBatch call
+MIN_BATCH_SIZE = 2
+MAX_BATCH_SIZE = 15
+
+
+@dataclass
+class OrderSpec:
+    """
+    One order, with the same fields as `add_order`
+    """
+
+    order_type: str
+    direction: str
+    volume: str
+    price_1: Optional[str] = None
+    price_2: Optional[str] = None
+    trigger: Optional[str] = None
+    leverage: Optional[str] = None
+    stp_type: Optional[str] = None
+    o_flags: Optional[str] = None
+    time_in_force: Optional[str] = None
+    start_time: Optional[str] = None
+    expire_time: Optional[str] = None
+    close_order_type: Optional[str] = None
+    close_price: Optional[str] = None
+    close_price_2: Optional[str] = None
+    user_ref: Optional[str] = None
+
+    def params(self) -> Dict[str, Any]:
+        """
+        The order's fields under the names Kraken expects
+        """
+        return {
+            "userref": self.user_ref,
+            "ordertype": self.order_type,
+            "type": self.direction,
+            "volume": self.volume,
+            "price": self.price_1,
+            "price2": self.price_2,
+            "trigger": self.trigger,
+            "leverage": self.leverage,
+            "stp_type": self.stp_type,
+            "oflags": self.o_flags,
+            "timeinforce": self.time_in_force,
+            "starttm": self.start_time,
+            "expiretm": self.expire_time,
+            "close[ordertype]": self.close_order_type,
+            "close[price]": self.close_price,
+            "close[price2]": self.close_price_2,
+        }
+
+
+OrderLike = Union[OrderSpec, Dict[str, Any]]
+
+
+def to_order_specs(orders: List[OrderLike]) -> List[OrderSpec]:
+    if not MIN_BATCH_SIZE <= len(orders) <= MAX_BATCH_SIZE:
+        raise ParameterError(
+            f"a batch must have between {MIN_BATCH_SIZE} and {MAX_BATCH_SIZE} orders"
+        )
+
+    specs = []
+    names = {f.name for f in fields(OrderSpec)}
+    for order in orders:
+        if isinstance(order, dict):
+            unknown = set(order) - names
+            if unknown:
+                raise ParameterError(f"unknown order fields {sorted(unknown)}")
+            order = OrderSpec(**order)
+        specs.append(order)
+    return specs
+
+
+def batch_params(specs: List[OrderSpec]) -> Dict[str, Any]:
+    """
+    Flattens orders into the nested form fields AddOrderBatch expects, so the first
+    order's `close[price]` becomes `orders[0][close][price]`
+    """
+    out = {}
+    for i, spec in enumerate(specs):
+        for key, value in spec.params().items():
+            name, _, sub = key.partition("[")
+            out[f"orders[{i}][{name}]" + (f"[{sub}" if sub else "")] = value
+    return out
+
+
+@dataclass
+class BatchOrderResult:
+    """
+    Kraken's outcome for one order in a batch, alongside the order it belongs to
+    """
+
+    order: OrderSpec
+    txid: Optional[str] = None
+    descr: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def batch_results(specs: List[OrderSpec]):
+    """
+    Returns a transform that pairs each entry of an AddOrderBatch result with the
+    order it was placed for. Results come back in the order they were sent.
+    """
+
+    def transform(result: Dict[str, Any]) -> Dict[str, Any]:
+        outcomes = []
+        for spec, entry in zip(specs, result.get("orders", [])):
+            outcomes.append(
+                BatchOrderResult(
+                    order=spec,
+                    txid=entry.get("txid"),
+                    descr=entry.get("descr"),
+                    error=entry.get("error"),
+                )
+            )
+        return {**result, "orders": outcomes}
+
+    return transform
+
+
+# Kraken accepts at most 50 txids or userrefs in one CancelOrderBatch call
+MAX_CANCEL_BATCH_SIZE = 50
+
+
+class CancelQuery(NamedTuple):
+    ids: List[str]
+    url_path: str
+    body: Dict[str, Any]
+
+
+@dataclass
+class BatchCancelResponse:
+    """
+    The merged outcome of cancelling many orders. `cancelled` lists the ids whose
+    request succeeded and `count` is the number of orders Kraken reported cancelled,
+    which can be more than the ids given when a userref matches several orders.
+    Errors are reported per id.
+    """
+
+    count: int = 0
+    cancelled: List[str] = field(default_factory=list)
+    errors: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return len(self.errors) == 0
+
+
+def cancel_queries(
+    ids: List[Union[str, int]], chunk_size: int = MAX_CANCEL_BATCH_SIZE
+) -> List[CancelQuery]:
+    """
+    Splits txids and userrefs into CancelOrderBatch calls of at most `chunk_size`.
+    A lone id is sent to CancelOrder.
+    """
+    if not 0 < chunk_size <= MAX_CANCEL_BATCH_SIZE:
+        raise ParameterError(
+            f"chunk_size must be between 1 and {MAX_CANCEL_BATCH_SIZE}"
+        )
+
+    unique = list(dict.fromkeys(str(i) for i in ids))
+    queries = []
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start : start + chunk_size]
+        if len(chunk) == 1:
+            queries.append(CancelQuery(chunk, "CancelOrder", {"txid": chunk[0]}))
+        else:
+            body = {f"orders[{i}]": tx_id for i, tx_id in enumerate(chunk)}
+            queries.append(CancelQuery(chunk, "CancelOrderBatch", body))
+    return queries
+
+
+# errors that may be caused by a single id in a batch
+_PER_ID_ERRORS = {ErrorCategory.ORDER_REJECTED, ErrorCategory.INVALID_ARGUMENTS}
+
+
+def split_failed_cancels(
+    queries: List[CancelQuery],
+    responses: List[KrakenResponse],
+    out: BatchCancelResponse,
+) -> List[CancelQuery]:
+    """
+    Merges responses into `out` and returns single id queries to retry for any batch
+    Kraken rejected because of its ids, since it rejects the whole batch when one of
+    them is unknown. Any other failure is reported for every id in the batch.
+    """
+    retry = []
+    for query, resp in zip(queries, responses):
+        if resp.ok:
+            out.count += int(resp.result.get("count", 0))
+            out.cancelled.extend(query.ids)
+        elif len(query.ids) > 1 and resp.error_category in _PER_ID_ERRORS:
+            retry.extend(cancel_queries(query.ids, chunk_size=1))
+        else:
+            for tx_id in query.ids:
+                out.errors[tx_id] = list(resp.errors)
+    return retry
@@ -0,0 +1,85 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Set, Tuple
+
+from .errors import ResponseError
+from .http import KrakenResponse
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+def _unpack(resp: KrakenResponse, result_key: str, seen: Set[str]):
+    """
+    Returns the page's unseen records and the total number of records. Kraken returns
+    history newest first, so records that arrive while paging shift older ones onto
+    the next page and they would otherwise be returned twice.
+    """
+    if not resp.ok:
+        raise ResponseError(resp.errors)
+
+    page = resp.result.get(result_key) or {}
+    records = [(k, v) for k, v in page.items() if k not in seen]
+    seen.update(page)
+    return records, len(page), int(resp.result.get("count", 0))
+
+
+def paginate(
+    fetch: Callable[[int], KrakenResponse], result_key: str, prefetch: bool = True
+) -> Iterator[Record]:
+    """
+    Follows `ofs` through an offset paginated endpoint, yielding (id, record) pairs
+    until `count` records have been seen. With `prefetch` the next page is requested
+    in the background while the caller works through the current one.
+
+    `fetch` is called with the offset to request. Any start or end bounds are applied
+    by Kraken, so iteration stops at them.
+    """
+    seen: Set[str] = set()
+    ofs = 0
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        resp = fetch(ofs)
+        while True:
+            records, size, count = _unpack(resp, result_key, seen)
+            ofs += size
+            more = size > 0 and ofs < count
+
+            pending = executor.submit(fetch, ofs) if executor and more else None
+            yield from records
+
+            if not more:
+                return
+            resp = pending.result() if pending else fetch(ofs)
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+
+
+async def apaginate(
+    fetch: Callable[[int], Awaitable[KrakenResponse]],
+    result_key: str,
+    prefetch: bool = True,
+) -> AsyncIterator[Record]:
+    """
+    The asyncio version of `paginate`
+    """
+    seen: Set[str] = set()
+    ofs = 0
+    resp = await fetch(ofs)
+    while True:
+        records, size, count = _unpack(resp, result_key, seen)
+        ofs += size
+        more = size > 0 and ofs < count
+
+        pending = asyncio.ensure_future(fetch(ofs)) if prefetch and more else None
+        try:
+            for record in records:
+                yield record
+        except BaseException:
+            if pending:
+                pending.cancel()
+            raise
+
+        if not more:
+            return
+        resp = await pending if pending else await fetch(ofs)
@@ -0,0 +1,247 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Union
+
+from .auth import NonceGenerator
+from .bulk import DEFAULT_MAX_WORKERS
+from .client import Client
+from .errors import REQUEST_FAILURES, ParameterError
+from .http import KrakenResponse, Transport
+from .ratelimit import RateLimiter
+
+
+class Credentials(NamedTuple):
+    api_key: str
+    private_key: str
+    tier: str = "starter"
+
+
+CredentialsLike = Union[Credentials, tuple]
+AccountCall = Callable[[Client], Any]
+
+
+@dataclass
+class PoolResponse:
+    """
+    The merged result of a call made on many accounts, keyed by account name. Errors
+    are reported per account, so one failing key does not hide the others.
+    """
+
+    result: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return len(self.errors) == 0
+
+
+def merge_result(out: PoolResponse, name: str, resp: KrakenResponse):
+    if resp.ok:
+        out.result[name] = resp.result
+    else:
+        out.errors[name] = list(resp.errors)
+
+
+def total_balances(balances: Dict[str, Dict[str, str]]) -> Dict[str, Decimal]:
+    """
+    Sums per account Balance results into one balance per asset
+    """
+    totals: Dict[str, Decimal] = {}
+    for balance in balances.values():
+        for asset, amount in balance.items():
+            totals[asset] = totals.get(asset, Decimal(0)) + Decimal(amount)
+    return totals
+
+
+class ClientPool:
+    """
+    A client per account, all sending through one shared transport so the accounts
+    reuse the same keep-alive connections.
+
+        pool = ClientPool({"main": (key, secret), "hedge": (key_2, secret_2, "pro")})
+        balances = pool.get_account_balance()
+        balances.result["hedge"]
+
+    Each API key has its own nonce sequence and rate limiter for its verification
+    tier, since Kraken tracks both per key. Accounts listed under the same key share
+    them. With a `nonce_dir`, each key's nonces are kept in a file there so several
+    processes can use the pool at once.
+
+    Other client options, such as `retry_policy` or `instrument`, are passed to every
+    client.
+    """
+
+    client_class = Client
+
+    def __init__(
+        self,
+        credentials: Dict[str, CredentialsLike],
+        transport: Any = None,
+        nonce_dir: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        **options,
+    ):
+        self.max_workers = max_workers
+        self.transport = transport or self._default_transport()
+        self.options = options
+        self._clients: Dict[str, Client] = {}
+        self._by_key: Dict[str, Client] = {}
+        # shared by every fan-out, so calls made at the same time share the limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        for name, creds in credentials.items():
+            self.add(name, Credentials(*creds), nonce_dir)
+
+    @classmethod
+    def from_env(cls, prefix: str = "KRAKEN_", **kwargs) -> "ClientPool":
+        """
+        Loads every account with both <prefix>API_KEY_<NAME> and
+        <prefix>PRIVATE_KEY_<NAME> set. <prefix>TIER_<NAME> sets its tier.
+        """
+        credentials = {}
+        for var, api_key in os.environ.items():
+            if not var.startswith(f"{prefix}API_KEY_"):
+                continue
+            suffix = var[len(f"{prefix}API_KEY_") :]
+            private_key = os.environ.get(f"{prefix}PRIVATE_KEY_{suffix}")
+            if private_key:
+                tier = os.environ.get(f"{prefix}TIER_{suffix}", "starter")
+                credentials[suffix.lower()] = Credentials(api_key, private_key, tier)
+        return cls(credentials, **kwargs)
+
+    def _default_transport(self):
+        return Transport(pool_maxsize=self.max_workers)
+
+    def add(
+        self, name: str, credentials: Credentials, nonce_dir: Optional[str] = None
+    ) -> Client:
+        if name in self._clients:
+            raise ParameterError(f"account '{name}' is already in the pool")
+
+        shared = self._by_key.get(credentials.api_key)
+        if shared is not None:
+            rate_limiter, nonce_generator = shared.rate_limiter, shared.nonce_generator
+        else:
+            rate_limiter = RateLimiter(credentials.tier)
+            nonce_generator = NonceGenerator(self._nonce_path(credentials, nonce_dir))
+
+        client = self.client_class(
+            api_key=credentials.api_key,
+            private_key=credentials.private_key,
+            transport=self.transport,
+            rate_limiter=rate_limiter,
+            nonce_generator=nonce_generator,
+            **self.options,
+        )
+        self._clients[name] = client
+        self._by_key.setdefault(credentials.api_key, client)
+        return client
+
+    @staticmethod
+    def _nonce_path(credentials: Credentials, nonce_dir: Optional[str]):
+        if not nonce_dir:
+            return None
+        # named after a digest so the key itself is never written to disk
+        digest = hashlib.sha256(credentials.api_key.encode()).hexdigest()[:16]
+        return os.path.join(nonce_dir, f"{digest}.nonce")
+
+    def __getitem__(self, name: str) -> Client:
+        try:
+            return self._clients[name]
+        except KeyError:
+            raise ParameterError(f"unknown account '{name}'") from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._clients)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._clients)
+
+    def for_key(self, api_key: str) -> Client:
+        """
+        The client for an API key
+        """
+        try:
+            return self._by_key[api_key]
+        except KeyError:
+            raise ParameterError("no account in the pool uses that API key") from None
+
+    def _selected(self, accounts: Optional[List[str]]) -> Dict[str, Client]:
+        if accounts is None:
+            return dict(self._clients)
+        return {name: self[name] for name in accounts}
+
+    def _run_call(self, fn: AccountCall, client: Client) -> KrakenResponse:
+        try:
+            return fn(client)
+        except REQUEST_FAILURES as e:
+            return KrakenResponse.failed(e)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="kraken-pool"
+                )
+            return self._executor
+
+    def _fan_out(self, fn: AccountCall, clients: Dict[str, Client]) -> PoolResponse:
+        pool = self._get_executor()
+        responses = list(pool.map(lambda c: self._run_call(fn, c), clients.values()))
+
+        out = PoolResponse()
+        for name, resp in zip(clients, responses):
+            merge_result(out, name, resp)
+        return out
+
+    def map(
+        self, fn: AccountCall, accounts: Optional[List[str]] = None
+    ) -> PoolResponse:
+        """
+        Calls `fn` with each account's client and merges the responses by account
+        name. At most `max_workers` calls run at a time across every fan-out.
+        """
+        return self._fan_out(fn, self._selected(accounts))
+
+    def call(
+        self, method: str, *args, accounts: Optional[List[str]] = None, **kwargs
+    ) -> PoolResponse:
+        """
+        Calls a client method by name on every account, e.g. `call("get_trade_volume")`
+        """
+        return self.map(lambda c: getattr(c, method)(*args, **kwargs), accounts)
+
+    def get_account_balance(self, accounts: Optional[List[str]] = None) -> PoolResponse:
+        return self.call("get_account_balance", accounts=accounts)
+
+    def get_open_orders(
+        self,
+        trades: Optional[bool] = None,
+        user_ref: Optional[int] = None,
+        accounts: Optional[List[str]] = None,
+    ) -> PoolResponse:
+        return self.call(
+            "get_open_orders", trades=trades, user_ref=user_ref, accounts=accounts
+        )
+
+    def _shutdown_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def close(self):
+        self._shutdown_executor()
+        self.transport.close()
+        policy = self.options.get("retry_policy")
+        if policy:
+            policy.close()
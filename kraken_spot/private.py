@@ -1,8 +1,46 @@
-from typing import Dict, Optional
-
-from .auth import generate_nonce, get_kraken_signature
-from .errors import AuthError
-from .http import KrakenResponse, clean_params, http_post
+import io
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .auth import Signer, generate_nonce
+from .errors import REQUEST_FAILURES, AuthError, ResponseError
+from .exports import DOWNLOAD_CHUNK_SIZE, copy_export
+from .http import (
+    HTTPResponse,
+    KrakenResponse,
+    ResultTransform,
+    encode_params,
+    http_post,
+    to_kraken_response,
+)
+from .instrumentation import RequestTiming, instrumented
+from .orders import (
+    MAX_CANCEL_BATCH_SIZE,
+    BatchCancelResponse,
+    CancelQuery,
+    OrderLike,
+    OrderSpec,
+    batch_params,
+    batch_results,
+    cancel_queries,
+    split_failed_cancels,
+    to_order_specs,
+)
+from .pagination import Record, paginate
+from .ratelimit import RATE_LIMIT_ERROR
+from .retry import READ_ONLY_ENDPOINTS
+from .storage import atomic_writer
 
 
 class PrivateEndpoints:
@@ -11,12 +49,82 @@ class PrivateEndpoints:
     """
 
     _otp: Optional[int]
+    _signer: Optional[Signer] = None
 
     def _authorised_query(
-        self, url_path: str, body: Optional[Dict] = None
+        self,
+        url_path: str,
+        body: Optional[Dict] = None,
+        transform: Optional[ResultTransform] = None,
     ) -> KrakenResponse:
         """
-        Makes a request to an endpoint that requires API Key authorisation
+        Makes a request to an endpoint that requires API Key authorisation. A request
+        that is retried is signed again with a fresh nonce.
+        """
+        limiter = self.rate_limiter  # type: ignore
+        instrument = self.instrument  # type: ignore
+
+        def fetch(timing: Optional[RequestTiming]) -> HTTPResponse:
+            if limiter:
+                limiter.acquire(url_path)
+
+            url, signed, headers = self._prepare_authorised_query(
+                url_path, body, timing
+            )
+            resp = http_post(
+                url,
+                signed,
+                headers,
+                transport=self.transport,  # type: ignore
+                decoder=self.json_decoder,  # type: ignore
+                timing=timing,
+            )
+            if limiter and RATE_LIMIT_ERROR in resp.errors:
+                limiter.record_rate_limit_exceeded()
+            return resp
+
+        template = RequestTiming(url_path, private=True) if instrument else None
+        send = instrumented(instrument, template, fetch)
+        policy = self.retry_policy  # type: ignore
+        # a one time password can only be used once, so those requests are never resent
+        if policy and not getattr(self, "_otp", None):
+            resp = policy.call(send, idempotent=url_path in READ_ONLY_ENDPOINTS)
+        else:
+            resp = send()
+        return to_kraken_response(resp, transform)
+
+    def _download(
+        self, url_path: str, body: Dict[str, Any], out: BinaryIO, chunk_size: int
+    ) -> List[str]:
+        """
+        Streams a private endpoint's binary response into `out` and returns Kraken's
+        errors, if it sent those instead. Downloads are never retried, since part of
+        the body may already have been written.
+        """
+        limiter = self.rate_limiter  # type: ignore
+        if limiter:
+            limiter.acquire(url_path)
+
+        url, signed, headers = self._prepare_authorised_query(url_path, body)
+        r = self.transport.post(url, signed, headers, stream=True)  # type: ignore
+        try:
+            errors = copy_export(r.iter_content(chunk_size), out)
+        finally:
+            r.close()
+        if limiter and RATE_LIMIT_ERROR in errors:
+            limiter.record_rate_limit_exceeded()
+        return errors
+
+    def _prepare_authorised_query(
+        self,
+        url_path: str,
+        body: Optional[Dict] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> Tuple[str, bytes, Dict[str, str]]:
+        """
+        Builds the url, form encoded body and headers for a private request. The body
+        is encoded once and those bytes are both signed and sent. The one time
+        password, if set, is consumed.
         """
         api_key = self.api_key  # type: ignore
         private_key = self.private_key  # type: ignore
@@ -32,27 +140,41 @@ class PrivateEndpoints:
             )
 
         full_url_path = f"/{api_version}/private/{url_path}"
-        default_data = {"nonce": generate_nonce()}
+        nonce_generator = self.nonce_generator or generate_nonce  # type: ignore
+        default_data = {"nonce": nonce_generator()}
 
         # set one time password for this request
         if hasattr(self, "_otp") and self._otp:
             default_data["otp"] = self._otp
 
-        body = body or {}
-        body = clean_params({**body, **default_data})
+        # reset otp
+        if hasattr(self, "_otp"):
+            self._otp = None
+
+        start = perf_counter()
+        encoded = encode_params({**body, **default_data} if body else default_data)
+        cleaned_at = perf_counter()
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
             "API-Key": api_key,
-            "API-Sign": get_kraken_signature(full_url_path, body, private_key),
+            "API-Sign": self._get_signer(private_key).sign(
+                full_url_path, default_data["nonce"], encoded
+            ),
         }
-        url = f"{endpoint}{full_url_path}"
-        resp = http_post(url, body, headers)
+        if timing is not None:
+            timing.clean = cleaned_at - start
+            timing.sign = perf_counter() - cleaned_at
+        return f"{endpoint}{full_url_path}", encoded, headers
 
-        # reset otp
-        if hasattr(self, "_otp"):
-            self._otp = None
+    def _get_signer(self, private_key: str) -> Signer:
+        if self._signer is None or self._signer.secret != private_key:
+            self._signer = Signer(private_key)
+        return self._signer
 
-        return KrakenResponse(resp.body.get("result", {}), resp.body.get("error", {}))
+    def _paginate(
+        self, fetch: Callable[[int], KrakenResponse], result_key: str, prefetch: bool
+    ) -> Iterator[Record]:
+        return paginate(fetch, result_key, prefetch)
 
     def set_otp(self, otp: int):
         self._otp = otp
@@ -104,6 +226,26 @@ class PrivateEndpoints:
             },
         )
 
+    def iter_closed_orders(
+        self,
+        trades: Optional[bool] = None,
+        user_ref: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        close_time: Optional[str] = None,
+        prefetch: bool = True,
+    ) -> Iterator[Record]:
+        """
+        Iterates (txid, order) over every closed order, requesting pages as needed
+        """
+        return self._paginate(
+            lambda ofs: self.get_closed_orders(
+                trades, user_ref, start, end, ofs, close_time
+            ),
+            "closed",
+            prefetch,
+        )
+
     def query_orders_info(
         self, tx_id: str, trades: Optional[bool] = None, user_ref: Optional[int] = None
     ) -> KrakenResponse:
@@ -141,6 +283,23 @@ class PrivateEndpoints:
             },
         )
 
+    def iter_trades_history(
+        self,
+        trade_type: Optional[str] = None,
+        trades: Optional[bool] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        prefetch: bool = True,
+    ) -> Iterator[Record]:
+        """
+        Iterates (txid, trade) over the whole trade history, requesting pages as needed
+        """
+        return self._paginate(
+            lambda ofs: self.get_trades_history(trade_type, trades, start, end, ofs),
+            "trades",
+            prefetch,
+        )
+
     def get_trades_info(
         self, tx_id: Optional[str] = None, trades: Optional[bool] = None
     ) -> KrakenResponse:
@@ -191,6 +350,24 @@ class PrivateEndpoints:
             },
         )
 
+    def iter_ledgers(
+        self,
+        asset: Optional[str] = None,
+        a_class: Optional[str] = None,
+        type: Optional[str] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        prefetch: bool = True,
+    ) -> Iterator[Record]:
+        """
+        Iterates (ledger_id, entry) over every ledger entry, requesting pages as needed
+        """
+        return self._paginate(
+            lambda ofs: self.get_ledgers(asset, a_class, type, start, end, ofs),
+            "ledger",
+            prefetch,
+        )
+
     def query_ledgers(
         self, ledger_id: Optional[str] = None, trades: Optional[bool] = None
     ) -> KrakenResponse:
@@ -253,8 +430,29 @@ class PrivateEndpoints:
     def retrieve_data_export(self, report_id: str) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/User-Data/operation/retrieveExport
+
+        The result is the zip archive's bytes. Use `download_data_export` for large
+        reports.
+        """
+        out = io.BytesIO()
+        errors = self._download(
+            "RetrieveExport", {"id": report_id}, out, DOWNLOAD_CHUNK_SIZE
+        )
+        return KrakenResponse(None if errors else out.getvalue(), errors)
+
+    def download_data_export(
+        self, report_id: str, path: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ) -> str:
+        """
+        Streams a report's zip archive to `path` in chunks of `chunk_size` bytes. The
+        file only appears once the download is complete. Raises ResponseError if
+        Kraken can't send the report.
         """
-        return self._authorised_query("RetrieveExport", {"id": report_id})
+        with atomic_writer(path, "wb") as f:
+            errors = self._download("RetrieveExport", {"id": report_id}, f, chunk_size)
+            if errors:
+                raise ResponseError(errors)
+        return path
 
     def delete_export_report(self, report_id: str, report_type: str) -> KrakenResponse:
         """
@@ -290,30 +488,79 @@ class PrivateEndpoints:
     ) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/User-Trading/operation/addOrder
+
+        If the client has a pair registry, the pair is normalized, prices and volume
+        are rounded to the pair's precision and orders below the minimums are rejected
+        with a ParameterError before anything is sent.
         """
+        registry = self.pair_registry  # type: ignore
+        if registry:
+            pair, volume, price_1, price_2 = registry.prepare_order(  # type: ignore
+                pair, volume, price_1, price_2
+            )
+
+        order = OrderSpec(
+            order_type,
+            direction,
+            volume,
+            price_1,
+            price_2,
+            trigger,
+            leverage,
+            stp_type,
+            o_flags,
+            time_in_force,
+            start_time,
+            expire_time,
+            close_order_type,
+            close_price,
+            close_price_2,
+            user_ref,
+        )
         return self._authorised_query(
             "AddOrder",
             {
-                "userref": user_ref,
-                "ordertype": order_type,
-                "type": direction,
-                "volume": volume,
+                **order.params(),
+                "pair": pair,
+                "deadline": deadline,
+                "validate": validate,
+            },
+        )
+
+    def add_order_batch(
+        self,
+        orders: List[OrderLike],
+        pair: str,
+        deadline: Optional[str] = None,
+        validate: Optional[bool] = None,
+    ) -> KrakenResponse:
+        """
+        https://docs.kraken.com/rest/#tag/User-Trading/operation/addOrderBatch
+
+        Places 2 to 15 orders for the same pair in one request. Orders are OrderSpecs
+        or dicts with the same fields as `add_order`. On success `result["orders"]`
+        holds a BatchOrderResult per order, in the order they were given.
+        """
+        specs = to_order_specs(orders)
+
+        registry = self.pair_registry  # type: ignore
+        if registry:
+            for spec in specs:
+                pair, spec.volume, spec.price_1, spec.price_2 = (  # type: ignore
+                    registry.prepare_order(
+                        pair, spec.volume, spec.price_1, spec.price_2
+                    )
+                )
+
+        return self._authorised_query(
+            "AddOrderBatch",
+            {
+                **batch_params(specs),
                 "pair": pair,
-                "price": price_1,
-                "price2": price_2,
-                "trigger": trigger,
-                "leverage": leverage,
-                "stp_type": stp_type,
-                "oflags": o_flags,
-                "timeinforce": time_in_force,
-                "starttm": start_time,
-                "expiretm": expire_time,
-                "close[ordertype]": close_order_type,
-                "close[price]": close_price,
-                "close[price2]": close_price_2,
                 "deadline": deadline,
                 "validate": validate,
             },
+            batch_results(specs),
         )
 
     def edit_order(
@@ -331,7 +578,15 @@ class PrivateEndpoints:
     ) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/User-Trading/operation/editOrder
+
+        Validated against the client's pair registry in the same way as `add_order`.
         """
+        registry = self.pair_registry  # type: ignore
+        if registry:
+            pair, volume, price, price_2 = registry.prepare_order(
+                pair, volume, price, price_2
+            )
+
         return self._authorised_query(
             "EditOrder",
             {
@@ -354,6 +609,45 @@ class PrivateEndpoints:
         """
         return self._authorised_query("CancelOrder", {"txid": tx_id})
 
+    def _run_cancel_query(self, query: CancelQuery) -> KrakenResponse:
+        try:
+            return self._authorised_query(query.url_path, query.body)
+        except REQUEST_FAILURES as e:
+            return KrakenResponse.failed(e)
+
+    def _bulk_cancel(
+        self, queries: List[CancelQuery], max_workers: int
+    ) -> BatchCancelResponse:
+        out = BatchCancelResponse()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            retry = split_failed_cancels(
+                queries, list(pool.map(self._run_cancel_query, queries)), out
+            )
+            if retry:
+                split_failed_cancels(
+                    retry, list(pool.map(self._run_cancel_query, retry)), out
+                )
+        return out
+
+    def cancel_orders(
+        self,
+        ids: List[Union[str, int]],
+        chunk_size: int = MAX_CANCEL_BATCH_SIZE,
+        max_workers: int = 4,
+    ) -> BatchCancelResponse:
+        """
+        https://docs.kraken.com/rest/#tag/User-Trading/operation/cancelOrderBatch
+
+        Cancels many orders by txid or userref. Ids are sent to CancelOrderBatch in
+        chunks of up to 50, with at most `max_workers` chunks in flight. A chunk Kraken
+        rejects is retried one id at a time so the error is reported against the id
+        that caused it.
+
+        Requests sent concurrently can arrive out of nonce order, so with
+        `max_workers` above 1 the API key needs a nonce window.
+        """
+        return self._bulk_cancel(cancel_queries(ids, chunk_size), max_workers)
+
     def cancel_all_orders(self) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/User-Trading/operation/cancelAllOrders
@@ -1,6 +1,17 @@
-from typing import Any, Dict, Optional
-
-from .http import KrakenResponse, clean_params, http_get
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple
+
+from .columnar import ohlc_columns, trade_columns
+from .http import (
+    HTTPResponse,
+    KrakenResponse,
+    ResultTransform,
+    clean_params,
+    http_get,
+    to_kraken_response,
+)
+from .instrumentation import RequestTiming, instrumented
+from .orderbook import order_books
 
 
 class PublicEndpoints:
@@ -9,13 +20,73 @@ class PublicEndpoints:
     """
 
     def _public_query(
-        self, url_path: str, params: Optional[Dict[str, Any]] = None
+        self,
+        url_path: str,
+        params: Optional[Dict[str, Any]] = None,
+        transform: Optional[ResultTransform] = None,
+    ) -> KrakenResponse:
+        instrument = self.instrument  # type: ignore
+        template = RequestTiming(url_path) if instrument else None
+        request_url, params = self._prepare_public_query(url_path, params, template)
+        cached = self._cached_response(url_path, params, transform)
+        if cached is not None:
+            return cached
+
+        def fetch(timing: Optional[RequestTiming]) -> HTTPResponse:
+            return http_get(
+                request_url,
+                params,
+                transport=self.transport,  # type: ignore
+                decoder=self.json_decoder,  # type: ignore
+                timing=timing,
+            )
+
+        send = instrumented(instrument, template, fetch)
+        policy = self.retry_policy  # type: ignore
+        if policy:
+            resp = policy.call(lambda: policy.hedged(send), idempotent=True)
+        else:
+            resp = send()
+        return self._cache_response(
+            url_path, params, to_kraken_response(resp, transform), transform
+        )
+
+    def _cached_response(
+        self,
+        url_path: str,
+        params: Optional[Dict[str, Any]],
+        transform: Optional[ResultTransform],
+    ) -> Optional[KrakenResponse]:
+        cache = self.response_cache  # type: ignore
+        if cache is None or transform:
+            return None
+        return cache.get(url_path, params)
+
+    def _cache_response(
+        self,
+        url_path: str,
+        params: Optional[Dict[str, Any]],
+        response: KrakenResponse,
+        transform: Optional[ResultTransform],
     ) -> KrakenResponse:
+        cache = self.response_cache  # type: ignore
+        if cache is not None and not transform:
+            cache.put(url_path, params, response)
+        return response
+
+    def _prepare_public_query(
+        self,
+        url_path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
         request_url = f"{self._base_url()}/public/{url_path}"  # type: ignore
         if params:
+            start = perf_counter()
             params = clean_params(params)
-        resp = http_get(request_url, params)
-        return KrakenResponse(resp.body.get("result", {}), resp.body.get("error", {}))
+            if timing is not None:
+                timing.clean = perf_counter() - start
+        return request_url, params
 
     def get_server_time(self) -> KrakenResponse:
         """
@@ -45,7 +116,7 @@ class PublicEndpoints:
         return self._public_query("Assets", params)
 
     def get_tradable_asset_pairs(
-        self, pair: str, info: Optional[str] = None
+        self, pair: Optional[str] = None, info: Optional[str] = None
     ) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/Market-Data/operation/getTradableAssetPairs
@@ -60,29 +131,41 @@ class PublicEndpoints:
         return self._public_query("Ticker", {"pair": pair})
 
     def get_ohlc_data(
-        self, pair: str, interval: Optional[int] = None, since: Optional[int] = None
+        self,
+        pair: str,
+        interval: Optional[int] = None,
+        since: Optional[int] = None,
+        columnar: bool = False,
     ) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/Market-Data/operation/getOHLCData
+
+        With `columnar` the candles for each pair are returned as `OHLCColumns`.
         """
         params = {"pair": pair, "interval": interval, "since": since}
-        return self._public_query("OHLC", params)
+        return self._public_query("OHLC", params, ohlc_columns if columnar else None)
 
-    def get_order_book(self, pair: str, count: Optional[int] = None) -> KrakenResponse:
+    def get_order_book(
+        self, pair: str, count: Optional[int] = None, snapshot: bool = False
+    ) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/Market-Data/operation/getOrderBook
+
+        With `snapshot` the book for each pair is returned as an `OrderBook`.
         """
         params = {"pair": pair, "count": count}
-        return self._public_query("Depth", params)
+        return self._public_query("Depth", params, order_books if snapshot else None)
 
     def get_recent_trades(
-        self, pair: str, since: Optional[int] = None
+        self, pair: str, since: Optional[int] = None, columnar: bool = False
     ) -> KrakenResponse:
         """
         https://docs.kraken.com/rest/#tag/Market-Data/operation/getRecentTrades
+
+        With `columnar` the trades for each pair are returned as `TradeColumns`.
         """
         params = {"pair": pair, "since": since}
-        return self._public_query("Trades", params)
+        return self._public_query("Trades", params, trade_columns if columnar else None)
 
     def get_recent_spreads(
         self, pair: str, since: Optional[int] = None
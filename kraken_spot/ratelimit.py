@@ -0,0 +1,167 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Union
+
+from .errors import RateLimitError
+
+RATE_LIMIT_ERROR = "EAPI:Rate limit exceeded"
+
+
+@dataclass(frozen=True)
+class Tier:
+    """
+    The size of an API key's call counter and how fast it decays. Both depend on the
+    account's verification tier.
+    """
+
+    max_counter: float
+    decay_per_second: float
+
+
+# https://docs.kraken.com/rest/#section/Rate-Limits/REST-API-Rate-Limits
+TIERS = {
+    "starter": Tier(max_counter=15, decay_per_second=0.33),
+    "intermediate": Tier(max_counter=20, decay_per_second=0.5),
+    "pro": Tier(max_counter=20, decay_per_second=1.0),
+}
+
+DEFAULT_COST = 1.0
+
+# history queries cost more, order placement and cancellation are metered by the
+# trading engine's own limiter and do not touch this counter
+ENDPOINT_COSTS: Dict[str, float] = {
+    "Ledgers": 2,
+    "QueryLedgers": 2,
+    "TradeHistory": 2,
+    "QueryTrades": 2,
+    "AddOrder": 0,
+    "AddOrderBatch": 0,
+    "EditOrder": 0,
+    "CancelOrder": 0,
+    "CancelOrderBatch": 0,
+}
+
+
+class RateLimiter:
+    """
+    Models Kraken's per key API call counter on the client side. Each private call
+    adds its cost to the counter, and the counter decays over time at the tier's rate.
+    A call that would take the counter over its maximum waits until there is room, so
+    Kraken never has to reject it.
+
+    One limiter should be shared by everything that uses the same API key.
+    """
+
+    def __init__(
+        self,
+        tier: Union[str, Tier] = "starter",
+        costs: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.tier = TIERS[tier] if isinstance(tier, str) else tier
+        self.costs = {**ENDPOINT_COSTS, **(costs or {})}
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counter = 0.0
+        self._updated = clock()
+
+    def _decay(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        self._counter = max(0.0, self._counter - elapsed * self.tier.decay_per_second)
+        self._updated = now
+
+    def cost(self, endpoint: str) -> float:
+        return self.costs.get(endpoint, DEFAULT_COST)
+
+    @property
+    def counter(self) -> float:
+        """
+        The current value of the modelled counter
+        """
+        with self._lock:
+            self._decay()
+            return self._counter
+
+    @property
+    def headroom(self) -> float:
+        """
+        How much cost can be spent right now without waiting
+        """
+        return self.tier.max_counter - self.counter
+
+    def reserve(self, endpoint: str) -> float:
+        """
+        Adds the endpoint's cost to the counter if there is room and returns 0. If
+        there isn't, nothing is added and the number of seconds to wait before trying
+        again is returned.
+        """
+        cost = self.cost(endpoint)
+        with self._lock:
+            self._decay()
+            excess = self._counter + cost - self.tier.max_counter
+            if excess <= 0:
+                self._counter += cost
+                return 0.0
+            return excess / self.tier.decay_per_second
+
+    def acquire(
+        self, endpoint: str, block: bool = True, timeout: Optional[float] = None
+    ):
+        """
+        Waits until the counter has room for a call to `endpoint`. Raises
+        RateLimitError if `block` is false and there is no room, or if there is still
+        no room after `timeout` seconds.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.reserve(endpoint)
+            if wait == 0:
+                return
+            if not block or (deadline is not None and self._clock() + wait > deadline):
+                raise RateLimitError(
+                    f"{endpoint} would exceed the API rate limit, retry in {wait:.2f}s"
+                )
+            time.sleep(wait)
+
+    def record_rate_limit_exceeded(self):
+        """
+        Kraken rejected a call for exceeding the rate limit, so the real counter is
+        full regardless of what was modelled.
+        """
+        with self._lock:
+            self._decay()
+            self._counter = self.tier.max_counter
+
+
+class Pacer:
+    """
+    Spaces calls at least `interval` seconds apart, however many threads share it.
+    Kraken limits public requests per IP address rather than per key, so concurrent
+    workers hitting public endpoints should share one pacer.
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.interval = interval
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """
+        Blocks until this caller's turn. Turns are handed out under the lock and
+        waited for outside it, so callers queue in order.
+        """
+        with self._lock:
+            now = self._clock()
+            turn = max(now, self._next)
+            self._next = turn + self.interval
+        if turn > now:
+            self._sleep(turn - now)
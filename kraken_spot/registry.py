@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+from decimal import ROUND_DOWN, ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple
+
+from .errors import ParameterError, ResponseError
+from .http import KrakenResponse
+
+
+@dataclass(frozen=True)
+class PairInfo:
+    name: str
+    altname: str
+    wsname: Optional[str]
+    base: str
+    quote: str
+    # smallest price increment and volume increment
+    tick_size: Decimal
+    lot_size: Decimal
+    ordermin: Decimal
+    costmin: Optional[Decimal]
+
+    @classmethod
+    def from_result(cls, name: str, info: Dict[str, Any]) -> "PairInfo":
+        tick_size = info.get("tick_size")
+        costmin = info.get("costmin")
+        return cls(
+            name=name,
+            altname=info["altname"],
+            wsname=info.get("wsname"),
+            base=info["base"],
+            quote=info["quote"],
+            tick_size=Decimal(tick_size or Decimal(1).scaleb(-info["pair_decimals"])),
+            lot_size=Decimal(1).scaleb(-info["lot_decimals"]),
+            ordermin=Decimal(info.get("ordermin") or 0),
+            costmin=Decimal(costmin) if costmin else None,
+        )
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    """
+    Parses a plain number. Relative prices such as "+5", "#5" or "2%" are left alone.
+    """
+    if value is None or (isinstance(value, str) and value[:1] in "+-#"):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+class AssetPairRegistry:
+    """
+    Every tradable pair, indexed by its canonical name (XXBTZUSD), altname (XBTUSD)
+    and wsname (XBT/USD), with the price and volume precision and order minimums
+    needed to check an order before it is sent.
+    """
+
+    def __init__(
+        self, pairs: Dict[str, Dict[str, Any]], assets: Optional[Dict[str, Any]] = None
+    ):
+        self.pairs: Dict[str, PairInfo] = {}
+        self._index: Dict[str, PairInfo] = {}
+        self._assets: Dict[str, str] = {}
+
+        for name, info in (assets or {}).items():
+            self._assets[name.upper()] = name
+            self._assets[info.get("altname", name).upper()] = name
+
+        for name, raw in pairs.items():
+            pair = PairInfo.from_result(name, raw)
+            self.pairs[name] = pair
+            for symbol in (name, pair.altname, pair.wsname):
+                if symbol:
+                    self._index[symbol.upper()] = pair
+                    self._index[symbol.replace("/", "").upper()] = pair
+
+    @classmethod
+    def from_responses(
+        cls, pairs: KrakenResponse, assets: KrakenResponse
+    ) -> "AssetPairRegistry":
+        for resp in (pairs, assets):
+            if not resp.ok:
+                raise ResponseError(resp.errors)
+        return cls(pairs.result, assets.result)
+
+    @classmethod
+    def from_client(cls, client) -> "AssetPairRegistry":
+        return cls.from_responses(
+            client.get_tradable_asset_pairs(), client.get_asset_info()
+        )
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._index
+
+    def get(self, symbol: str) -> PairInfo:
+        try:
+            return self._index[symbol.upper()]
+        except KeyError:
+            raise ParameterError(f"unknown asset pair '{symbol}'") from None
+
+    def normalize(self, symbol: str) -> str:
+        """
+        The canonical pair name for any of the names Kraken uses
+        """
+        return self.get(symbol).name
+
+    def normalize_asset(self, symbol: str) -> str:
+        try:
+            return self._assets[symbol.upper()]
+        except KeyError:
+            raise ParameterError(f"unknown asset '{symbol}'") from None
+
+    def round_price(self, symbol: str, price: Any) -> str:
+        """
+        Rounds a price to the nearest tick. Relative prices are returned unchanged.
+        """
+        value = _decimal(price)
+        if value is None:
+            return str(price)
+        tick = self.get(symbol).tick_size
+        ticks = (value / tick).quantize(Decimal(1), rounding=ROUND_HALF_EVEN)
+        return str((ticks * tick).quantize(tick))
+
+    def round_volume(self, symbol: str, volume: Any) -> str:
+        """
+        Rounds a volume down to the pair's lot precision, so an order never asks for
+        more than was intended
+        """
+        value = _decimal(volume)
+        if value is None:
+            raise ParameterError(f"invalid volume '{volume}'")
+        return str(value.quantize(self.get(symbol).lot_size, rounding=ROUND_DOWN))
+
+    def prepare_order(
+        self,
+        symbol: str,
+        volume: Optional[Any] = None,
+        price: Optional[Any] = None,
+        price_2: Optional[Any] = None,
+    ) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+        """
+        Normalizes the pair, rounds prices and volume and checks the order minimums.
+        Raises ParameterError for an order Kraken would reject.
+        """
+        pair = self.get(symbol)
+        rounded_volume = None if volume is None else self.round_volume(symbol, volume)
+        rounded_price = None if price is None else self.round_price(symbol, price)
+        rounded_price_2 = None if price_2 is None else self.round_price(symbol, price_2)
+
+        if rounded_volume is not None and Decimal(rounded_volume) != 0:
+            if Decimal(rounded_volume) < pair.ordermin:
+                raise ParameterError(
+                    f"volume {rounded_volume} is below the minimum of {pair.ordermin} "
+                    f"for {pair.altname}"
+                )
+
+            limit = _decimal(rounded_price)
+            cost = None if limit is None else limit * Decimal(rounded_volume)
+            if pair.costmin is not None and cost is not None and cost < pair.costmin:
+                raise ParameterError(
+                    f"order cost {cost} is below the minimum of {pair.costmin} "
+                    f"for {pair.altname}"
+                )
+
+        return pair.name, rounded_volume, rounded_price, rounded_price_2
@@ -0,0 +1,186 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple, Type
+
+import requests
+
+from .errors import classify_errors
+from .http import HTTPResponse
+
+# failures where the request may never have reached Kraken
+TRANSIENT_EXCEPTIONS: Tuple[Type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+# private endpoints that only read state, so they can be sent again after any
+# transient failure. Every other private endpoint is only resent when Kraken says it
+# rejected the request without acting on it.
+READ_ONLY_ENDPOINTS = frozenset(
+    {
+        "Balance",
+        "TradeBalance",
+        "OpenOrders",
+        "ClosedOrders",
+        "QueryOrders",
+        "TradeHistory",
+        "QueryTrades",
+        "OpenPositions",
+        "Ledgers",
+        "QueryLedgers",
+        "TradeVolume",
+        "ExportStatus",
+        "RetrieveExport",
+        "GetWebSocketsToken",
+        "DepositMethods",
+        "DepositStatus",
+        "WithdrawInfo",
+        "WithdrawStatus",
+        "Staking/Assets",
+        "Staking/Pending",
+        "Staking/Transactions",
+    }
+)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how often a failed request is sent again.
+
+    Public requests and read only private requests are retried on any transient
+    failure, such as an error status or a body that isn't Kraken's envelope, with
+    exponential backoff and full jitter. Requests that change state are only resent
+    when Kraken reports it rejected them outright (rate limit, invalid nonce, service
+    unavailable), each time with a fresh nonce and signature.
+
+    With `hedge_after`, a public request that has not completed within that many
+    seconds is sent a second time and whichever response arrives first is used.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 5.0
+    hedge_after: Optional[float] = None
+    retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_EXCEPTIONS
+    sleep: Callable[[float], Any] = field(default=time.sleep, repr=False)
+    rand: Callable[[], float] = field(default=random.random, repr=False)
+    hedge_workers: int = 8
+    _executor: Optional[ThreadPoolExecutor] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Seconds to wait after the `attempt`th failure, counting from 0
+        """
+        return self.rand() * min(self.max_delay, self.base_delay * 2**attempt)
+
+    def should_retry(self, errors: List[str], idempotent: bool) -> bool:
+        category = classify_errors(errors)
+        if category is None:
+            return False
+        return category.retryable if idempotent else category.rejected
+
+    def call(self, send: Callable[[], HTTPResponse], idempotent: bool) -> HTTPResponse:
+        attempt = 0
+        while True:
+            last = attempt + 1 >= self.max_attempts
+            try:
+                resp = send()
+            except self.retry_on:
+                if last or not idempotent:
+                    raise
+            else:
+                if last or not self.should_retry(resp.errors, idempotent):
+                    return resp
+            self.sleep(self.backoff(attempt))
+            attempt += 1
+
+    async def acall(
+        self, send: Callable[[], Awaitable[HTTPResponse]], idempotent: bool
+    ) -> HTTPResponse:
+        attempt = 0
+        while True:
+            last = attempt + 1 >= self.max_attempts
+            try:
+                resp = await send()
+            except self.retry_on:
+                if last or not idempotent:
+                    raise
+            else:
+                if last or not self.should_retry(resp.errors, idempotent):
+                    return resp
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.hedge_workers, thread_name_prefix="kraken-hedge"
+                )
+            return self._executor
+
+    def hedged(self, send: Callable[[], HTTPResponse]) -> HTTPResponse:
+        """
+        Sends a GET, and a duplicate if the first is slower than `hedge_after`
+        """
+        if self.hedge_after is None:
+            return send()
+
+        executor = self._get_executor()
+        pending: Set[Future] = {executor.submit(send)}
+        done, pending = wait(pending, timeout=self.hedge_after)
+        if not done:
+            pending.add(executor.submit(send))
+
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    # a request still running finishes in the background
+                    return future.result()
+            if not pending:
+                return done.pop().result()
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    async def ahedged(
+        self, send: Callable[[], Awaitable[HTTPResponse]]
+    ) -> HTTPResponse:
+        if self.hedge_after is None:
+            return await send()
+
+        pending = {asyncio.ensure_future(send())}
+        done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+        if not done:
+            pending.add(asyncio.ensure_future(send()))
+
+        try:
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,139 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from contextlib import contextmanager
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+# struct format characters and the matching numpy dtypes
+_DTYPES = {"d": "<f8", "q": "<i8", "b": "i1"}
+
+
+class RecordFile:
+    """
+    A file of fixed width little endian records that is only ever appended to, apart
+    from truncating or rewriting its tail. Reads go through a read-only memory map,
+    so several processes can scan it without loading it into Python objects.
+    """
+
+    def __init__(self, path: str, fields: List[Tuple[str, str]]):
+        self.path = path
+        self.fields = fields
+        self.struct = struct.Struct("<" + "".join(f for _, f in fields))
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.path) // self.struct.size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, rows: Iterable[Sequence[Any]], sync: bool = True):
+        data = b"".join(self.struct.pack(*row) for row in rows)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def write_at(self, index: int, rows: Iterable[Sequence[Any]], sync: bool = True):
+        """
+        Overwrites records from `index` onwards, extending the file as needed. The file
+        never shrinks, so readers holding a map of it are not cut short.
+        """
+        data = b"".join(self.struct.pack(*row) for row in rows)
+        with open(self.path, "r+b" if os.path.exists(self.path) else "wb") as f:
+            f.seek(index * self.struct.size)
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def truncate(self, records: int):
+        """
+        Drops everything after the first `records` records
+        """
+        if len(self) > records:
+            with open(self.path, "r+b") as f:
+                f.truncate(records * self.struct.size)
+
+    def open_map(self) -> Optional[mmap.mmap]:
+        if len(self) == 0:
+            return None
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def iter_records(self, start: int = 0, stop: Optional[int] = None) -> Iterator:
+        mm = self.open_map()
+        if mm is None:
+            return
+        size = self.struct.size
+        stop = len(mm) // size if stop is None else stop
+        yield from self.struct.iter_unpack(mm[start * size : stop * size])
+
+    def record(self, index: int, mm: Optional[mmap.mmap] = None) -> Tuple:
+        mm = mm or self.open_map()
+        if mm is None:
+            raise IndexError(index)
+        return self.struct.unpack_from(mm, index * self.struct.size)
+
+    def columns(self, start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Returns each field as an array. With NumPy installed these are strided views
+        straight onto the memory map, otherwise they are copied into `array.array`s.
+        """
+        mm = self.open_map()
+        if numpy is not None:
+            dtype = numpy.dtype([(n, _DTYPES[f]) for n, f in self.fields])
+            records = numpy.frombuffer(mm, dtype=dtype) if mm else numpy.empty(0, dtype)
+            return {n: records[n][start:stop] for n, _ in self.fields}
+
+        cols = list(zip(*self.iter_records(start, stop))) or [()] * len(self.fields)
+        return {n: array(f, col) for (n, f), col in zip(self.fields, cols)}
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+@contextmanager
+def atomic_writer(path: str, mode: str = "w") -> Iterator[IO]:
+    """
+    Opens a temporary file that replaces `path` once the block completes, so a crash
+    leaves either the old or the new version in place
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_json(path: str, data: Dict[str, Any]):
+    with atomic_writer(path) as f:
+        json.dump(data, f)
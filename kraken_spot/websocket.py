@@ -0,0 +1,410 @@
+import asyncio
+import inspect
+import json
+import logging
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from .errors import AuthError, ResponseError
+from .http import json_loads
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_URL = "wss://ws.kraken.com"
+PRIVATE_URL = "wss://ws-auth.kraken.com"
+
+PUBLIC_CHANNELS = ("ticker", "ohlc", "trade", "spread", "book")
+PRIVATE_CHANNELS = ("ownTrades", "openOrders")
+
+# tokens must be used within 15 minutes of being issued
+TOKEN_TTL = 14 * 60
+
+Callback = Callable[["Message"], Any]
+Connect = Callable[[str], Awaitable[Any]]
+
+
+@dataclass
+class Message:
+    """
+    A decoded message. `channel` is the subscription name (ticker, book, ownTrades...)
+    or, for events, the event name (systemStatus, subscriptionStatus...).
+    """
+
+    channel: str
+    data: Any
+    pair: Optional[str] = None
+    # for book messages, the book after the update has been applied
+    book: Optional["BookState"] = None
+    sequence: Optional[int] = None
+
+
+@dataclass
+class Subscription:
+    name: str
+    pairs: List[str] = field(default_factory=list)
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def private(self) -> bool:
+        return self.name in PRIVATE_CHANNELS
+
+    def message(self, event: str, token: Optional[str] = None, pairs=None):
+        subscription = {"name": self.name, **self.options}
+        if token:
+            subscription["token"] = token
+        msg: Dict[str, Any] = {"event": event, "subscription": subscription}
+        if pairs or self.pairs:
+            msg["pair"] = list(pairs or self.pairs)
+        return msg
+
+
+def _checksum_field(value: str) -> str:
+    return value.replace(".", "").lstrip("0")
+
+
+class BookState:
+    """
+    A book maintained from the book channel's snapshot and updates. Kraken sends a
+    CRC32 checksum of the top ten levels with each update, which `checksum` must match
+    for the local copy to be in sync.
+    """
+
+    def __init__(self, depth: int = 10):
+        self.depth = depth
+        # price -> (price, volume) as the exact strings received, which the checksum
+        # is computed over
+        self.asks: Dict[float, Tuple[str, str]] = {}
+        self.bids: Dict[float, Tuple[str, str]] = {}
+
+    def _apply(self, side: Dict[float, Tuple[str, str]], levels, reverse: bool):
+        for level in levels:
+            price, volume = level[0], level[1]
+            if float(volume) == 0:
+                side.pop(float(price), None)
+            else:
+                side[float(price)] = (price, volume)
+
+        # levels pushed out of scope are not deleted explicitly by Kraken
+        if len(side) > self.depth:
+            for key in sorted(side, reverse=reverse)[self.depth :]:
+                del side[key]
+
+    def update(self, data: Dict[str, Any]):
+        self._apply(self.asks, data.get("as", data.get("a", [])), reverse=False)
+        self._apply(self.bids, data.get("bs", data.get("b", [])), reverse=True)
+
+    def levels(self, side: str) -> List[Tuple[float, float]]:
+        book, reverse = (self.asks, False) if side == "asks" else (self.bids, True)
+        return [(p, float(book[p][1])) for p in sorted(book, reverse=reverse)]
+
+    def checksum(self) -> int:
+        parts = []
+        for book, reverse in ((self.asks, False), (self.bids, True)):
+            for key in sorted(book, reverse=reverse)[:10]:
+                price, volume = book[key]
+                parts.append(_checksum_field(price) + _checksum_field(volume))
+        return zlib.crc32("".join(parts).encode())
+
+
+def _transport_errors() -> Tuple[Type[BaseException], ...]:
+    """
+    The exceptions that mean the connection failed, after which it is reopened
+    """
+    errors: Tuple[Type[BaseException], ...] = (OSError, EOFError, asyncio.TimeoutError)
+    try:
+        from websockets.exceptions import WebSocketException
+    except ImportError:
+        return errors
+    return errors + (WebSocketException,)
+
+
+async def _websockets_connect(url: str):
+    try:
+        import websockets
+    except ImportError as e:
+        raise ImportError(
+            "WebSocketClient requires websockets: pip install kraken-spot[websocket]"
+        ) from e
+    return await websockets.connect(url)
+
+
+class WebSocketClient:
+    """
+    Streams Kraken's public and private WebSocket channels.
+
+        ws = WebSocketClient(client)
+        ws.subscribe("ticker", ["XBT/USD"], callback=print)
+        ws.subscribe("ownTrades")
+        await ws.run()
+
+    Messages are delivered to callbacks, which may be coroutines, and to anything
+    iterating over the client with `async for`. Connections that drop are reopened
+    with exponential backoff and every subscription is sent again. Private channels
+    use a token from `client.get_websockets_token`, refreshed before it expires.
+
+    `connect` opens a connection to a url and can be replaced to point the client at
+    a local stand-in server. The connection needs async `send`, `recv` and `close`.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        url: str = PUBLIC_URL,
+        private_url: str = PRIVATE_URL,
+        connect: Optional[Connect] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ):
+        self.client = client
+        self.url = url
+        self.private_url = private_url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._connect = connect or _websockets_connect
+        self._subscriptions: List[Subscription] = []
+        self._callbacks: Dict[str, List[Callback]] = {}
+        self._queues: List[asyncio.Queue] = []
+        self._connections: Dict[bool, Any] = {}
+        # public channel id -> (channel name, pair), and books by (channel, pair)
+        self._channels: Dict[int, Tuple[str, str]] = {}
+        self._books: Dict[Tuple[str, str], BookState] = {}
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._closed = False
+        self._running = False
+        # a task per open connection, keyed by whether it is private
+        self._tasks: Dict[bool, asyncio.Future] = {}
+        # subscriptions sent after their connection opened
+        self._sends: Set[asyncio.Future] = set()
+
+    def subscribe(
+        self,
+        name: str,
+        pairs: Optional[List[str]] = None,
+        callback: Optional[Callback] = None,
+        **options,
+    ) -> Optional[asyncio.Future]:
+        """
+        Adds a subscription. Options such as `depth` for book or `interval` for ohlc
+        are passed through to Kraken.
+
+        While the client is running, the subscription is sent straight away and the
+        task sending it is returned. A channel whose connection isn't open yet is sent
+        once it connects, opening it if need be.
+        """
+        if name not in PUBLIC_CHANNELS + PRIVATE_CHANNELS:
+            raise ValueError(f"unknown channel '{name}'")
+
+        subscription = Subscription(name, list(pairs or []), options)
+        self._subscriptions.append(subscription)
+        if callback:
+            self.on(name, callback)
+
+        if not self._running or self._closed:
+            return None
+        conn = self._connections.get(subscription.private)
+        if conn is None:
+            self._open(subscription.private)
+            return None
+        task = asyncio.ensure_future(self._send_subscription(conn, subscription))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+        return task
+
+    def on(self, channel: str, callback: Callback):
+        """
+        Registers a callback for a channel or an event name such as systemStatus
+        """
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    async def run(self):
+        """
+        Connects and streams until `close` is called
+        """
+        self._closed = False
+        self._running = True
+        try:
+            for private in sorted({s.private for s in self._subscriptions} or {False}):
+                self._open(private)
+            # subscribe may open another connection while this waits
+            while self._tasks:
+                done, _ = await asyncio.wait(
+                    set(self._tasks.values()), return_when=asyncio.FIRST_COMPLETED
+                )
+                for private, task in list(self._tasks.items()):
+                    if task in done:
+                        del self._tasks[private]
+                        task.result()
+        finally:
+            self._running = False
+            # a connection that failed stops the others
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+
+    def _open(self, private: bool):
+        """
+        Starts the connection for public or private channels unless it is running
+        """
+        if private not in self._tasks:
+            self._tasks[private] = asyncio.ensure_future(self._run_connection(private))
+
+    async def close(self):
+        self._closed = True
+        for task in list(self._sends):
+            task.cancel()
+        for conn in list(self._connections.values()):
+            await conn.close()
+        self._connections.clear()
+        for queue in self._queues:
+            queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._queues.remove(queue)
+
+    async def _run_connection(self, private: bool):
+        delay = self.reconnect_delay
+        url = self.private_url if private else self.url
+        while not self._closed:
+            conn = None
+            try:
+                conn = await self._connect(url)
+                self._connections[private] = conn
+                for subscription in self._subscriptions:
+                    if subscription.private == private:
+                        await self._send_subscription(conn, subscription)
+                delay = self.reconnect_delay
+
+                while not self._closed:
+                    await self._dispatch(json_loads(await conn.recv()), conn)
+            except _transport_errors() as e:
+                if self._closed:
+                    return
+                logger.warning("connection to %s lost, reconnecting: %r", url, e)
+                self._drop_state(private)
+                await self._close_connection(private, conn)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                await self._close_connection(private, conn)
+
+    async def _close_connection(self, private: bool, conn):
+        """
+        Closes a connection unless `close` already has
+        """
+        if conn is None or self._connections.get(private) is not conn:
+            return
+        del self._connections[private]
+        try:
+            await conn.close()
+        except _transport_errors():
+            pass
+
+    def _drop_state(self, private: bool):
+        if not private:
+            self._channels.clear()
+            self._books.clear()
+
+    async def _token_for(self, subscription: Subscription) -> Optional[str]:
+        if not subscription.private:
+            return None
+        if self._token and time.monotonic() < self._token_expires:
+            return self._token
+        if self.client is None:
+            raise AuthError("private channels need a client to fetch a token with")
+
+        # a synchronous client's request would block the event loop, so it is made on
+        # a worker thread. An async client's returns a coroutine to await here.
+        loop = asyncio.get_event_loop()
+        resp = await loop.run_in_executor(None, self.client.get_websockets_token)
+        if inspect.isawaitable(resp):
+            resp = await resp
+        if not resp.ok:
+            raise ResponseError(resp.errors)
+
+        self._token = resp.result["token"]
+        self._token_expires = time.monotonic() + TOKEN_TTL
+        return self._token
+
+    async def _send_subscription(
+        self, conn, subscription: Subscription, event: str = "subscribe", pairs=None
+    ):
+        token = await self._token_for(subscription)
+        await conn.send(json.dumps(subscription.message(event, token, pairs)))
+
+    async def _resubscribe_book(self, conn, channel: str, pair: str):
+        """
+        Fetches a fresh snapshot for a book that has fallen out of sync
+        """
+        self._books.pop((channel, pair), None)
+        for subscription in self._subscriptions:
+            if subscription.name == "book" and pair in subscription.pairs:
+                await self._send_subscription(conn, subscription, "unsubscribe", [pair])
+                await self._send_subscription(conn, subscription, "subscribe", [pair])
+
+    async def _dispatch(self, msg: Any, conn):
+        if isinstance(msg, dict):
+            event = msg.get("event")
+            if event == "subscriptionStatus" and msg.get("status") == "subscribed":
+                if "channelID" in msg:
+                    self._channels[msg["channelID"]] = (msg["channelName"], msg["pair"])
+            if event and event != "heartbeat":
+                await self._deliver(Message(event, msg))
+            return
+
+        # private channels: [data, channelName, {"sequence": n}]
+        if isinstance(msg[1], str):
+            sequence = msg[2].get("sequence") if len(msg) > 2 else None
+            await self._deliver(Message(msg[1], msg[0], sequence=sequence))
+            return
+
+        # public channels: [channelID, data..., channelName, pair]
+        channel, pair = msg[-2], msg[-1]
+        name = channel.split("-")[0]
+        if name != "book":
+            await self._deliver(Message(name, msg[1], pair))
+            return
+
+        data: Dict[str, Any] = {}
+        for part in msg[1:-2]:
+            data.update(part)
+
+        book = self._books.get((channel, pair))
+        if "as" in data or "bs" in data:
+            book = BookState(int(channel.split("-")[1]))
+            self._books[(channel, pair)] = book
+        elif book is None:
+            return
+
+        book.update(data)
+        if "c" in data and int(data["c"]) != book.checksum():
+            await self._resubscribe_book(conn, channel, pair)
+            return
+
+        await self._deliver(Message(name, data, pair, book=book))
+
+    async def _deliver(self, message: Message):
+        # a failing callback is logged, it does not drop the connection
+        for callback in self._callbacks.get(message.channel, []):
+            try:
+                result = callback(message)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("%s callback %r failed", message.channel, callback)
+        for queue in self._queues:
+            queue.put_nowait(message)
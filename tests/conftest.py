@@ -0,0 +1,21 @@
+from unittest.mock import patch
+
+import pytest
+
+from kraken_spot import columnar, storage
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request):
+    """
+    Runs a test with NumPy, skipped when it isn't installed, and with the array
+    module fallback
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield request.param
+    else:
+        with patch.object(columnar, "numpy", None), patch.object(
+            storage, "numpy", None
+        ):
+            yield request.param
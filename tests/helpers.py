@@ -0,0 +1,133 @@
+"""
+Fakes and helpers shared by the test modules
+"""
+
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from kraken_spot.http import HTTPResponse, JSONDecoder
+from kraken_spot.instrumentation import RequestTiming
+
+# (url, params or body, headers) -> response
+Responder = Callable[[str, Any, Optional[Dict[str, str]]], HTTPResponse]
+
+
+def form(body: bytes) -> Dict[str, str]:
+    """
+    Decodes a form encoded request body
+    """
+    return dict(urllib.parse.parse_qsl(body.decode(), keep_blank_values=True))
+
+
+class FakeClock:
+    """
+    A clock that only moves when `now` is set
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _echo_url(url: str, data: Any, headers: Optional[Dict[str, str]]) -> HTTPResponse:
+    return HTTPResponse(200, {"error": [], "result": {"url": url}})
+
+
+class FakeAsyncTransport:
+    """
+    Stands in for AsyncTransport. Every request is recorded in `calls` and answered
+    by `respond`, by default with the URL it was sent to as the result.
+    """
+
+    def __init__(self, respond: Responder = _echo_url):
+        self.respond = respond
+        self.calls: List[Tuple[str, str, Any, Optional[Dict[str, str]]]] = []
+        self.closed = False
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        decoder: Optional[JSONDecoder] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> HTTPResponse:
+        self.calls.append(("GET", url, params, None))
+        return self.respond(url, params, None)
+
+    async def post(
+        self,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        decoder: Optional[JSONDecoder] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> HTTPResponse:
+        self.calls.append(("POST", url, body, headers))
+        return self.respond(url, body, headers)
+
+    async def close(self):
+        self.closed = True
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers requests with the Kraken envelope from `envelope`: by default the path
+    of a GET or the form data of a POST. The address of every connection is added to
+    the server's `peers`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.peers.add(self.client_address)  # type: ignore
+
+    def envelope(self, data: str) -> Dict[str, Any]:
+        if self.command == "POST":
+            return {"error": [], "result": {"data": data}}
+        return {"error": [], "result": {"path": self.path}}
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length).decode()
+        body = json.dumps(self.envelope(data)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer:
+    """
+    Serves `handler` on a free local port from a background thread
+    """
+
+    def __init__(self, handler: Type[StandInHandler] = StandInHandler):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.peers = set()  # type: ignore
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def peers(self) -> set:
+        return self._server.peers  # type: ignore
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from helpers import FakeAsyncTransport, form
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.errors import AuthError
+
+
+class TestAsyncClient:
+    def setup_method(self):
+        self.transport = FakeAsyncTransport()
+        self.client = AsyncClient(
+            api_key="key",
+            private_key="YYNDDLLL+PTEE6EJE2HEEERN8sQUwl2J2CQ/YEREUVVaa3W8aaBEE6xF3DUoFnwjMHDfbOEoB00ERREAXEE1EQ==",
+            transport=self.transport,
+        )
+
+    def test_public_endpoint_is_a_coroutine(self):
+        resp = asyncio.run(self.client.get_ticker_information("XBTUSD"))
+
+        method, url, params, _ = self.transport.calls[0]
+        assert "GET" == method
+        assert "https://api.kraken.com/0/public/Ticker" == url
+        assert {"pair": "XBTUSD"} == params
+        assert resp.ok
+
+    def test_private_endpoint_is_signed(self):
+        asyncio.run(self.client.get_ledgers(asset="XBT", ofs=50))
+
+        method, url, encoded, headers = self.transport.calls[0]
+        body = form(encoded)
+        assert "POST" == method
+        assert "https://api.kraken.com/0/private/Ledgers" == url
+        assert "XBT" == body["asset"]
+        assert "50" == body["ofs"]
+        assert "nonce" in body
+        assert "key" == headers["API-Key"]
+        assert "API-Sign" in headers
+
+    def test_requests_run_concurrently(self):
+        async def run():
+            return await asyncio.gather(
+                *[self.client.get_order_book(p) for p in ("XBTUSD", "ETHUSD")]
+            )
+
+        responses = asyncio.run(run())
+        assert 2 == len(responses)
+        assert 2 == len(self.transport.calls)
+
+    def test_api_keys_must_be_set(self):
+        client = AsyncClient(transport=self.transport)
+        with pytest.raises(AuthError):
+            asyncio.run(client.get_account_balance())
@@ -1,6 +1,14 @@
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from time import sleep
+from unittest.mock import patch
 
-from kraken_spot.auth import generate_nonce, get_kraken_signature
+from kraken_spot.auth import (
+    NonceGenerator,
+    Signer,
+    generate_nonce,
+    get_kraken_signature,
+)
 from kraken_spot.errors import AuthError
 
 
@@ -18,3 +26,82 @@ def test_get_kraken_signature_requires_nonce():
     except AuthError as e:
         assert True
         assert "nonce" in str(e)
+
+
+def test_generate_nonce_is_unique_across_threads():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        nonces = list(pool.map(lambda _: generate_nonce(), range(10_000)))
+
+    assert len(nonces) == len(set(nonces))
+
+
+def test_nonce_generator_never_goes_backwards():
+    generator = NonceGenerator()
+    nonce_1 = generator()
+    with patch("kraken_spot.auth.time.time_ns", return_value=nonce_1 - 1_000_000):
+        nonce_2 = generator()
+        nonce_3 = generator()
+
+    assert nonce_1 < nonce_2 < nonce_3
+
+
+def test_nonce_generator_shares_high_water_mark_through_file(tmp_path):
+    path = str(tmp_path / "nonce")
+    first = NonceGenerator(path)
+    second = NonceGenerator(path)
+
+    with patch("kraken_spot.auth.time.time_ns", return_value=100):
+        assert 100 == first()
+        assert 101 == second()
+        assert 102 == first()
+
+        # a restarted process carries on from the persisted value
+        assert 103 == NonceGenerator(path)()
+
+
+def test_nonce_generator_is_unique_across_processes(tmp_path):
+    path = str(tmp_path / "nonce")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        batches = list(pool.map(_allocate_nonces, [path] * 4))
+
+    nonces = [n for batch in batches for n in batch]
+    assert len(nonces) == len(set(nonces))
+
+
+def _allocate_nonces(path: str):
+    generator = NonceGenerator(path)
+    return [generator() for _ in range(500)]
+
+
+# example from https://docs.kraken.com/rest/#section/Authentication/Headers-and-Signature
+EXAMPLE_SECRET = "kQH5HW/8p1uGOVjbgWA7FunAmGO8lsSUXNsu3eow76sz84Q18fWxnyRzBHCd3pd5nE9qa99HAZtuZuj6F1huXg=="
+EXAMPLE_DATA = {
+    "nonce": "1616492376594",
+    "ordertype": "limit",
+    "pair": "XBTUSD",
+    "price": 37500,
+    "type": "buy",
+    "volume": 1.25,
+}
+EXAMPLE_SIGNATURE = "4/dpxb3iT4tp/ZCVEwSnEsLxx0bqyhLpdfOpc6fn7OR8+UClSV5n9E6aSS8MPtnRfp32bAb0nmbRn6H8ndwLUQ=="
+
+
+def test_get_kraken_signature():
+    signature = get_kraken_signature(
+        "/0/private/AddOrder", EXAMPLE_DATA, EXAMPLE_SECRET
+    )
+    assert EXAMPLE_SIGNATURE == signature
+
+
+def test_signer_matches_get_kraken_signature():
+    signer = Signer(EXAMPLE_SECRET)
+    encoded = urllib.parse.urlencode(EXAMPLE_DATA)
+
+    for post_data in (EXAMPLE_DATA, encoded, encoded.encode()):
+        signature = signer.sign("/0/private/AddOrder", "1616492376594", post_data)
+        assert EXAMPLE_SIGNATURE == signature
+
+    # the cached key schedule is not consumed by signing
+    assert EXAMPLE_SIGNATURE == signer.sign(
+        "/0/private/AddOrder", "1616492376594", encoded
+    )
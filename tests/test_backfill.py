@@ -0,0 +1,109 @@
+import pytest
+
+from kraken_spot.backfill import Backfill, TradeStore
+from kraken_spot.columnar import BUY, SELL
+from kraken_spot.http import KrakenResponse
+
+
+class FakeTradesClient:
+    """
+    Serves 2500 trades per pair, 1000 at a time, like the Trades endpoint
+    """
+
+    def __init__(self, fail_after=None):
+        self.trades = [
+            [
+                f"{100 + i}.0",
+                "0.5",
+                1_600_000_000 + i,
+                "b" if i % 2 else "s",
+                "l",
+                "",
+                i,
+            ]
+            for i in range(2500)
+        ]
+        self.calls = []
+        self.fail_after = fail_after
+
+    def get_recent_trades(self, pair, since=None):
+        self.calls.append((pair, since))
+        if self.fail_after is not None and len(self.calls) > self.fail_after:
+            return KrakenResponse(errors=["EService:Unavailable"])
+
+        since = since or 0
+        rows = [t for t in self.trades if t[2] * 1e9 > since][:1000]
+        last = int(rows[-1][2] * 1e9) if rows else since
+        return KrakenResponse({"X" + pair: rows, "last": str(last)})
+
+
+def test_backfill_pairs_concurrently(tmp_path, backend):
+    store = TradeStore(str(tmp_path))
+    statuses = Backfill(FakeTradesClient(), store, min_interval=0).run(["A", "B"])
+
+    assert {"A", "B"} == set(statuses)
+    assert all(s.records == 2500 and s.error is None for s in statuses.values())
+
+    cols = store.columns("A")
+    assert 2500 == len(cols)
+    assert 100.0 == cols.price[0]
+    assert [SELL, BUY] == list(cols.side[:2])
+    assert 2499 == cols.trade_id[-1]
+    assert int(1_600_002_499 * 1e9) == cols.last
+
+
+def test_workers_share_one_request_rate(tmp_path):
+    backfill = Backfill(FakeTradesClient(), TradeStore(str(tmp_path)), max_workers=4)
+    waits = []
+    backfill.pacer._sleep = waits.append
+
+    backfill.run(["A", "B", "C", "D"])
+
+    # 16 requests, one second apart in total rather than per pair
+    assert 15 == len(waits)
+    assert 15.0 == pytest.approx(max(waits), abs=0.5)
+
+
+def test_backfill_stops_at_until(tmp_path):
+    store = TradeStore(str(tmp_path))
+    until = int(1_600_001_500 * 1e9)
+    status = Backfill(FakeTradesClient(), store, min_interval=0).backfill_pair(
+        "A", until=until
+    )
+
+    assert 1500 == status.records == store.count("A")
+    assert until - 1 == store.checkpoint("A")["last"]
+
+
+def test_backfill_resumes_from_checkpoint(tmp_path):
+    store = TradeStore(str(tmp_path))
+    status = Backfill(FakeTradesClient(fail_after=1), store, min_interval=0).run(["A"])[
+        "A"
+    ]
+
+    assert "EService:Unavailable" in status.error
+    assert 1000 == store.count("A")
+
+    client = FakeTradesClient()
+    status = Backfill(client, store, min_interval=0).backfill_pair("A")
+
+    assert 1500 == status.records
+    assert 2500 == store.count("A")
+    assert int(1_600_000_999 * 1e9) == client.calls[0][1]
+
+
+def test_recover_drops_records_written_after_checkpoint(tmp_path):
+    store = TradeStore(str(tmp_path))
+    client = FakeTradesClient()
+    store.append("A", client.trades[:10], 10)
+
+    # a crash between appending and checkpointing leaves extra records behind
+    store._file("A").append([(1.0, 1.0, 1.0, 1, 1, 1)] * 3)
+    assert 13 == store.count("A")
+
+    store.recover("A")
+    assert 10 == store.count("A")
+
+
+def test_empty_store(tmp_path, backend):
+    assert 0 == len(TradeStore(str(tmp_path)).columns("A"))
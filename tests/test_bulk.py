@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import requests
+from helpers import FakeAsyncTransport
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.bulk import MAX_URL_LENGTH, chunk_pairs
+from kraken_spot.client import Client
+from kraken_spot.http import HTTPResponse
+
+BAD_PAIR = "NOPE"
+
+
+def _fake_get(url, params=None, transport=None, decoder=None, timing=None):
+    pairs = params["pair"].split(",")
+    if BAD_PAIR in pairs:
+        return HTTPResponse(200, {"error": ["EQuery:Unknown asset pair"]})
+    return HTTPResponse(200, {"error": [], "result": {p: {"url": url} for p in pairs}})
+
+
+def test_chunk_pairs_respects_url_length():
+    base_url = "https://api.kraken.com/0/public/Ticker"
+    pairs = [f"PAIR{i:04d}" for i in range(300)]
+    chunks = chunk_pairs(pairs, base_url, max_url_length=200)
+
+    assert pairs == [p for chunk in chunks for p in chunk]
+    for chunk in chunks:
+        query = "%2C".join(chunk)
+        assert len(f"{base_url}?pair={query}") <= 200
+
+
+def test_chunk_pairs_leaves_room_for_other_params():
+    base_url = "https://api.kraken.com/0/public/AssetPairs"
+    pairs = [f"PAIR{i:04d}" for i in range(300)]
+    params = {"info": "leverage", "count": None}
+    chunks = chunk_pairs(pairs, base_url, max_url_length=200, params=params)
+
+    for chunk in chunks:
+        query = "%2C".join(chunk)
+        assert len(f"{base_url}?info=leverage&pair={query}") <= 200
+    assert chunks == chunk_pairs(pairs, base_url, 200 - len("info=leverage&"))
+
+
+def test_chunk_pairs_keeps_oversized_pair_on_its_own():
+    assert [["A" * 50], ["B"]] == chunk_pairs(["A" * 50, "B"], "", max_url_length=20)
+
+
+class TestBulkMarketData:
+    def setup_class(self):
+        self.client = Client()
+
+    @patch("kraken_spot.public.http_get", side_effect=_fake_get)
+    def test_ticker_information_is_comma_joined(self, mock_get):
+        pairs = [f"PAIR{i:04d}" for i in range(300)]
+        resp = self.client.get_ticker_information_bulk(pairs, max_url_length=500)
+
+        assert resp.ok
+        assert set(pairs) == set(resp.result)
+        assert len(pairs) > mock_get.call_count > 1
+
+    @patch("kraken_spot.public.http_get", side_effect=_fake_get)
+    def test_urls_with_other_params_fit_the_limit(self, mock_get):
+        pairs = [f"PAIR{i:04d}" for i in range(500)]
+        self.client.get_tradable_asset_pairs_bulk(pairs, info="leverage")
+
+        for (url, params), _ in mock_get.call_args_list:
+            assert len(requests.Request("GET", url, params=params).prepare().url) <= (
+                MAX_URL_LENGTH
+            )
+
+    @patch("kraken_spot.public.http_get", side_effect=_fake_get)
+    def test_failed_chunk_is_reported_per_pair(self, mock_get):
+        resp = self.client.get_tradable_asset_pairs_bulk(["A", BAD_PAIR, "B"])
+
+        assert {"A", "B"} == set(resp.result)
+        assert {BAD_PAIR: ["EQuery:Unknown asset pair"]} == resp.errors
+        assert "AssetPairs" in mock_get.call_args[0][0]
+
+    @patch("kraken_spot.public.http_get")
+    def test_chunk_is_only_split_for_invalid_pairs(self, mock_get):
+        mock_get.return_value = HTTPResponse(200, {"error": ["EService:Unavailable"]})
+        resp = self.client.get_ticker_information_bulk(["A", "B", "C"])
+
+        assert 1 == mock_get.call_count
+        assert {p: ["EService:Unavailable"] for p in "ABC"} == resp.errors
+
+    @patch("kraken_spot.public.http_get", side_effect=_fake_get)
+    def test_order_book_is_one_request_per_pair(self, mock_get):
+        resp = self.client.get_order_book_bulk(["A", "B", BAD_PAIR], count=10)
+
+        assert 3 == mock_get.call_count
+        assert {"A", "B"} == set(resp.result)
+        assert [BAD_PAIR] == list(resp.errors)
+        assert all(c[0][1]["count"] == "10" for c in mock_get.call_args_list)
+
+    @patch("kraken_spot.public.http_get", side_effect=_fake_get)
+    def test_ohlc_and_trades(self, mock_get):
+        ohlc = self.client.get_ohlc_data_bulk(["A", "B"], interval=5)
+        trades = self.client.get_recent_trades_bulk(["A", "B"], since=1)
+
+        assert {"A", "B"} == set(ohlc.result) == set(trades.result)
+        assert "Trades" in mock_get.call_args[0][0]
+
+    @patch("kraken_spot.public.http_get", side_effect=ConnectionError("down"))
+    def test_transport_errors_are_reported_per_pair(self, mock_get):
+        resp = self.client.get_order_book_bulk(["A"])
+
+        assert ["ConnectionError: down"] == resp.errors["A"]
+
+    @patch("kraken_spot.public.http_get", side_effect=TypeError("bug"))
+    def test_other_exceptions_are_raised(self, mock_get):
+        with pytest.raises(TypeError):
+            self.client.get_order_book_bulk(["A"])
+
+
+def test_async_client_bulk_query():
+    client = AsyncClient(transport=FakeAsyncTransport(_fake_get))
+    resp = asyncio.run(client.get_ticker_information_bulk(["A", BAD_PAIR, "B"]))
+
+    assert {"A", "B"} == set(resp.result)
+    assert [BAD_PAIR] == list(resp.errors)
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from helpers import FakeClock
+
+from kraken_spot.cache import ResponseCache
+from kraken_spot.client import Client
+from kraken_spot.http import HTTPResponse, KrakenResponse
+
+
+class TestResponseCache:
+    def setup_method(self):
+        self.clock = FakeClock(1000.0)
+        self.cache = ResponseCache({"Assets": 60}, max_entries=2, clock=self.clock)
+
+    def test_entries_expire(self):
+        self.cache.put("Assets", None, KrakenResponse({"XXBT": {}}))
+        assert {"XXBT": {}} == self.cache.get("Assets").result
+
+        self.clock.now += 61
+        assert self.cache.get("Assets") is None
+        assert (1, 1) == (self.cache.hits, self.cache.misses)
+
+    def test_only_successful_responses_for_known_endpoints(self):
+        self.cache.put("Assets", None, KrakenResponse(errors=["EGeneral:Invalid"]))
+        self.cache.put("Ticker", None, KrakenResponse({"a": 1}))
+
+        assert 0 == len(self.cache)
+        assert self.cache.get("Ticker") is None
+
+    def test_least_recently_used_is_evicted(self):
+        for asset in ("A", "B"):
+            self.cache.put("Assets", {"asset": asset}, KrakenResponse({asset: 1}))
+        self.cache.get("Assets", {"asset": "A"})
+        self.cache.put("Assets", {"asset": "C"}, KrakenResponse({"C": 1}))
+
+        assert self.cache.get("Assets", {"asset": "B"}) is None
+        assert self.cache.get("Assets", {"asset": "A"}) is not None
+
+    def test_invalidate(self):
+        cache = ResponseCache(clock=self.clock)
+        cache.put("Assets", None, KrakenResponse({"a": 1}))
+        cache.put("SystemStatus", None, KrakenResponse({"status": "online"}))
+
+        cache.invalidate("Assets")
+        assert cache.get("Assets") is None
+        assert cache.get("SystemStatus") is not None
+
+        cache.invalidate()
+        assert 0 == len(cache)
+
+    def test_persisted_to_disk(self, tmp_path):
+        path = str(tmp_path / "cache.json")
+        cache = ResponseCache(path=path, clock=self.clock)
+        cache.put("AssetPairs", {"pair": "XBTUSD"}, KrakenResponse({"XXBTZUSD": {}}))
+
+        warm = ResponseCache(path=path, clock=self.clock)
+        assert {"XXBTZUSD": {}} == warm.get("AssetPairs", {"pair": "XBTUSD"}).result
+
+        self.clock.now += 3601
+        assert 0 == len(ResponseCache(path=path, clock=self.clock))
+
+
+@patch("kraken_spot.public.http_get")
+def test_client_serves_cached_responses(mock_get):
+    mock_get.return_value = HTTPResponse(200, {"error": [], "result": {"XXBT": {}}})
+    client = Client(response_cache=ResponseCache())
+
+    client.get_asset_info("XBT")
+    resp = client.get_asset_info("XBT")
+    client.get_server_time()
+    client.get_server_time()
+
+    assert {"XXBT": {}} == resp.result
+    assert 3 == mock_get.call_count
+    assert 1 == client.response_cache.hits
@@ -0,0 +1,77 @@
+from array import array
+from unittest.mock import patch
+
+from kraken_spot.client import Client
+from kraken_spot.columnar import BUY, LIMIT, MARKET, SELL, OHLCColumns, TradeColumns
+from kraken_spot.http import HTTPResponse
+
+OHLC_ROWS = [
+    [1688671200, "30306.1", "30306.2", "30305.7", "30305.7", "30306.1", "3.39", 23],
+    [1688671260, "30305.7", "30310.0", "30305.7", "30309.9", "30307.4", "1.50", 7],
+]
+TRADE_ROWS = [
+    ["30243.40000", "0.34507674", 1688669597.8277369, "b", "m", "", 61044952],
+    ["30243.30000", "0.00376960", 1688669598.2804112, "s", "l", "", 61044953],
+]
+
+
+def test_ohlc_columns(backend):
+    cols = OHLCColumns.from_rows(OHLC_ROWS, last=1688671260)
+
+    assert 2 == len(cols)
+    assert [1688671200, 1688671260] == list(cols.time)
+    assert [30305.7, 30309.9] == list(cols.close)
+    assert [23, 7] == list(cols.count)
+    assert 1688671260 == cols.last
+    if backend == "array":
+        assert isinstance(cols.volume, array)
+
+
+def test_trade_columns(backend):
+    cols = TradeColumns.from_rows(TRADE_ROWS)
+
+    assert [30243.4, 30243.3] == list(cols.price)
+    assert [BUY, SELL] == list(cols.side)
+    assert [MARKET, LIMIT] == list(cols.order_type)
+    assert [61044952, 61044953] == list(cols.trade_id)
+
+
+def test_empty_rows(backend):
+    assert 0 == len(OHLCColumns.from_rows([]))
+    assert 0 == len(TradeColumns.from_rows([]))
+
+
+class TestColumnarEndpoints:
+    def setup_class(self):
+        self.client = Client()
+
+    @patch("kraken_spot.public.http_get")
+    def test_get_ohlc_data_columnar(self, mock_get):
+        result = {"XXBTZUSD": OHLC_ROWS, "last": 1688671260}
+        mock_get.return_value = HTTPResponse(200, {"error": [], "result": result})
+
+        resp = self.client.get_ohlc_data("XBTUSD", columnar=True)
+
+        assert 1688671260 == resp.result["last"]
+        assert isinstance(resp.result["XXBTZUSD"], OHLCColumns)
+        assert 1688671260 == resp.result["XXBTZUSD"].last
+
+    @patch("kraken_spot.public.http_get")
+    def test_get_recent_trades_columnar(self, mock_get):
+        result = {"XXBTZUSD": TRADE_ROWS, "last": "1688669598280411170"}
+        mock_get.return_value = HTTPResponse(200, {"error": [], "result": result})
+
+        resp = self.client.get_recent_trades("XBTUSD", columnar=True)
+
+        assert 1688669598280411170 == resp.result["XXBTZUSD"].last
+        assert 2 == len(resp.result["XXBTZUSD"])
+
+    @patch("kraken_spot.public.http_get")
+    def test_errors_are_not_transformed(self, mock_get):
+        errors = ["EQuery:Unknown asset pair"]
+        mock_get.return_value = HTTPResponse(200, {"error": errors})
+
+        resp = self.client.get_recent_trades("NOPE", columnar=True)
+
+        assert errors == resp.errors
+        assert {} == resp.result
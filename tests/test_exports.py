@@ -0,0 +1,229 @@
+import asyncio
+import io
+import os
+import zipfile
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.client import Client
+from kraken_spot.errors import ExportError, ResponseError
+from kraken_spot.exports import (
+    ReportExport,
+    acopy_export,
+    copy_export,
+    export_status,
+    iter_export_rows,
+)
+from kraken_spot.http import KrakenResponse
+
+SECRET = "YYNDDLLL+PTEE6EJE2HEEERN8sQUwl2J2CQ/YEREUVVaa3W8aaBEE6xF3DUoFnwjMHDfbOEoB00ERREAXEE1EQ=="
+
+LEDGER_CSV = (
+    '"txid","refid","time","type","asset","amount"\n'
+    '"L1","R1","2023-01-01 00:00:00","deposit","XXBT","1.5"\n'
+    '"L2","R2","2023-01-02 00:00:00","trade","ZUSD","-100"\n'
+)
+
+
+def _archive(name: str = "ledgers.csv", text: str = LEDGER_CSV) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, text)
+    return buf.getvalue()
+
+
+def _chunks(data: bytes, size: int = 7) -> List[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_copy_export_writes_the_archive():
+    out = io.BytesIO()
+    archive = _archive()
+
+    assert [] == copy_export(_chunks(archive), out)
+    assert archive == out.getvalue()
+
+
+def test_copy_export_returns_kraken_errors():
+    out = io.BytesIO()
+    errors = copy_export([b'{"error":["EGeneral:Invalid ', b'arguments"]}'], out)
+
+    assert ["EGeneral:Invalid arguments"] == errors
+    assert b"" == out.getvalue()
+
+
+def test_copy_export_handles_a_split_signature():
+    archive = _archive()
+    out = io.BytesIO()
+    assert [] == copy_export(iter(_chunks(archive, 1)), out)
+    assert archive == out.getvalue()
+
+    errors = copy_export(iter([b"P", b"", b"<html>"]), io.BytesIO())
+    assert ["EGeneral:Export download was not a zip archive"] == errors
+    assert ["EGeneral:Export download was not a zip archive"] == copy_export(
+        [], io.BytesIO()
+    )
+
+
+def test_acopy_export_handles_a_split_signature():
+    async def chunks(data: bytes):
+        for chunk in _chunks(data, 1):
+            yield chunk
+
+    archive = _archive()
+    out = io.BytesIO()
+    assert [] == asyncio.run(acopy_export(chunks(archive), out))
+    assert archive == out.getvalue()
+
+    errors = asyncio.run(acopy_export(chunks(b"<html>"), io.BytesIO()))
+    assert ["EGeneral:Export download was not a zip archive"] == errors
+
+
+def test_export_status():
+    result = [
+        {"id": "A", "status": "Processing", "flags": ""},
+        {"id": "B", "status": "Processed", "flags": "cancelled"},
+    ]
+
+    assert "Processing" == export_status(result, "A")["status"]
+    with pytest.raises(ExportError):
+        export_status(result, "B")
+    with pytest.raises(ExportError):
+        export_status(result, "C")
+
+
+def test_iter_export_rows(tmp_path):
+    path = tmp_path / "ledgers.zip"
+    path.write_bytes(_archive())
+
+    rows = iter_export_rows(str(path))
+
+    assert {"txid": "L1", "asset": "XXBT", "amount": "1.5"}.items() <= next(
+        rows
+    ).items()
+    assert ["L2"] == [row["txid"] for row in rows]
+
+
+def test_iter_export_rows_reads_tsv(tmp_path):
+    path = tmp_path / "trades.zip"
+    path.write_bytes(_archive("trades.tsv", "txid\tpair\nT1\tXXBTZUSD\n"))
+
+    assert [{"txid": "T1", "pair": "XXBTZUSD"}] == list(iter_export_rows(str(path)))
+
+
+class FakeExportClient:
+    def __init__(self, statuses: List[str]):
+        self.statuses = statuses
+        self.downloaded = None
+
+    def request_export_report(self, report, description, **options):
+        self.requested = (report, description, options)
+        return KrakenResponse({"id": "R1"}, [])
+
+    def get_export_status(self, report):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        return KrakenResponse([{"id": "R1", "status": status, "flags": ""}], [])
+
+    def download_data_export(self, report_id, path, chunk_size):
+        self.downloaded = (report_id, path)
+        return path
+
+
+class TestReportExport:
+    def test_run_polls_with_backoff(self):
+        client = FakeExportClient(["Queued", "Processing", "Processing", "Processed"])
+        sleeps: List[float] = []
+        export = ReportExport(
+            client, poll_interval=1, max_interval=3, sleep=sleeps.append
+        )
+
+        path = export.run("ledgers", "all", "out.zip", start_tm=1)
+
+        assert "out.zip" == path
+        assert ("ledgers", "all", {"start_tm": 1}) == client.requested
+        assert ("R1", "out.zip") == client.downloaded
+        assert [1, 2, 3] == sleeps
+
+    def test_wait_times_out(self):
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        export = ReportExport(
+            FakeExportClient(["Queued"]), timeout=10, sleep=sleep, clock=lambda: now[0]
+        )
+
+        with pytest.raises(ExportError):
+            export.wait("ledgers", "R1")
+        assert now[0] <= 10
+
+    def test_request_errors_are_raised(self):
+        client = MagicMock()
+        client.request_export_report.return_value = KrakenResponse(
+            errors=["EGeneral:Invalid arguments"]
+        )
+
+        with pytest.raises(ResponseError):
+            ReportExport(client).run("ledgers", "all", "out.zip")
+
+
+class TestDownload:
+    def setup_method(self):
+        self.client = Client(api_key="key", private_key=SECRET)
+
+    def _post(self, body: bytes):
+        response = MagicMock()
+        response.iter_content.side_effect = lambda size: _chunks(body, size)
+        return patch.object(self.client.transport, "post", return_value=response)
+
+    def test_download_streams_to_disk(self, tmp_path):
+        path = str(tmp_path / "export.zip")
+        archive = _archive()
+
+        with self._post(archive) as post:
+            assert path == self.client.download_data_export("R1", path, chunk_size=16)
+
+        assert post.call_args[0][0].endswith("RetrieveExport")
+        assert archive == open(path, "rb").read()
+        assert ["L1", "L2"] == [row["txid"] for row in iter_export_rows(path)]
+
+    def test_failed_download_leaves_no_file(self, tmp_path):
+        path = str(tmp_path / "export.zip")
+
+        with self._post(b'{"error":["EGeneral:Unknown report"]}'):
+            with pytest.raises(ResponseError):
+                self.client.download_data_export("R1", path)
+
+        assert [] == os.listdir(tmp_path)
+
+
+def test_async_download(tmp_path):
+    archive = _archive()
+
+    class Content:
+        async def iter_chunked(self, size):
+            for chunk in _chunks(archive, size):
+                yield chunk
+
+    class Stream:
+        content = Content()
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+    transport = MagicMock()
+    transport.stream_post.return_value = Stream()
+    client = AsyncClient(api_key="key", private_key=SECRET, transport=transport)
+    path = str(tmp_path / "export.zip")
+
+    asyncio.run(client.download_data_export("R1", path, chunk_size=32))
+
+    assert transport.stream_post.call_args[0][0].endswith("RetrieveExport")
+    assert archive == open(path, "rb").read()
@@ -0,0 +1,143 @@
+import json
+import threading
+
+import pytest
+
+from kraken_spot.errors import ParameterError, ResponseError
+from kraken_spot.history import HistorySync, time_windows
+
+DAY = 86400
+
+
+class FakeHistoryClient:
+    """
+    Serves history up to `end` and records the windows asked for. Records from the
+    day before `start` are returned too, so every window overlaps the one before.
+    """
+
+    def __init__(self):
+        self.ledgers = {
+            "L1": {"time": 1.5 * DAY, "asset": "XXBT", "amount": "1"},
+            "L2": {"time": 4 * DAY, "asset": "ZUSD", "amount": "-5"},
+        }
+        self.trades = {
+            "T1": {"time": 2 * DAY, "pair": "XXBTZUSD", "vol": "1"},
+            "T2": {"time": 5.5 * DAY, "pair": "XETHZUSD", "vol": "2"},
+        }
+        self.closed = {
+            "O1": {"closetm": 3 * DAY, "descr": {"pair": "XBTUSD"}, "status": "closed"}
+        }
+        self.calls = []
+        self.fail_at = None
+        self._lock = threading.Lock()
+
+    def _filter(self, name, records, start, end, key="time"):
+        with self._lock:
+            self.calls.append((name, start, end))
+        if self.fail_at is not None and start <= self.fail_at < end:
+            raise ResponseError(["EService:Unavailable"])
+        return [(k, v) for k, v in records.items() if start - DAY <= v[key] <= end]
+
+    def iter_ledgers(self, start, end, prefetch):
+        return self._filter("ledgers", self.ledgers, start, end)
+
+    def iter_trades_history(self, start, end, prefetch):
+        return self._filter("trades", self.trades, start, end)
+
+    def iter_closed_orders(self, start, end, close_time, prefetch):
+        assert "close" == close_time
+        return self._filter("closed_orders", self.closed, start, end, "closetm")
+
+
+def test_time_windows():
+    assert [(0, 10), (10, 20), (20, 25)] == time_windows(0, 25, 10)
+    assert [] == time_windows(5, 5, 10)
+
+
+class TestHistorySync:
+    def setup_method(self):
+        self.client = FakeHistoryClient()
+        self.now = 6 * DAY
+        self.sync = HistorySync(
+            self.client,
+            ":memory:",
+            window=DAY,
+            max_workers=3,
+            overlap=60,
+            clock=lambda: self.now,
+        )
+
+    def _ids(self, table):
+        return [
+            r[0] for r in self.sync.db.execute(f"SELECT id FROM {table} ORDER BY id")
+        ]
+
+    def test_first_run_backfills_in_windows(self):
+        statuses = self.sync.run(since=0)
+
+        assert all(s.ok for s in statuses.values())
+        assert 6 == statuses["ledgers"].windows
+        assert 18 == len(self.client.calls)
+        assert ["L1", "L2"] == self._ids("ledgers")
+        assert ["T1", "T2"] == self._ids("trades")
+        assert ["O1"] == self._ids("closed_orders")
+        # records returned by more than one window are counted once
+        assert 2 == statuses["trades"].records
+        assert self.now == self.sync.watermark("ledgers")
+
+    def test_columns_are_indexed(self):
+        self.sync.run(since=0)
+
+        row = self.sync.db.execute(
+            "SELECT time, pair, data FROM closed_orders WHERE pair = 'XBTUSD'"
+        ).fetchone()
+        assert 3 * DAY == row[0]
+        assert "closed" == json.loads(row[2])["status"]
+
+        indexes = {r[1] for r in self.sync.db.execute("PRAGMA index_list(ledgers)")}
+        assert {"ledgers_time", "ledgers_asset"} <= indexes
+
+    def test_next_run_starts_from_the_watermark(self):
+        self.sync.run(since=0)
+        self.client.calls.clear()
+        self.client.ledgers["L3"] = {"time": 6.5 * DAY, "asset": "XXBT"}
+        self.now = 7 * DAY
+
+        status = self.sync.sync_stream("ledgers")
+
+        # one day since the last run plus the overlap
+        assert [
+            ("ledgers", 6 * DAY - 60, 7 * DAY - 60),
+            ("ledgers", 7 * DAY - 60, 7 * DAY),
+        ] == sorted(self.client.calls)
+        assert 1 == status.records
+        assert 7 * DAY == self.sync.watermark("ledgers")
+
+    def test_watermark_stops_at_a_failed_window(self):
+        self.client.fail_at = 3.5 * DAY
+
+        status = self.sync.sync_stream("ledgers", since=0)
+
+        assert ["ResponseError: EService:Unavailable"] == status.errors
+        assert 3 * DAY == self.sync.watermark("ledgers")
+        # windows after the failure are still stored and ignored when fetched again
+        assert ["L1", "L2"] == self._ids("ledgers")
+
+    def test_fractional_times_widen_to_whole_seconds(self):
+        self.now = 2 * DAY + 0.25
+
+        self.sync.sync_stream("trades", since=0.75)
+
+        assert [
+            ("trades", 0, DAY),
+            ("trades", DAY, 2 * DAY),
+            ("trades", 2 * DAY, 2 * DAY + 1),
+        ] == sorted(self.client.calls)
+        assert all(type(t) is int for call in self.client.calls for t in call[1:])
+        assert 2 * DAY + 1 == self.sync.watermark("trades")
+        row = self.sync.db.execute("SELECT typeof(time) FROM watermarks").fetchone()
+        assert ("integer",) == row
+
+    def test_unknown_stream(self):
+        with pytest.raises(ParameterError):
+            HistorySync(self.client, ":memory:", streams=["deposits"])
@@ -1,4 +1,16 @@
-from kraken_spot.http import clean_params
+import json
+import urllib.parse
+
+from helpers import StandInServer
+
+from kraken_spot.client import Client
+from kraken_spot.http import (
+    Transport,
+    clean_params,
+    encode_params,
+    http_get,
+    http_post,
+)
 
 
 def test_clean_params_converts_bool_to_str():
@@ -18,3 +30,85 @@ def test_clean_params_removes_none_values():
     o = clean_params({"n": None})
 
     assert {} == o
+
+
+def test_clean_params_keeps_zero_and_one_as_numbers():
+    o = clean_params({"ofs": 0, "userref": 1})
+
+    assert {"ofs": "0", "userref": "1"} == o
+
+
+def test_encode_params_matches_clean_then_urlencode():
+    params = {
+        "nonce": 1616492376594,
+        "ofs": 0,
+        "userref": 1,
+        "validate": True,
+        "trades": False,
+        "price2": None,
+        "pair": "XBT/USD",
+        "orders[0][close][price]": "+5 %",
+        "empty": "",
+    }
+    expected = urllib.parse.urlencode(clean_params(params)).encode()
+
+    assert expected == encode_params(params)
+    assert b"ofs=0&userref=1&validate=true&trades=false" in encode_params(params)
+
+
+class TestTransport:
+    def setup_class(self):
+        self.server = StandInServer()
+        self.url = self.server.url
+
+    def teardown_class(self):
+        self.server.close()
+
+    def test_get_through_transport(self):
+        transport = Transport()
+        resp = http_get(f"{self.url}/x", {"a": "1"}, transport=transport)
+
+        assert 200 == resp.status_code
+        assert "/x?a=1" == resp.body["result"]["path"]
+
+    def test_post_through_transport(self):
+        transport = Transport()
+        resp = http_post(f"{self.url}/y", {"a": "1"}, transport=transport)
+
+        assert "a=1" == resp.body["result"]["data"]
+
+    def test_connection_is_reused(self):
+        transport = Transport()
+        self.server.peers.clear()
+        transport.warm_up(f"{self.url}/")
+        http_get(f"{self.url}/a", transport=transport)
+        http_get(f"{self.url}/b", transport=transport)
+
+        assert 1 == len(self.server.peers)
+
+    def test_client_sends_through_its_transport(self):
+        client = Client(endpoint=self.url, transport=Transport())
+        resp = client.get_server_time()
+
+        assert "/0/public/Time" == resp.result["path"]
+
+    def test_client_decodes_with_its_json_decoder(self):
+        decoded = []
+
+        def decoder(raw: bytes):
+            decoded.append(raw)
+            return json.loads(raw)
+
+        client = Client(endpoint=self.url, transport=Transport(), json_decoder=decoder)
+        resp = client.get_server_time()
+
+        # a successful result is only decoded when it is read
+        assert resp.ok and decoded == []
+        assert "/0/public/Time" == resp.result["path"]
+        assert isinstance(decoded[0], bytes)
+
+    def test_raw_body_is_kept(self):
+        client = Client(endpoint=self.url, transport=Transport())
+        resp = client.get_server_time()
+
+        assert json.loads(resp.raw)["result"] == {"path": "/0/public/Time"}
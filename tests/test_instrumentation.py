@@ -0,0 +1,214 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from helpers import StandInHandler, StandInServer
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.client import Client
+from kraken_spot.errors import ErrorCategory
+from kraken_spot.http import HTTPResponse
+from kraken_spot.instrumentation import (
+    Histogram,
+    Instrument,
+    LatencyHistogram,
+    RequestTiming,
+)
+
+API_KEY = "I1IIIcw+WHHHHaHH2NXnTQaaHIOT1a/Gz+aa8aa4CaaMXUzP43DQHHH8"
+PRIVATE_KEY = "YYNDDLLL+PTEE6EJE2HEEERN8sQUwl2J2CQ/YEREUVVaa3W8aaBEE6xF3DUoFnwjMHDfbOEoB00ERREAXEE1EQ=="
+
+
+class _Recorder(Instrument):
+    def __init__(self):
+        self.started = []
+        self.timings = []
+
+    def before_request(self, endpoint):
+        self.started.append(endpoint)
+
+    def after_request(self, timing):
+        self.timings.append(timing)
+
+
+class _Handler(StandInHandler):
+    def envelope(self, data):
+        errors = ["EService:Unavailable"] if "SystemStatus" in self.path else []
+        return {"error": errors, "result": {"rows": list(range(100))}}
+
+
+def test_histogram_quantiles():
+    histogram = Histogram([1, 2, 4, 8])
+    for value in [0.5] * 50 + [3] * 49 + [100]:
+        histogram.observe(value)
+
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == 1.0
+    assert 2 < histogram.quantile(0.99) <= 4
+    # the overflow bucket reports the largest bound
+    assert histogram.quantile(1.0) == 8
+    assert Histogram().quantile(0.5) is None
+
+
+def test_latency_histogram_aggregates():
+    latency = LatencyHistogram()
+    for i in range(100):
+        latency.after_request(
+            RequestTiming(
+                "Ticker",
+                clean=1e-5,
+                ttfb=0.01 * (i + 1),
+                total=0.01 * (i + 1),
+                request_bytes=10,
+                response_bytes=100,
+            )
+        )
+    latency.after_request(
+        RequestTiming("Ticker", total=0.5, error_category=ErrorCategory.RATE_LIMIT)
+    )
+
+    assert latency.endpoints() == ["Ticker"]
+    assert latency.count("Ticker") == 101
+    assert 0.4 < latency.p50("Ticker") < 0.6
+    # accurate to within a bucket, each 1.5 times wider than the last
+    assert 0.9 < latency.p99("Ticker") < 1.5
+    assert latency.p50("Ticker", "sign") is None
+    assert latency.errors("Ticker") == {"rate_limit": 1}
+    assert latency.summary()["Ticker"]["ttfb"]["count"] == 100
+
+
+def test_prometheus_text():
+    latency = LatencyHistogram(bounds=[0.1, 1])
+    latency.after_request(
+        RequestTiming(
+            "Balance",
+            private=True,
+            total=0.5,
+            request_bytes=20,
+            response_bytes=30,
+            error_category=ErrorCategory.INVALID_NONCE,
+        )
+    )
+    text = latency.to_prometheus().splitlines()
+
+    assert "# TYPE kraken_request_duration_seconds histogram" in text
+    name = "kraken_request_duration_seconds"
+    labels = 'endpoint="Balance",stage="total"'
+    assert f'{name}_bucket{{{labels},le="0.1"}} 0' in text
+    assert f'{name}_bucket{{{labels},le="1"}} 1' in text
+    assert f'{name}_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"{name}_count{{{labels}}} 1" in text
+    assert (
+        'kraken_request_errors_total{endpoint="Balance",category="invalid_nonce"} 1'
+        in text
+    )
+    assert (
+        'kraken_payload_bytes_total{endpoint="Balance",direction="request"} 20' in text
+    )
+
+
+class TestInstrumentedClient:
+    def setup_class(self):
+        self.server = StandInServer(_Handler)
+        self.url = self.server.url
+
+    def teardown_class(self):
+        self.server.close()
+
+    def _client(self, instrument):
+        return Client(
+            api_key=API_KEY,
+            private_key=PRIVATE_KEY,
+            endpoint=self.url,
+            instrument=instrument,
+        )
+
+    def test_public_request_breakdown(self):
+        recorder = _Recorder()
+        client = self._client(recorder)
+        client.get_ticker_information("XBTUSD")
+        client.get_ticker_information("XBTUSD")
+        client.close()
+
+        first, second = recorder.timings
+        assert recorder.started == ["Ticker", "Ticker"]
+        assert first.endpoint == "Ticker" and not first.private
+        assert first.connect > 0
+        # the second request reuses the pooled connection
+        assert second.connect == 0
+        for stage in ("clean", "ttfb", "read", "decode", "total"):
+            assert getattr(first, stage) >= 0
+        assert first.sign is None
+        assert first.total >= first.ttfb + first.read + first.decode
+        assert first.request_bytes == len("pair=XBTUSD")
+        assert first.response_bytes > 100
+        assert first.status_code == 200
+        assert first.error_category is None
+
+    def test_private_request_breakdown(self):
+        recorder = _Recorder()
+        client = self._client(recorder)
+        client.get_account_balance()
+        client.close()
+
+        (timing,) = recorder.timings
+        assert timing.private
+        assert timing.clean > 0 and timing.sign > 0
+        assert timing.request_bytes > len("nonce=")
+
+    def test_error_category_is_reported(self):
+        recorder = _Recorder()
+        client = self._client(recorder)
+        client.get_system_status()
+        client.close()
+        assert recorder.timings[0].error_category is ErrorCategory.UNAVAILABLE
+
+    def test_connection_failure_is_reported(self):
+        recorder = _Recorder()
+        client = Client(endpoint="http://127.0.0.1:9", instrument=recorder)
+        with pytest.raises(Exception):
+            client.get_server_time()
+        assert recorder.timings[0].error_category is ErrorCategory.NETWORK
+        assert recorder.timings[0].total is not None
+
+    @patch("kraken_spot.public.http_get")
+    def test_each_retry_is_reported(self, get_mock):
+        from kraken_spot.retry import RetryPolicy
+
+        get_mock.side_effect = [
+            HTTPResponse(200, {"error": ["EService:Busy"]}),
+            HTTPResponse(200, {"error": [], "result": {}}),
+        ]
+        recorder = _Recorder()
+        client = Client(
+            instrument=recorder, retry_policy=RetryPolicy(sleep=lambda s: None)
+        )
+        client.get_server_time()
+
+        assert [t.error_category for t in recorder.timings] == [
+            ErrorCategory.UNAVAILABLE,
+            None,
+        ]
+        assert recorder.timings[0] is not recorder.timings[1]
+
+    def test_async_request_breakdown(self):
+        pytest.importorskip("aiohttp")
+        recorder = _Recorder()
+
+        async def run():
+            async with AsyncClient(
+                api_key=API_KEY,
+                private_key=PRIVATE_KEY,
+                endpoint=self.url,
+                instrument=recorder,
+            ) as client:
+                await client.get_ticker_information("XBTUSD")
+                await client.get_account_balance()
+
+        asyncio.run(run())
+        public, private = recorder.timings
+        assert public.connect > 0
+        assert private.connect == 0
+        assert public.ttfb > 0 and public.read >= 0 and public.decode >= 0
+        assert private.sign > 0
+        assert public.response_bytes > 100
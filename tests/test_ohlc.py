@@ -0,0 +1,106 @@
+import pytest
+
+from kraken_spot.http import KrakenResponse
+from kraken_spot.ohlc import OHLCCache, OHLCStore
+
+START = 1_700_000_040
+
+
+def _candle(time, close, count=1):
+    return [time, "10.0", "12.0", "9.0", str(close), "11.0", "1.5", count]
+
+
+class FakeOHLCClient:
+    """
+    Serves minute candles after `since` like the OHLC endpoint, the last of them still
+    open. `now` moves the open candle forward.
+    """
+
+    def __init__(self, now: int):
+        self.now = now
+        self.closes = {}
+        self.calls = []
+
+    def get_ohlc_data(self, pair, interval=None, since=None):
+        self.calls.append((pair, interval, since))
+        if pair == "NOPE":
+            return KrakenResponse(errors=["EQuery:Unknown asset pair"])
+
+        times = range(START, self.now + 1, 60)
+        rows = [
+            _candle(t, self.closes.get(t, t - START))
+            for t in times
+            if since is None or t > since
+        ]
+        # `last` is the newest committed candle, the open one follows it
+        return KrakenResponse({"X" + pair: rows, "last": self.now - 60})
+
+
+def test_refresh_appends_and_rewrites_the_open_candle(tmp_path, backend):
+    client = FakeOHLCClient(now=START + 60 * 9)
+    cache = OHLCCache(client, OHLCStore(str(tmp_path)), min_interval=0)
+
+    status = cache.refresh(["XBTUSD"], interval=1)["XBTUSD"]
+    assert 10 == status.records
+    assert status.error is None
+
+    # the open candle closes at a different price and three more arrive
+    client.closes[START + 60 * 9] = 99.0
+    client.now = START + 60 * 12
+    status = cache.refresh_pair("XBTUSD", 1)
+
+    assert ("XBTUSD", 1, START + 60 * 8) == client.calls[-1]
+    assert 4 == status.records
+
+    cols = cache.store.columns("XBTUSD", 1)
+    assert 13 == len(cols) == cache.store.count("XBTUSD", 1)
+    assert list(range(START, START + 60 * 13, 60)) == list(cols.time)
+    assert 99.0 == cols.close[9]
+    assert 12 * 60 == cols.close[12]
+    assert START + 60 * 11 == cols.last
+
+
+def test_columns_between_times(tmp_path, backend):
+    store = OHLCStore(str(tmp_path))
+    store.merge("XBTUSD", 1, [_candle(START + 60 * i, i) for i in range(100)], 0)
+
+    cols = store.columns("XBTUSD", 1, start=START + 60 * 10, end=START + 60 * 20)
+    assert [float(i) for i in range(10, 20)] == list(cols.close)
+    assert 1.5 == cols.volume[0]
+
+    assert 0 == len(store.columns("XBTUSD", 1, start=START + 60 * 500))
+    assert 0 == len(store.columns("ETHUSD", 1))
+
+
+def test_pairs_and_intervals_are_stored_apart(tmp_path):
+    client = FakeOHLCClient(now=START + 60 * 4)
+    cache = OHLCCache(client, OHLCStore(str(tmp_path)), min_interval=0)
+
+    statuses = cache.refresh(["XBTUSD", "ETHUSD", "NOPE"], interval=5)
+
+    assert "ResponseError: EQuery:Unknown asset pair" == statuses["NOPE"].error
+    assert 5 == cache.store.count("ETHUSD", 5)
+    assert 0 == cache.store.count("ETHUSD", 1)
+    assert sorted(tmp_path.iterdir()) == sorted(
+        tmp_path / f"{pair}-5.{ext}"
+        for pair in ("XBTUSD", "ETHUSD")
+        for ext in ("ohlc", "json")
+    )
+
+
+def test_refresh_is_paced_across_workers(tmp_path):
+    cache = OHLCCache(FakeOHLCClient(now=START), OHLCStore(str(tmp_path)))
+    waits = []
+    cache.pacer._sleep = waits.append
+
+    cache.refresh([f"PAIR{i}" for i in range(8)])
+
+    assert 7 == len(waits)
+    assert 7.0 == pytest.approx(max(waits), abs=0.5)
+
+
+def test_records_are_64_bytes(tmp_path):
+    store = OHLCStore(str(tmp_path))
+    store.merge("XBTUSD", 1, [_candle(START, 1)], 0)
+
+    assert 64 == (tmp_path / "XBTUSD-1.ohlc").stat().st_size
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+import pytest
+
+from kraken_spot.client import Client
+from kraken_spot.errors import ParameterError
+from kraken_spot.http import HTTPResponse
+from kraken_spot.orderbook import BUY, SELL, OrderBook
+
+BOOK = {
+    "asks": [["101.0", "1.0", 1], ["102.0", "2.0", 1], ["104.0", "5.0", 1]],
+    "bids": [["99.0", "1.0", 1], ["98.0", "3.0", 1], ["95.0", "4.0", 1]],
+}
+
+
+class TestOrderBook:
+    def setup_method(self):
+        self.book = OrderBook.from_result("XXBTZUSD", BOOK)
+
+    def test_top_of_book(self):
+        assert 99.0 == self.book.best_bid
+        assert 101.0 == self.book.best_ask
+        assert 100.0 == self.book.mid
+        assert 2.0 == self.book.spread
+
+    def test_vwap(self):
+        assert 101.0 == self.book.vwap(0.5)
+        assert (101.0 + 2 * 102.0) / 3 == self.book.vwap(3)
+        assert (101.0 + 2 * 102.0 + 104.0) / 4 == self.book.vwap(4, BUY)
+        assert (99.0 + 98.0) / 2 == self.book.vwap(2, SELL)
+
+    def test_vwap_beyond_depth(self):
+        with pytest.raises(ParameterError):
+            self.book.vwap(9)
+
+    @pytest.mark.parametrize("volume", [0, -1])
+    def test_vwap_needs_a_positive_volume(self, volume):
+        with pytest.raises(ParameterError):
+            self.book.vwap(volume)
+        with pytest.raises(ParameterError):
+            self.book.slippage(volume, SELL)
+
+    def test_empty_side(self):
+        book = OrderBook.from_result("XXBTZUSD", {"asks": BOOK["asks"], "bids": []})
+
+        assert 101.0 == book.best_ask
+        for attr in ("best_bid", "mid", "spread"):
+            with pytest.raises(ParameterError):
+                getattr(book, attr)
+        with pytest.raises(ParameterError):
+            book.vwap(1, SELL)
+
+    def test_slippage(self):
+        assert 100 == pytest.approx(self.book.slippage(1, BUY))
+        assert 150 == pytest.approx(self.book.slippage(2, SELL))
+
+    def test_depth_within(self):
+        assert 1.0 == self.book.depth_within(100, BUY)
+        assert 3.0 == self.book.depth_within(200, BUY)
+        assert 4.0 == self.book.depth_within(200, SELL)
+        assert 0.0 == self.book.depth_within(50, SELL)
+
+    def test_invalid_direction(self):
+        with pytest.raises(ParameterError):
+            self.book.vwap(1, "hold")
+
+    def test_diff(self):
+        changed = {
+            "asks": [["101.0", "1.0", 1], ["102.0", "2.5", 2], ["103.0", "1.0", 2]],
+            "bids": BOOK["bids"],
+        }
+        diff = OrderBook.from_result("XXBTZUSD", changed).diff(self.book)
+
+        assert [] == diff.bids
+        assert sorted([(102.0, 2.5), (103.0, 1.0), (104.0, 0.0)]) == sorted(diff.asks)
+        assert not self.book.diff(self.book)
+
+
+@patch("kraken_spot.public.http_get")
+def test_get_order_book_snapshot(mock_get):
+    body = {"error": [], "result": {"XXBTZUSD": BOOK}}
+    mock_get.return_value = HTTPResponse(200, body)
+
+    resp = Client().get_order_book("XBTUSD", count=3, snapshot=True)
+
+    assert 100.0 == resp.result["XXBTZUSD"].mid
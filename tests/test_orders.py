@@ -0,0 +1,220 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from helpers import form
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.client import Client
+from kraken_spot.errors import ParameterError
+from kraken_spot.http import HTTPResponse
+from kraken_spot.orders import (
+    BatchOrderResult,
+    OrderSpec,
+    batch_params,
+    cancel_queries,
+)
+from kraken_spot.registry import AssetPairRegistry
+
+API_KEY = "I1IIIcw+WHHHHaHH2NXnTQaaHIOT1a/Gz+aa8aa4CaaMXUzP43DQHHH8"
+PRIVATE_KEY = "YYNDDLLL+PTEE6EJE2HEEERN8sQUwl2J2CQ/YEREUVVaa3W8aaBEE6xF3DUoFnwjMHDfbOEoB00ERREAXEE1EQ=="
+
+ORDERS = [
+    OrderSpec("limit", "buy", "1.0", price_1="100"),
+    {
+        "order_type": "limit",
+        "direction": "sell",
+        "volume": "2.0",
+        "price_1": "110",
+        "close_order_type": "stop-loss",
+        "close_price": "90",
+    },
+]
+
+BATCH_RESULT = {
+    "orders": [
+        {"descr": {"order": "buy 1.0 XBTUSD @ limit 100"}, "txid": "OA-1"},
+        {"error": "EOrder:Insufficient funds"},
+    ]
+}
+
+
+def _ok(result):
+    return HTTPResponse(200, {"error": [], "result": result})
+
+
+def test_batch_params_nests_close_fields():
+    params = batch_params([OrderSpec("limit", "buy", "1", close_price="2")])
+    assert params["orders[0][ordertype]"] == "limit"
+    assert params["orders[0][type]"] == "buy"
+    assert params["orders[0][close][price]"] == "2"
+    assert "orders[0][close[price]]" not in params
+
+
+class TestAddOrderBatch:
+    def setup_method(self):
+        self.client = Client(api_key=API_KEY, private_key=PRIVATE_KEY)
+
+    @patch("kraken_spot.private.http_post")
+    def test_body(self, post_mock):
+        post_mock.return_value = _ok(BATCH_RESULT)
+        self.client.add_order_batch(ORDERS, pair="XBTUSD", validate=True)
+
+        url, body = post_mock.call_args[0][0], form(post_mock.call_args[0][1])
+        assert url.endswith("AddOrderBatch")
+        assert body["pair"] == "XBTUSD"
+        assert body["validate"] == "true"
+        assert body["orders[0][price]"] == "100"
+        assert body["orders[1][type]"] == "sell"
+        assert body["orders[1][close][ordertype]"] == "stop-loss"
+        assert "orders[0][close][ordertype]" not in body
+        assert "deadline" not in body
+
+    @patch("kraken_spot.private.http_post")
+    def test_results_are_paired_with_orders(self, post_mock):
+        post_mock.return_value = _ok(BATCH_RESULT)
+        resp = self.client.add_order_batch(ORDERS, pair="XBTUSD")
+
+        first, second = resp.result["orders"]
+        assert isinstance(first, BatchOrderResult)
+        assert first.ok and first.txid == "OA-1"
+        assert first.order.price_1 == "100"
+        assert not second.ok
+        assert second.error == "EOrder:Insufficient funds"
+        assert second.order.direction == "sell"
+
+    @patch("kraken_spot.private.http_post")
+    def test_errors_are_not_transformed(self, post_mock):
+        post_mock.return_value = HTTPResponse(200, {"error": ["EGeneral:Invalid"]})
+        resp = self.client.add_order_batch(ORDERS, pair="XBTUSD")
+        assert resp.errors == ["EGeneral:Invalid"]
+
+    @pytest.mark.parametrize("count", [1, 16])
+    def test_batch_size(self, count):
+        with pytest.raises(ParameterError):
+            self.client.add_order_batch([ORDERS[0]] * count, pair="XBTUSD")
+
+    def test_unknown_fields(self):
+        with pytest.raises(ParameterError):
+            self.client.add_order_batch([ORDERS[0], {"price": "1"}], pair="XBTUSD")
+
+    @patch("kraken_spot.private.http_post")
+    def test_registry_rounds_each_order(self, post_mock):
+        post_mock.return_value = _ok(BATCH_RESULT)
+        self.client.pair_registry = AssetPairRegistry(
+            {
+                "XXBTZUSD": {
+                    "altname": "XBTUSD",
+                    "wsname": "XBT/USD",
+                    "base": "XXBT",
+                    "quote": "ZUSD",
+                    "pair_decimals": 1,
+                    "lot_decimals": 2,
+                    "ordermin": "0.01",
+                }
+            }
+        )
+        orders = [
+            OrderSpec("limit", "buy", "1.005", price_1="100.04"),
+            OrderSpec("limit", "sell", "2", price_1="+5"),
+        ]
+        self.client.add_order_batch(orders, pair="XBT/USD")
+
+        body = form(post_mock.call_args[0][1])
+        assert body["pair"] == "XXBTZUSD"
+        assert body["orders[0][volume]"] == "1.00"
+        assert body["orders[0][price]"] == "100.0"
+        assert body["orders[1][price]"] == "+5"
+
+
+def test_async_add_order_batch():
+    client = AsyncClient(api_key=API_KEY, private_key=PRIVATE_KEY)
+    calls = []
+
+    async def post(url, body=None, headers=None, decoder=None):
+        calls.append(body)
+        return _ok(BATCH_RESULT)
+
+    client.transport.post = post
+    resp = asyncio.run(client.add_order_batch(ORDERS, pair="XBTUSD"))
+
+    assert form(calls[0])["orders[1][volume]"] == "2.0"
+    assert resp.result["orders"][0].txid == "OA-1"
+
+
+def test_cancel_queries_chunking():
+    queries = cancel_queries([f"O{i}" for i in range(101)] + ["O0", 7])
+    assert [len(q.ids) for q in queries] == [50, 50, 2]
+    assert queries[0].url_path == "CancelOrderBatch"
+    assert queries[0].body["orders[49]"] == "O49"
+    assert queries[2].ids == ["O100", "7"]
+
+    single = cancel_queries(["OA"])
+    assert single[0].url_path == "CancelOrder"
+    assert single[0].body == {"txid": "OA"}
+
+    with pytest.raises(ParameterError):
+        cancel_queries(["OA"], chunk_size=51)
+
+
+def _fake_cancel(
+    url, body=None, headers=None, transport=None, decoder=None, timing=None
+):
+    body = form(body)
+    ids = [v for k, v in body.items() if k.startswith("orders[")] or [body["txid"]]
+    if "BAD" in ids:
+        return HTTPResponse(200, {"error": ["EOrder:Unknown order"]})
+    return _ok({"count": len(ids)})
+
+
+class TestCancelOrders:
+    def setup_method(self):
+        self.client = Client(api_key=API_KEY, private_key=PRIVATE_KEY)
+
+    @patch("kraken_spot.private.http_post", side_effect=_fake_cancel)
+    def test_chunks_are_merged(self, post_mock):
+        ids = [f"O{i}" for i in range(60)]
+        resp = self.client.cancel_orders(ids, chunk_size=25)
+
+        assert resp.ok
+        assert resp.count == 60
+        assert sorted(resp.cancelled) == sorted(ids)
+        assert post_mock.call_count == 3
+
+    @patch("kraken_spot.private.http_post", side_effect=_fake_cancel)
+    def test_failed_chunk_is_retried_per_id(self, post_mock):
+        resp = self.client.cancel_orders(["OA", "BAD", "OB", "OC"], chunk_size=2)
+
+        assert not resp.ok
+        assert resp.errors == {"BAD": ["EOrder:Unknown order"]}
+        assert sorted(resp.cancelled) == ["OA", "OB", "OC"]
+        assert resp.count == 3
+        # one batch of two succeeded, the other was split into two cancels
+        assert post_mock.call_count == 4
+
+    @patch("kraken_spot.private.http_post")
+    def test_batch_is_only_split_for_rejected_ids(self, post_mock):
+        post_mock.return_value = HTTPResponse(200, {"error": ["EService:Busy"]})
+        resp = self.client.cancel_orders(["OA", "OB", "OC"])
+
+        assert post_mock.call_count == 1
+        assert resp.errors == {i: ["EService:Busy"] for i in ["OA", "OB", "OC"]}
+        assert resp.cancelled == []
+
+    @patch("kraken_spot.private.http_post", side_effect=ConnectionError("reset"))
+    def test_exceptions_become_errors(self, post_mock):
+        resp = self.client.cancel_orders(["OA"])
+        assert resp.errors == {"OA": ["ConnectionError: reset"]}
+
+
+def test_async_cancel_orders():
+    client = AsyncClient(api_key=API_KEY, private_key=PRIVATE_KEY)
+
+    async def post(url, body=None, headers=None, decoder=None):
+        return _fake_cancel(url, body)
+
+    client.transport.post = post
+    resp = asyncio.run(client.cancel_orders(["OA", "OB", "BAD"]))
+
+    assert resp.errors == {"BAD": ["EOrder:Unknown order"]}
+    assert resp.count == 2
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from helpers import FakeAsyncTransport, form
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.client import Client
+from kraken_spot.errors import ResponseError
+from kraken_spot.http import HTTPResponse, KrakenResponse
+from kraken_spot.pagination import apaginate, paginate
+
+SECRET = "c2VjcmV0"
+
+
+class FakeHistory:
+    def __init__(self, total: int, page_size: int = 50):
+        self.ids = [f"L{i:04d}" for i in range(total)]
+        self.page_size = page_size
+        self.offsets = []
+        self.threads = set()
+
+    def __call__(self, ofs: int) -> KrakenResponse:
+        self.offsets.append(ofs)
+        self.threads.add(threading.current_thread().name)
+        page = self.ids[ofs : ofs + self.page_size]
+        return KrakenResponse({"ledger": {i: {} for i in page}, "count": len(self.ids)})
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_paginate_follows_offsets_to_the_end(prefetch):
+    history = FakeHistory(120)
+    ids = [k for k, _ in paginate(history, "ledger", prefetch)]
+
+    assert history.ids == ids
+    assert [0, 50, 100] == history.offsets
+
+
+def test_paginate_prefetches_in_the_background():
+    history = FakeHistory(120)
+    list(paginate(history, "ledger"))
+
+    assert len(history.threads) == 2
+
+
+def test_paginate_skips_records_shifted_onto_the_next_page():
+    history = FakeHistory(60)
+
+    def fetch(ofs: int) -> KrakenResponse:
+        resp = history(ofs)
+        # a new entry arrives after the first page, pushing L0049 onto the second
+        history.ids.insert(0, "NEW")
+        return resp
+
+    ids = [k for k, _ in paginate(fetch, "ledger", prefetch=False)]
+
+    assert len(ids) == len(set(ids))
+    assert "L0059" in ids
+
+
+def test_paginate_stops_on_empty_page():
+    history = FakeHistory(0)
+    assert [] == list(paginate(history, "ledger"))
+
+
+def test_paginate_raises_response_errors():
+    with pytest.raises(ResponseError) as e:
+        list(paginate(lambda ofs: KrakenResponse(errors=["EGeneral:Invalid"]), "x"))
+
+    assert ["EGeneral:Invalid"] == e.value.errors
+
+
+def test_apaginate():
+    history = FakeHistory(120)
+
+    async def fetch(ofs):
+        return history(ofs)
+
+    async def collect():
+        return [k async for k, _ in apaginate(fetch, "ledger")]
+
+    assert history.ids == asyncio.run(collect())
+
+
+class TestPaginatedEndpoints:
+    def setup_method(self):
+        self.history = FakeHistory(75)
+
+    def _fake_post(self, url, body, headers, transport=None, decoder=None, timing=None):
+        resp = self.history(int(form(body).get("ofs", 0)))
+        return HTTPResponse(200, {"error": [], "result": resp.result})
+
+    def test_iter_ledgers(self):
+        client = Client(api_key="key", private_key=SECRET)
+        with patch("kraken_spot.private.http_post", side_effect=self._fake_post) as m:
+            ids = [k for k, _ in client.iter_ledgers(asset="XBT", start=1)]
+
+        assert self.history.ids == ids
+        assert all(form(c[0][1])["start"] == "1" for c in m.call_args_list)
+
+    def test_async_iter_ledgers(self):
+        client = AsyncClient(
+            api_key="key",
+            private_key=SECRET,
+            transport=FakeAsyncTransport(self._fake_post),
+        )
+
+        async def collect():
+            return [k async for k, _ in client.iter_ledgers()]
+
+        assert self.history.ids == asyncio.run(collect())
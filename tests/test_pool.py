@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from helpers import FakeAsyncTransport
+
+from kraken_spot.async_client import AsyncClientPool
+from kraken_spot.errors import AuthError, ParameterError
+from kraken_spot.http import HTTPResponse, KrakenResponse
+from kraken_spot.pool import ClientPool, Credentials, total_balances
+from kraken_spot.ratelimit import TIERS
+
+SECRET = "YYNDDLLL+PTEE6EJE2HEEERN8sQUwl2J2CQ/YEREUVVaa3W8aaBEE6xF3DUoFnwjMHDfbOEoB00ERREAXEE1EQ=="
+
+BALANCES = {
+    "key-a": {"XXBT": "1.5", "ZUSD": "100"},
+    "key-b": {"XXBT": "0.25"},
+}
+
+
+def _respond(url: str, api_key: str) -> HTTPResponse:
+    if api_key not in BALANCES:
+        return HTTPResponse(200, {"error": ["EAPI:Invalid key"]})
+    if url.endswith("Balance"):
+        return HTTPResponse(200, {"error": [], "result": BALANCES[api_key]})
+    return HTTPResponse(200, {"error": [], "result": {"open": {api_key: {}}}})
+
+
+def _fake_post(url, body=None, headers=None, transport=None, decoder=None, timing=None):
+    return _respond(url, headers["API-Key"])
+
+
+def _credentials():
+    return {
+        "main": ("key-a", SECRET),
+        "hedge": ("key-b", SECRET, "pro"),
+        "broken": ("key-c", SECRET),
+    }
+
+
+class TestClientPool:
+    def setup_method(self):
+        self.pool = ClientPool(_credentials())
+
+    def test_accounts_share_one_transport(self):
+        assert ["main", "hedge", "broken"] == self.pool.names
+        assert all(self.pool[n].transport is self.pool.transport for n in self.pool)
+
+    def test_each_key_has_its_own_nonces_and_rate_budget(self):
+        main, hedge = self.pool["main"], self.pool["hedge"]
+
+        assert main.nonce_generator is not hedge.nonce_generator
+        assert main.rate_limiter is not hedge.rate_limiter
+        assert TIERS["starter"] is main.rate_limiter.tier
+        assert TIERS["pro"] is hedge.rate_limiter.tier
+
+    def test_accounts_with_the_same_key_share_nonces(self):
+        pool = ClientPool({"a": ("key-a", SECRET), "b": ("key-a", SECRET)})
+
+        assert pool["a"].nonce_generator is pool["b"].nonce_generator
+        assert pool["a"].rate_limiter is pool["b"].rate_limiter
+        assert pool["a"] is pool.for_key("key-a")
+
+    def test_nonce_files_are_per_key(self, tmp_path):
+        pool = ClientPool(_credentials(), nonce_dir=str(tmp_path))
+        paths = {pool[n].nonce_generator.path for n in pool}
+
+        assert 3 == len(paths)
+        assert all("key-" not in p for p in paths)
+
+    def test_unknown_account(self):
+        with pytest.raises(ParameterError):
+            self.pool["nope"]
+        with pytest.raises(ParameterError):
+            self.pool.for_key("nope")
+
+    @patch("kraken_spot.private.http_post", side_effect=_fake_post)
+    def test_balances_are_merged_per_account(self, mock_post):
+        resp = self.pool.get_account_balance()
+
+        assert 3 == mock_post.call_count
+        assert not resp.ok
+        assert {"main": BALANCES["key-a"], "hedge": BALANCES["key-b"]} == resp.result
+        assert {"broken": ["EAPI:Invalid key"]} == resp.errors
+        assert {"XXBT": Decimal("1.75"), "ZUSD": Decimal(100)} == total_balances(
+            resp.result
+        )
+
+    @patch("kraken_spot.private.http_post", side_effect=_fake_post)
+    def test_fan_out_to_selected_accounts(self, mock_post):
+        resp = self.pool.get_open_orders(trades=True, accounts=["hedge"])
+
+        assert resp.ok
+        assert {"hedge": {"open": {"key-b": {}}}} == resp.result
+        assert "trades=true" in mock_post.call_args[0][1].decode()
+
+    def test_exceptions_are_reported_per_account(self):
+        def fn(client):
+            if client.api_key == "key-b":
+                raise ConnectionError("reset")
+            return KrakenResponse({}, [])
+
+        resp = self.pool.map(fn, accounts=["main", "hedge"])
+
+        assert ["main"] == list(resp.result)
+        assert {"hedge": ["ConnectionError: reset"]} == resp.errors
+
+    def test_concurrent_fan_outs_share_max_workers(self):
+        pool = ClientPool(_credentials(), max_workers=2)
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def fn(client):
+            with lock:
+                running.append(client)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(client)
+            return KrakenResponse({}, [])
+
+        threads = [threading.Thread(target=pool.map, args=(fn,)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pool.close()
+
+        assert 9 == len(peak)
+        assert 2 == max(peak)
+
+    def test_auth_errors_are_raised(self):
+        def fn(client):
+            raise AuthError("no private key")
+
+        with pytest.raises(AuthError):
+            self.pool.map(fn)
+
+    def test_from_env(self):
+        env = {
+            "KRAKEN_API_KEY_MAIN": "key-a",
+            "KRAKEN_PRIVATE_KEY_MAIN": SECRET,
+            "KRAKEN_API_KEY_HEDGE": "key-b",
+            "KRAKEN_PRIVATE_KEY_HEDGE": SECRET,
+            "KRAKEN_TIER_HEDGE": "intermediate",
+            "KRAKEN_API_KEY_ORPHAN": "key-c",
+        }
+        with patch.dict("os.environ", env, clear=True):
+            pool = ClientPool.from_env()
+
+        assert {"main", "hedge"} == set(pool)
+        assert TIERS["intermediate"] is pool["hedge"].rate_limiter.tier
+
+
+def test_async_pool_fans_out_over_one_session():
+    transport = FakeAsyncTransport(_fake_post)
+
+    async def run():
+        async with AsyncClientPool(_credentials(), transport=transport) as pool:
+            return await pool.get_account_balance()
+
+    resp = asyncio.run(run())
+
+    assert transport.closed
+    assert {"main", "hedge"} == set(resp.result)
+    assert {"broken"} == set(resp.errors)
+
+
+def test_async_fan_outs_share_max_workers():
+    running = []
+    peak = []
+
+    async def fn(client):
+        running.append(client)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(client)
+        return KrakenResponse({}, [])
+
+    async def run():
+        transport = FakeAsyncTransport(_fake_post)
+        async with AsyncClientPool(
+            _credentials(), transport=transport, max_workers=2
+        ) as pool:
+            await asyncio.gather(pool.map(fn), pool.map(fn), pool.map(fn))
+
+    asyncio.run(run())
+    assert 9 == len(peak)
+    assert 2 == max(peak)
+
+
+def test_credentials_default_to_the_starter_tier():
+    assert "starter" == Credentials("key", SECRET).tier
@@ -1,6 +1,9 @@
 from typing import Any, List
 from unittest.mock import patch
 
+from helpers import form
+
+from kraken_spot.auth import Signer
 from kraken_spot.client import Client
 from kraken_spot.errors import AuthError
 
@@ -11,16 +14,16 @@ def _assert_operation(post_mock, operation):
 
 def _assert_body_params_absent(post_mock, param_names: List[str]):
     for name in param_names:
-        assert name not in post_mock.call_args[0][1]
+        assert name not in form(post_mock.call_args[0][1])
 
 
 def _assert_body_param(post_mock, name: str, value: Any):
-    assert post_mock.call_args[0][1][name] == value
+    assert form(post_mock.call_args[0][1])[name] == value
 
 
 def _assert_body_params_present(post_mock, param_names: List[str]):
     for name in param_names:
-        assert name in post_mock.call_args[0][1]
+        assert name in form(post_mock.call_args[0][1])
 
 
 class TestPrivateEndpoints:
@@ -63,7 +66,17 @@ class TestPrivateEndpoints:
     @patch("kraken_spot.private.http_post")
     def test_nonce_is_added_to_every_request(self, post_mock):
         self.client.get_account_balance()
-        assert "nonce" in post_mock.call_args[0][1]
+        assert "nonce" in form(post_mock.call_args[0][1])
+
+    @patch("kraken_spot.private.http_post")
+    def test_sent_body_is_the_signed_body(self, post_mock):
+        self.client.get_ledgers(asset="XBT", ofs=0)
+        url, body, headers = post_mock.call_args[0][:3]
+
+        assert isinstance(body, bytes)
+        nonce = form(body)["nonce"]
+        signer = Signer(self.client.private_key)
+        assert headers["API-Sign"] == signer.sign("/0/private/Ledgers", nonce, body)
 
     @patch("kraken_spot.private.http_post")
     def test_correct_headers_for_every_request(self, post_mock):
@@ -80,7 +93,7 @@ class TestPrivateEndpoints:
         self.client.get_trade_balance(asset)
 
         _assert_operation(post_mock, "TradeBalance")
-        assert asset == post_mock.call_args[0][1]["asset"]
+        assert asset == form(post_mock.call_args[0][1])["asset"]
 
     @patch("kraken_spot.private.http_post")
     def test_get_open_orders(self, post_mock):
@@ -246,12 +259,16 @@ class TestPrivateEndpoints:
         _assert_operation(post_mock, "ExportStatus")
         _assert_body_params_present(post_mock, ["nonce", "report"])
 
-    @patch("kraken_spot.private.http_post")
-    def test_retrieve_data_export(self, post_mock):
-        # with defaults
-        self.client.retrieve_data_export(report_id="")
+    def test_retrieve_data_export(self):
+        # the archive is streamed rather than decoded as JSON
+        with patch.object(self.client.transport, "post") as post_mock:
+            post_mock.return_value.iter_content.return_value = [b"PK\x03\x04", b"zip"]
+            resp = self.client.retrieve_data_export(report_id="")
+
         _assert_operation(post_mock, "RetrieveExport")
         _assert_body_params_present(post_mock, ["nonce", "id"])
+        assert post_mock.call_args[1]["stream"]
+        assert b"PK\x03\x04zip" == resp.result
 
     @patch("kraken_spot.private.http_post")
     def test_delete_export_report(self, post_mock):
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+import pytest
+from helpers import FakeClock
+
+from kraken_spot.client import Client
+from kraken_spot.errors import RateLimitError
+from kraken_spot.http import HTTPResponse
+from kraken_spot.ratelimit import Pacer, RateLimiter, Tier
+
+
+def test_pacer_spaces_calls_across_callers():
+    clock = FakeClock()
+    sleeps = []
+    pacer = Pacer(1.0, clock=clock, sleep=sleeps.append)
+
+    for _ in range(3):
+        pacer.wait()
+    assert [1.0, 2.0] == sleeps
+
+    clock.now = 10.0
+    pacer.wait()
+    assert [1.0, 2.0] == sleeps
+
+
+class TestRateLimiter:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(
+            Tier(max_counter=4, decay_per_second=1), clock=self.clock
+        )
+
+    def test_counter_fills_and_decays(self):
+        for _ in range(4):
+            self.limiter.acquire("Balance", block=False)
+        assert 4 == self.limiter.counter
+
+        self.clock.now = 1.5
+        assert 2.5 == self.limiter.counter
+        assert 1.5 == self.limiter.headroom
+
+    def test_history_calls_cost_more(self):
+        self.limiter.acquire("Ledgers")
+        assert 2 == self.limiter.counter
+
+        self.limiter.acquire("AddOrder")
+        assert 2 == self.limiter.counter
+
+    def test_reserve_returns_wait_time_when_full(self):
+        self.limiter.acquire("Ledgers")
+        self.limiter.acquire("Ledgers")
+
+        assert 2 == self.limiter.reserve("TradeHistory")
+        assert 4 == self.limiter.counter
+
+    def test_non_blocking_acquire_raises(self):
+        self.limiter.record_rate_limit_exceeded()
+        with pytest.raises(RateLimitError):
+            self.limiter.acquire("Balance", block=False)
+
+    def test_blocking_acquire_waits(self):
+        self.limiter.record_rate_limit_exceeded()
+
+        def sleep(seconds):
+            self.clock.now += seconds
+
+        with patch("kraken_spot.ratelimit.time.sleep", side_effect=sleep) as mock:
+            self.limiter.acquire("Balance")
+
+        assert 1 == mock.call_args[0][0]
+
+    def test_custom_costs(self):
+        limiter = RateLimiter("pro", costs={"Balance": 3}, clock=self.clock)
+        assert 3 == limiter.cost("Balance")
+        assert 20 == limiter.tier.max_counter
+
+
+class TestClientRateLimiting:
+    @patch("kraken_spot.private.http_post")
+    def test_private_calls_spend_budget(self, post_mock):
+        post_mock.return_value = HTTPResponse(200, {"error": [], "result": {}})
+        limiter = RateLimiter(clock=FakeClock())
+        client = Client(api_key="key", private_key="c2VjcmV0", rate_limiter=limiter)
+
+        client.get_trades_history()
+        client.get_account_balance()
+
+        assert 3 == limiter.counter
+
+    @patch("kraken_spot.private.http_post")
+    def test_rate_limit_error_fills_counter(self, post_mock):
+        post_mock.return_value = HTTPResponse(
+            200, {"error": ["EAPI:Rate limit exceeded"]}
+        )
+        limiter = RateLimiter(clock=FakeClock())
+        client = Client(api_key="key", private_key="c2VjcmV0", rate_limiter=limiter)
+
+        client.get_account_balance()
+
+        assert 15 == limiter.counter
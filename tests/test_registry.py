@@ -0,0 +1,114 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from helpers import FakeAsyncTransport, form
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.client import Client
+from kraken_spot.errors import ParameterError
+from kraken_spot.http import HTTPResponse
+from kraken_spot.registry import AssetPairRegistry
+
+PAIRS = {
+    "XXBTZUSD": {
+        "altname": "XBTUSD",
+        "wsname": "XBT/USD",
+        "base": "XXBT",
+        "quote": "ZUSD",
+        "pair_decimals": 1,
+        "lot_decimals": 8,
+        "ordermin": "0.0001",
+        "costmin": "0.5",
+        "tick_size": "0.1",
+    },
+    "SOLUSD": {
+        "altname": "SOLUSD",
+        "wsname": "SOL/USD",
+        "base": "SOL",
+        "quote": "ZUSD",
+        "pair_decimals": 2,
+        "lot_decimals": 8,
+        "ordermin": "0.02",
+    },
+}
+ASSETS = {"XXBT": {"altname": "XBT"}, "ZUSD": {"altname": "USD"}}
+
+
+class TestAssetPairRegistry:
+    def setup_class(self):
+        self.registry = AssetPairRegistry(PAIRS, ASSETS)
+
+    @pytest.mark.parametrize("symbol", ["XBTUSD", "XXBTZUSD", "XBT/USD", "xbtusd"])
+    def test_normalize(self, symbol):
+        assert "XXBTZUSD" == self.registry.normalize(symbol)
+
+    def test_normalize_asset(self):
+        assert "XXBT" == self.registry.normalize_asset("XBT")
+
+    def test_unknown_pair(self):
+        assert "NOPE" not in self.registry
+        with pytest.raises(ParameterError):
+            self.registry.normalize("NOPE")
+
+    def test_round_price(self):
+        assert "30000.2" == self.registry.round_price("XBTUSD", "30000.15001")
+        assert "21.35" == self.registry.round_price("SOLUSD", 21.349)
+        assert "+5" == self.registry.round_price("XBTUSD", "+5")
+        assert "2%" == self.registry.round_price("XBTUSD", "2%")
+
+    def test_round_volume_rounds_down(self):
+        assert "0.12345678" == self.registry.round_volume("XBTUSD", "0.123456789")
+
+    def test_prepare_order(self):
+        order = self.registry.prepare_order("XBT/USD", "0.0100000001", "30000.04")
+        assert ("XXBTZUSD", "0.01000000", "30000.0", None) == order
+
+    def test_prepare_order_below_minimums(self):
+        with pytest.raises(ParameterError, match="volume"):
+            self.registry.prepare_order("XBTUSD", "0.00001", "30000")
+        with pytest.raises(ParameterError, match="cost"):
+            self.registry.prepare_order("XBTUSD", "0.0001", "1000")
+
+
+def _fake_get(url, params=None, transport=None, decoder=None, timing=None):
+    result = PAIRS if url.endswith("AssetPairs") else ASSETS
+    return HTTPResponse(200, {"error": [], "result": result})
+
+
+class TestClientValidation:
+    def setup_method(self):
+        self.client = Client(api_key="key", private_key="c2VjcmV0")
+        with patch("kraken_spot.public.http_get", side_effect=_fake_get):
+            self.client.load_pair_registry()
+
+    @patch("kraken_spot.private.http_post")
+    def test_add_order_is_normalized(self, post_mock):
+        self.client.add_order("limit", "buy", "0.123456789", "XBT/USD", "30000.04")
+
+        body = form(post_mock.call_args[0][1])
+        assert "XXBTZUSD" == body["pair"]
+        assert "0.12345678" == body["volume"]
+        assert "30000.0" == body["price"]
+
+    @patch("kraken_spot.private.http_post")
+    def test_invalid_order_is_not_sent(self, post_mock):
+        with pytest.raises(ParameterError):
+            self.client.add_order("market", "buy", "0.00001", "XBTUSD")
+        with pytest.raises(ParameterError):
+            self.client.edit_order("TX", "DOGEUSD", price="1")
+
+        post_mock.assert_not_called()
+
+    @patch("kraken_spot.private.http_post")
+    def test_edit_order_is_normalized(self, post_mock):
+        self.client.edit_order("TX", "SOLUSD", price="21.349")
+
+        assert "21.35" == form(post_mock.call_args[0][1])["price"]
+
+
+def test_async_client_loads_pair_registry():
+    client = AsyncClient(transport=FakeAsyncTransport(_fake_get))
+    registry = asyncio.run(client.load_pair_registry())
+
+    assert "SOLUSD" == registry.normalize("SOL/USD")
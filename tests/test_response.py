@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from kraken_spot.http import (
+    INVALID_RESPONSE,
+    HTTPResponse,
+    KrakenResponse,
+    to_kraken_response,
+)
+
+
+def _raw(errors, result):
+    return json.dumps({"error": errors, "result": result}).encode()
+
+
+class _CountingDecoder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, raw: bytes):
+        self.calls += 1
+        return json.loads(raw)
+
+
+def test_constructed_responses_behave_as_before():
+    resp = KrakenResponse({"a": 1}, [])
+    assert resp.ok
+    assert resp.result == {"a": 1}
+    assert resp.raw is None
+    assert KrakenResponse().result == {}
+    assert KrakenResponse(errors=["EGeneral:Invalid arguments"]).ok is False
+    assert KrakenResponse({"a": 1}) == KrakenResponse({"a": 1}, [])
+    assert "errors=[]" in repr(resp)
+
+
+def test_responses_have_no_instance_dict():
+    assert not hasattr(KrakenResponse(), "__dict__")
+    assert not hasattr(HTTPResponse(200, {}), "__dict__")
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b'{"error":[],"result":{"a":1}}',
+        b'{"error": [], "result": {"a": 1}}',
+        b' {\n "error" : [ ] ,"result":{"a":1}}',
+    ],
+)
+def test_success_is_not_decoded_until_result_is_read(raw):
+    decoder = _CountingDecoder()
+    resp = to_kraken_response(HTTPResponse(200, content=raw, decoder=decoder))
+
+    assert resp.ok
+    assert resp.raw is raw
+    assert decoder.calls == 0
+    assert resp.result == {"a": 1}
+    assert resp.result == {"a": 1}
+    assert decoder.calls == 1
+
+
+def test_errors_are_decoded_eagerly():
+    decoder = _CountingDecoder()
+    raw = _raw(["EQuery:Unknown asset pair"], {})
+    resp = to_kraken_response(HTTPResponse(200, content=raw, decoder=decoder))
+
+    assert resp.errors == ["EQuery:Unknown asset pair"]
+    assert decoder.calls == 1
+    assert resp.raw == raw
+
+
+def test_error_status_is_an_invalid_response():
+    page = b"<html><body>503 Service Unavailable</body></html>"
+    assert HTTPResponse(503, content=page).errors == [INVALID_RESPONSE]
+    assert HTTPResponse(502, content=b'{"error":[],"result":{}}').errors == [
+        INVALID_RESPONSE
+    ]
+    # Kraken's own errors are kept whatever the status
+    assert HTTPResponse(500, {"error": ["EService:Busy"]}).errors == ["EService:Busy"]
+
+
+def test_error_not_first_is_still_found():
+    raw = b'{"result":{},"error":["EService:Busy"]}'
+    resp = to_kraken_response(HTTPResponse(200, content=raw))
+    assert resp.errors == ["EService:Busy"]
+
+
+def test_transform_is_applied_lazily():
+    calls = []
+
+    def transform(result):
+        calls.append(result)
+        return sorted(result)
+
+    resp = to_kraken_response(
+        HTTPResponse(200, content=_raw([], {"b": 1, "a": 2})), transform
+    )
+    assert calls == []
+    assert resp.result == ["a", "b"]
+    assert resp.result == ["a", "b"]
+    assert len(calls) == 1
+
+
+def test_http_response_body_is_decoded_on_use():
+    decoder = _CountingDecoder()
+    resp = HTTPResponse(200, content=_raw([], {"a": 1}), decoder=decoder)
+
+    assert resp.errors == []
+    assert decoder.calls == 0
+    assert resp.body["result"] == {"a": 1}
+    assert resp == HTTPResponse(200, {"error": [], "result": {"a": 1}})
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b'{"error":[],"result":{"a":1}',
+        b'{"error":[],"result":{"a":1},"b":"{',
+        b'{"error":[],"result":{"a":',
+    ],
+)
+def test_truncated_success_is_an_invalid_response(raw):
+    assert to_kraken_response(HTTPResponse(200, content=raw)).errors == [
+        INVALID_RESPONSE
+    ]
+
+
+def test_non_object_body_is_an_invalid_response():
+    assert HTTPResponse(200, content=b"[]").errors == [INVALID_RESPONSE]
+
+    raw = b'"Bad Gateway"'
+    resp = to_kraken_response(HTTPResponse(502, content=raw))
+    assert resp.errors == [INVALID_RESPONSE]
+    assert resp.result == {}
+    assert resp.raw == raw
@@ -0,0 +1,289 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from helpers import form
+
+from kraken_spot.async_client import AsyncClient
+from kraken_spot.client import Client
+from kraken_spot.errors import ErrorCategory, classify_error, classify_errors
+from kraken_spot.http import HTTPResponse, KrakenResponse
+from kraken_spot.retry import RetryPolicy
+
+API_KEY = "I1IIIcw+WHHHHaHH2NXnTQaaHIOT1a/Gz+aa8aa4CaaMXUzP43DQHHH8"
+PRIVATE_KEY = "YYNDDLLL+PTEE6EJE2HEEERN8sQUwl2J2CQ/YEREUVVaa3W8aaBEE6xF3DUoFnwjMHDfbOEoB00ERREAXEE1EQ=="
+
+
+def _policy(**kwargs):
+    return RetryPolicy(sleep=lambda s: None, **kwargs)
+
+
+def _error(*errors):
+    return HTTPResponse(200, {"error": list(errors)})
+
+
+def _ok(result=None):
+    return HTTPResponse(200, {"error": [], "result": result or {}})
+
+
+@pytest.mark.parametrize(
+    "error,category",
+    [
+        ("EAPI:Rate limit exceeded", ErrorCategory.RATE_LIMIT),
+        ("EAPI:Invalid nonce", ErrorCategory.INVALID_NONCE),
+        ("EService:Unavailable", ErrorCategory.UNAVAILABLE),
+        ("EService:Busy", ErrorCategory.UNAVAILABLE),
+        ("EGeneral:Internal error", ErrorCategory.INTERNAL),
+        ("EGeneral:Invalid response", ErrorCategory.NETWORK),
+        ("EService:Market in cancel_only mode", ErrorCategory.MARKET_RESTRICTED),
+        ("EAPI:Invalid key", ErrorCategory.AUTH),
+        ("EGeneral:Invalid arguments:volume", ErrorCategory.INVALID_ARGUMENTS),
+        ("EQuery:Unknown asset pair", ErrorCategory.INVALID_ARGUMENTS),
+        ("EOrder:Insufficient funds", ErrorCategory.ORDER_REJECTED),
+        ("EOrder:Rate limit exceeded", ErrorCategory.RATE_LIMIT),
+        ("ESomething:New", ErrorCategory.UNKNOWN),
+    ],
+)
+def test_classify_error(error, category):
+    assert classify_error(error) is category
+
+
+def test_classify_errors():
+    assert classify_errors([]) is None
+    assert classify_errors(["EAPI:Invalid nonce", "EService:Busy"]).rejected
+    # one permanent error makes the whole response permanent
+    mixed = classify_errors(["EService:Busy", "EOrder:Insufficient funds"])
+    assert mixed is ErrorCategory.ORDER_REJECTED
+    assert not mixed.retryable
+    # transient but not a guaranteed rejection
+    assert classify_errors(["EService:Busy", "EGeneral:Internal error"]) is (
+        ErrorCategory.INTERNAL
+    )
+    assert KrakenResponse(errors=["EAPI:Invalid nonce"]).error_category is (
+        ErrorCategory.INVALID_NONCE
+    )
+
+
+def test_backoff_is_capped_with_full_jitter():
+    policy = RetryPolicy(base_delay=1, max_delay=4, rand=lambda: 0.5)
+    assert [policy.backoff(a) for a in range(4)] == [0.5, 1.0, 2.0, 2.0]
+    assert RetryPolicy(rand=lambda: 0.0).backoff(3) == 0
+
+
+def test_idempotent_call_retries_transient_failures():
+    delays = []
+    policy = RetryPolicy(sleep=delays.append, rand=lambda: 1.0, base_delay=0.1)
+    responses = iter([ConnectionError(), _error("EService:Unavailable"), _ok()])
+
+    def send():
+        resp = next(responses)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+    assert policy.call(send, idempotent=True).body["error"] == []
+    assert delays == [0.1, 0.2]
+
+
+def test_gives_up_after_max_attempts():
+    calls = []
+
+    def send():
+        calls.append(1)
+        return _error("EService:Busy")
+
+    resp = _policy(max_attempts=2).call(send, idempotent=True)
+    assert resp.body["error"] == ["EService:Busy"]
+    assert len(calls) == 2
+
+
+def test_permanent_errors_are_not_retried():
+    calls = []
+
+    def send():
+        calls.append(1)
+        return _error("EGeneral:Invalid arguments")
+
+    _policy().call(send, idempotent=True)
+    assert len(calls) == 1
+
+
+def test_gateway_errors_are_retried_when_idempotent():
+    page = b"<html><body>503 Service Unavailable</body></html>"
+    responses = [
+        HTTPResponse(503, content=page),
+        HTTPResponse(502, content=b'"Bad Gateway"'),
+        _ok(),
+    ]
+
+    sent = iter(responses)
+    assert _policy().call(lambda: next(sent), idempotent=True) is responses[2]
+
+    # the request may have reached Kraken, so an order is not sent again
+    sent = iter(responses)
+    assert _policy().call(lambda: next(sent), idempotent=False) is responses[0]
+
+
+def test_non_idempotent_call_is_only_resent_when_rejected():
+    policy = _policy()
+
+    def failing():
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        policy.call(failing, idempotent=False)
+
+    responses = iter([_error("EGeneral:Internal error"), _ok()])
+    assert policy.call(lambda: next(responses), idempotent=False).body["error"]
+
+    responses = iter([_error("EAPI:Invalid nonce"), _ok()])
+    assert policy.call(lambda: next(responses), idempotent=False).body["error"] == []
+
+
+class TestHedging:
+    def test_slow_request_is_hedged(self):
+        policy = _policy(hedge_after=0.01)
+        release = threading.Event()
+        calls = []
+
+        def send():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(2)
+                return _ok({"from": "first"})
+            return _ok({"from": "hedge"})
+
+        try:
+            assert policy.hedged(send).body["result"] == {"from": "hedge"}
+            assert len(calls) == 2
+        finally:
+            release.set()
+            policy.close()
+
+    def test_fast_request_is_not_hedged(self):
+        policy = _policy(hedge_after=1)
+        calls = []
+
+        def send():
+            calls.append(1)
+            return _ok()
+
+        policy.hedged(send)
+        policy.close()
+        assert len(calls) == 1
+
+    def test_failed_hedge_falls_back_to_other_request(self):
+        policy = _policy(hedge_after=0.01)
+        calls = []
+
+        def send():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return _ok({"from": "first"})
+            raise ConnectionError()
+
+        assert policy.hedged(send).body["result"] == {"from": "first"}
+        policy.close()
+
+    def test_async_hedge_cancels_loser(self):
+        policy = _policy(hedge_after=0.01)
+        cancelled = []
+
+        async def send():
+            if not cancelled:
+                cancelled.append(False)
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled[0] = True
+                    raise
+            return _ok({"from": "hedge"})
+
+        async def run():
+            resp = await policy.ahedged(send)
+            await asyncio.sleep(0)
+            return resp
+
+        assert asyncio.run(run()).body["result"] == {"from": "hedge"}
+        assert cancelled == [True]
+
+
+class TestClientRetries:
+    def setup_method(self):
+        self.client = Client(
+            api_key=API_KEY, private_key=PRIVATE_KEY, retry_policy=_policy()
+        )
+
+    @patch("kraken_spot.public.http_get")
+    def test_public_query_is_retried(self, get_mock):
+        get_mock.side_effect = [_error("EService:Unavailable"), _ok({"unixtime": 1})]
+        assert self.client.get_server_time().result == {"unixtime": 1}
+        assert get_mock.call_count == 2
+
+    @patch("kraken_spot.public.http_get")
+    def test_gateway_error_page_is_retried(self, get_mock):
+        page = b"<html><body>520 Unknown Error</body></html>"
+        get_mock.side_effect = [HTTPResponse(520, content=page), _ok({"unixtime": 1})]
+        assert self.client.get_server_time().result == {"unixtime": 1}
+        assert get_mock.call_count == 2
+
+    @patch("kraken_spot.private.http_post")
+    def test_invalid_nonce_is_resent_with_new_nonce(self, post_mock):
+        post_mock.side_effect = [_error("EAPI:Invalid nonce"), _ok({"txid": ["O"]})]
+        resp = self.client.add_order("limit", "buy", "1", "XBTUSD", price_1="1")
+
+        assert resp.ok
+        first, second = [c[0] for c in post_mock.call_args_list]
+        assert form(first[1])["nonce"] != form(second[1])["nonce"]
+        assert first[2]["API-Sign"] != second[2]["API-Sign"]
+
+    @patch("kraken_spot.private.http_post")
+    def test_order_is_not_resent_after_internal_error(self, post_mock):
+        post_mock.return_value = _error("EGeneral:Internal error")
+        self.client.add_order("limit", "buy", "1", "XBTUSD", price_1="1")
+        assert post_mock.call_count == 1
+
+    @patch("kraken_spot.private.http_post")
+    def test_reads_are_retried_after_internal_error(self, post_mock):
+        post_mock.side_effect = [_error("EGeneral:Internal error"), _ok()]
+        assert self.client.get_account_balance().ok
+        assert post_mock.call_count == 2
+
+    @patch("kraken_spot.private.http_post")
+    def test_otp_requests_are_not_resent(self, post_mock):
+        post_mock.return_value = _error("EAPI:Invalid nonce")
+        self.client.set_otp(123456)
+        self.client.get_account_balance()
+        assert post_mock.call_count == 1
+
+
+def test_async_client_retries():
+    client = AsyncClient(
+        api_key=API_KEY,
+        private_key=PRIVATE_KEY,
+        retry_policy=_policy(base_delay=0),
+    )
+    gets = iter([_error("EService:Busy"), _ok({"status": "online"})])
+    posts = iter([_error("EAPI:Invalid nonce"), _ok({"ZUSD": "1"})])
+
+    async def get(url, params=None, decoder=None):
+        return next(gets)
+
+    async def post(url, body=None, headers=None, decoder=None):
+        return next(posts)
+
+    client.transport.get = get
+    client.transport.post = post
+
+    async def run():
+        return (
+            await client.get_system_status(),
+            await client.get_account_balance(),
+        )
+
+    status, balance = asyncio.run(run())
+    assert status.result == {"status": "online"}
+    assert balance.result == {"ZUSD": "1"}
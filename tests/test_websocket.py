@@ -0,0 +1,338 @@
+import asyncio
+import json
+import threading
+import zlib
+
+import pytest
+
+from kraken_spot.http import KrakenResponse
+from kraken_spot.websocket import BookState, WebSocketClient
+
+SNAPSHOT = {
+    "as": [["5541.30000", "2.50700000", "1"], ["5541.80000", "0.33000000", "1"]],
+    "bs": [["5541.20000", "1.52900000", "1"], ["5539.90000", "0.30000000", "1"]],
+}
+
+
+def _checksum(asks, bids) -> str:
+    fields = [
+        (p.replace(".", "").lstrip("0"), v.replace(".", "").lstrip("0"))
+        for p, v, *_ in asks + bids
+    ]
+    return str(zlib.crc32("".join(p + v for p, v in fields).encode()))
+
+
+class StandInConnection:
+    def __init__(self, server, url):
+        self.server = server
+        self.url = url
+        self.sent = []
+        self.closed = False
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send(self, raw: str):
+        msg = json.loads(raw)
+        self.sent.append(msg)
+        await self.server.handle(self, msg)
+
+    async def recv(self) -> str:
+        msg = await self.inbox.get()
+        if isinstance(msg, Exception):
+            raise msg
+        return json.dumps(msg)
+
+    async def close(self):
+        self.closed = True
+        self.push(ConnectionError("closed"))
+
+    def push(self, msg):
+        self.inbox.put_nowait(msg)
+
+
+class StandInServer:
+    """
+    Answers subscriptions the way Kraken does and lets tests push channel messages
+    """
+
+    def __init__(self):
+        self.connections = []
+        self.channel_id = 0
+
+    async def connect(self, url):
+        conn = StandInConnection(self, url)
+        self.connections.append(conn)
+        conn.push({"event": "systemStatus", "status": "online"})
+        return conn
+
+    async def handle(self, conn, msg):
+        if msg["event"] != "subscribe":
+            return
+        sub = msg["subscription"]
+        for pair in msg.get("pair", [None]):
+            self.channel_id += 1
+            name = sub["name"]
+            if name == "book":
+                name = f"book-{sub.get('depth', 10)}"
+            status = {
+                "event": "subscriptionStatus",
+                "status": "subscribed",
+                "channelName": name,
+                "subscription": sub,
+            }
+            if pair:
+                status.update(channelID=self.channel_id, pair=pair)
+            conn.push(status)
+            if name.startswith("book"):
+                conn.push([self.channel_id, SNAPSHOT, name, pair])
+
+
+class FakeClient:
+    def __init__(self):
+        self.tokens = 0
+        self.threads = []
+
+    def get_websockets_token(self):
+        self.tokens += 1
+        self.threads.append(threading.get_ident())
+        return KrakenResponse({"token": f"token-{self.tokens}", "expires": 900})
+
+
+class FakeAsyncClient:
+    async def get_websockets_token(self):
+        return KrakenResponse({"token": "async-token", "expires": 900})
+
+
+async def _until(predicate, timeout=1.0):
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_event_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.001)
+
+
+def test_book_state_checksum():
+    book = BookState(depth=10)
+    book.update(SNAPSHOT)
+
+    assert int(_checksum(SNAPSHOT["as"][:2], SNAPSHOT["bs"][:2])) == book.checksum()
+
+
+def test_book_state_update_and_truncate():
+    book = BookState(depth=2)
+    book.update(SNAPSHOT)
+    book.update({"a": [["5541.30000", "0.00000000", "2"], ["5540.00000", "1.0", "2"]]})
+
+    assert [(5540.0, 1.0), (5541.8, 0.33)] == book.levels("asks")
+
+    book.update({"b": [["5541.25000", "1.0", "2"]]})
+    assert [(5541.25, 1.0), (5541.2, 1.529)] == book.levels("bids")
+
+
+class TestWebSocketClient:
+    def setup_method(self):
+        self.server = StandInServer()
+        self.ws = WebSocketClient(
+            FakeClient(), connect=self.server.connect, reconnect_delay=0
+        )
+
+    def _run(self, scenario):
+        async def main():
+            task = asyncio.ensure_future(self.ws.run())
+            try:
+                await scenario()
+            finally:
+                await self.ws.close()
+                await asyncio.wait_for(task, 1)
+
+        asyncio.run(main())
+
+    def test_public_messages_reach_callbacks(self):
+        received = []
+        self.ws.subscribe("ticker", ["XBT/USD"], callback=received.append)
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            conn = self.server.connections[0]
+            await _until(lambda: conn.sent)
+            conn.push([1, {"a": ["5525.4", 1, "1.0"]}, "ticker", "XBT/USD"])
+            await _until(lambda: received)
+
+        self._run(scenario)
+        assert "XBT/USD" == received[0].pair
+        assert "5525.4" == received[0].data["a"][0]
+
+    def test_messages_reach_async_iterators(self):
+        self.ws.subscribe("trade", ["XBT/USD"])
+        received = []
+
+        async def consume():
+            async for message in self.ws:
+                received.append(message)
+
+        async def scenario():
+            consumer = asyncio.ensure_future(consume())
+            await _until(lambda: self.server.connections)
+            conn = self.server.connections[0]
+            conn.push(
+                [
+                    1,
+                    [["5541.2", "0.15", "1534614057.3", "s", "l", ""]],
+                    "trade",
+                    "XBT/USD",
+                ]
+            )
+            await _until(lambda: any(m.channel == "trade" for m in received))
+            await self.ws.close()
+            await consumer
+
+        self._run(scenario)
+        assert "systemStatus" == received[0].channel
+
+    def test_book_updates_are_checksummed(self):
+        books = []
+        self.ws.subscribe(
+            "book",
+            ["XBT/USD"],
+            callback=lambda m: books.append(m.book.levels("asks")),
+            depth=10,
+        )
+
+        async def scenario():
+            await _until(lambda: books)
+            conn = self.server.connections[0]
+            update = {"a": [["5541.30000", "2.0", "2"]]}
+            asks = [["5541.30000", "2.0"], ["5541.80000", "0.33000000"]]
+            bids = [[p, v] for p, v, _ in SNAPSHOT["bs"]]
+            update["c"] = _checksum(asks, bids)
+            conn.push([1, update, "book-10", "XBT/USD"])
+            await _until(lambda: len(books) == 2)
+
+            # a bad checksum means the book is out of sync, so it is resubscribed
+            conn.push(
+                [1, {"a": [["5541.30000", "3.0", "3"]], "c": "1"}, "book-10", "XBT/USD"]
+            )
+            await _until(lambda: sum(m["event"] == "subscribe" for m in conn.sent) == 2)
+            await _until(lambda: len(books) == 3)
+
+        self._run(scenario)
+        assert [(5541.3, 2.0), (5541.8, 0.33)] == books[1]
+        assert "unsubscribe" == self.server.connections[0].sent[1]["event"]
+        assert [(5541.3, 2.507), (5541.8, 0.33)] == books[2]
+
+    def test_reconnects_and_resubscribes(self):
+        self.ws.subscribe("spread", ["XBT/USD"])
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            self.server.connections[0].push(ConnectionError("dropped"))
+            await _until(lambda: len(self.server.connections) == 2)
+            await _until(lambda: self.server.connections[1].sent)
+
+        self._run(scenario)
+        assert self.server.connections[0].closed
+        assert "spread" == self.server.connections[1].sent[0]["subscription"]["name"]
+
+    def test_failing_callback_does_not_reconnect(self, caplog):
+        received = []
+
+        def fail(message):
+            raise ValueError("bug in callback")
+
+        self.ws.subscribe("ticker", ["XBT/USD"], callback=fail)
+        self.ws.on("ticker", received.append)
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            conn = self.server.connections[0]
+            await _until(lambda: conn.sent)
+            conn.push([1, {"a": ["5525.40000", 1, "1.000"]}, "ticker", "XBT/USD"])
+            conn.push([1, {"a": ["5525.50000", 1, "1.000"]}, "ticker", "XBT/USD"])
+            await _until(lambda: len(received) == 2)
+
+        self._run(scenario)
+        assert 1 == len(self.server.connections)
+        assert 2 == len([r for r in caplog.records if r.exc_info])
+
+    def test_dispatch_errors_are_raised(self):
+        self.ws.subscribe("ticker", ["XBT/USD"])
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            self.server.connections[0].push(["not", "a", "message"])
+            await asyncio.sleep(0.05)
+
+        # a message the client can't handle is a bug, not a reason to reconnect
+        with pytest.raises(AttributeError):
+            self._run(scenario)
+        assert 1 == len(self.server.connections)
+        assert self.server.connections[0].closed
+
+    def test_private_channels_use_a_token(self):
+        received = []
+        self.ws.subscribe("ownTrades", callback=received.append)
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            conn = self.server.connections[0]
+            await _until(lambda: conn.sent)
+            conn.push(
+                [
+                    [{"TDLH43-DVQXD-2KHVYY": {"pair": "XBT/EUR"}}],
+                    "ownTrades",
+                    {"sequence": 2},
+                ]
+            )
+            await _until(lambda: received)
+
+        self._run(scenario)
+        conn = self.server.connections[0]
+        assert conn.url.startswith("wss://ws-auth")
+        assert "token-1" == conn.sent[0]["subscription"]["token"]
+        assert 2 == received[0].sequence
+
+    def test_token_is_fetched_off_the_event_loop(self):
+        self.ws.subscribe("openOrders")
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            await _until(lambda: self.server.connections[0].sent)
+
+        self._run(scenario)
+        assert threading.get_ident() not in self.ws.client.threads
+
+    def test_async_client_token(self):
+        self.ws = WebSocketClient(FakeAsyncClient(), connect=self.server.connect)
+        self.ws.subscribe("openOrders")
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            await _until(lambda: self.server.connections[0].sent)
+
+        self._run(scenario)
+        sent = self.server.connections[0].sent[0]
+        assert "async-token" == sent["subscription"]["token"]
+
+    def test_subscribing_while_running(self):
+        self.ws.subscribe("ticker", ["XBT/USD"])
+
+        async def scenario():
+            await _until(lambda: self.server.connections)
+            public = self.server.connections[0]
+            await _until(lambda: public.sent)
+
+            # the public connection is open, so the subscription is sent on it
+            await self.ws.subscribe("spread", ["XBT/USD"])
+            assert "spread" == public.sent[-1]["subscription"]["name"]
+
+            # there is no private connection yet, so one is opened
+            assert self.ws.subscribe("ownTrades") is None
+            await _until(lambda: len(self.server.connections) == 2)
+            await _until(lambda: self.server.connections[1].sent)
+
+        self._run(scenario)
+        private = self.server.connections[1]
+        assert private.url.startswith("wss://ws-auth")
+        assert "ownTrades" == private.sent[0]["subscription"]["name"]
+
+    def test_unknown_channel(self):
+        with pytest.raises(ValueError):
+            self.ws.subscribe("nope")